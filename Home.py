@@ -1,8 +1,13 @@
 import streamlit as st
 import os
 
+from utils.warmup import start_warmup
+
 st.set_page_config(page_title="Hoyalytics Bond Yield Predictor", layout="wide", initial_sidebar_state="collapsed")
 
+# Import the forecasting stack and load the model catalog in the background
+start_warmup()
+
 hide_nav_style = """
     <style>
         [data-testid="stSidebarNav"] { display: none; }
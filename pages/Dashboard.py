@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
 from datetime import date, timedelta
-from pandas.tseries.holiday import USFederalHolidayCalendar
-from pandas.tseries.offsets import CustomBusinessDay
+from utils.business_calendar import get_business_calendar
+from utils.historical_store import HISTORICAL_CSV, get_historical_store
+from utils.session_data import get_shared_base, start_session
 
 # ─── Page Config ───────────────────────────────────────────
 st.set_page_config(page_title="Bond Yield Dashboard", layout="wide", initial_sidebar_state="collapsed")
@@ -56,9 +57,8 @@ start_date = pd.to_datetime("2025-03-21").date()
 today = date.today()
 two_years_later = start_date + timedelta(days=730)
 
-us_bd = CustomBusinessDay(calendar=USFederalHolidayCalendar())
-all_business_days = pd.date_range(start=start_date, end=two_years_later, freq=us_bd)
-df_all_business_days = pd.DataFrame({'Business Day': all_business_days})
+# Computed once per process; picking an end date only slices it
+business_calendar = get_business_calendar(start_date, two_years_later)
 
 # ─── Date Picker ───────────────────────────────────────────
 end_date = st.date_input(
@@ -69,35 +69,17 @@ end_date = st.date_input(
     help="You may select any end date within 2 years of the fixed start (March 21, 2025)"
 )
 
-# ─── Filter Dates ──────────────────────────────────────────
-df_selected_days = df_all_business_days[
-    (df_all_business_days["Business Day"] >= pd.to_datetime(start_date)) &
-    (df_all_business_days["Business Day"] <= pd.to_datetime(end_date))
-]
-
-# ─── Merge with Historical CSV ─────────────────────────────
-csv_path = "mnt/data/filtered.csv"
+# ─── Join Historical Data onto the Selected Days ───────────
+# The joined history is shared by all sessions; this session only keeps its range and later edits
 try:
-    historical_df = pd.read_csv(csv_path, parse_dates=["date"])
-    historical_df.rename(columns={"date": "Business Day"}, inplace=True)
-    historical_df.drop(columns=["Unnamed: 0"], inplace=True, errors="ignore")
-
-    merged_df = pd.merge(
-        df_selected_days,
-        historical_df,
-        on="Business Day",
-        how="left"
-    )
-    st.session_state["filtered_df"] = merged_df
+    shared_base = get_shared_base(business_calendar, get_historical_store(HISTORICAL_CSV))
     st.success("Historical data successfully merged.")
 except Exception as e:
     st.warning(f"Could not load or merge historical data: {e}")
-    st.session_state["filtered_df"] = df_selected_days.copy()
+    shared_base = get_shared_base(business_calendar, None)
 
-# ─── Store base frame if not present ──────────────────────
-if "base_df" not in st.session_state:
-    st.session_state["base_df"] = df_all_business_days.copy()
+session_data = start_session(st.session_state, shared_base, start_date, end_date)
 
 # ─── Display Result ───────────────────────────────────────
 st.subheader(f"Business Days from {start_date} to {end_date}")
-st.dataframe(st.session_state["filtered_df"], use_container_width=True)
+st.dataframe(session_data.frame(), use_container_width=True)
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 
+from utils.session_data import get_session_data
+
 st.set_page_config(page_title="Select Variables", layout="wide", initial_sidebar_state="collapsed")
 
 st.markdown("<style>[data-testid='stSidebarNav']{display:none;}</style>", unsafe_allow_html=True)
@@ -43,8 +45,7 @@ if "selected_vars" not in st.session_state:
     st.session_state["selected_vars"] = []
 if "selected_tariffs" not in st.session_state:
     st.session_state["selected_tariffs"] = []
-if "filtered_df" not in st.session_state:
-    st.session_state["filtered_df"] = None
+session_data = get_session_data(st.session_state)
 
 # ─── Hardcoded Descriptive Tariff Mapping ─────────────────
 label_mapping = {
@@ -102,16 +103,16 @@ if st.button("Apply Selections", use_container_width=True):
     st.session_state["selected_vars"] = new_var_selection
     st.session_state["selected_tariffs"] = selected_tariff_columns
 
-    if st.session_state["filtered_df"] is None:
+    if session_data is None:
         st.warning("No business-day data found. Please run the Dashboard page first.")
     else:
-        df = st.session_state["filtered_df"].copy()
+        current_columns = session_data.columns
 
-        # Step 1: Always preserve the business day
-        final_order = ["Business Day"]
+        # Step 1: The business day is always kept by the session data
+        final_order = []
 
         # Step 2: All tariffs (sorted by start_tariff_XX)
-        tariff_cols = sorted([col for col in df.columns if col.startswith("start_tariff_")])
+        tariff_cols = sorted([col for col in current_columns if col.startswith("start_tariff_")])
         final_order += tariff_cols
 
         # Step 3: Append selected variables in exact order (if present)
@@ -123,21 +124,18 @@ if st.button("Apply Selections", use_container_width=True):
 
         for ui_label, columns in ordered_variable_cols:
             if ui_label in new_var_selection:
-                final_order.extend([col for col in columns if col in df.columns])
-
-        # Step 4: Filter the DataFrame to just the final column order
-        df = df[[col for col in final_order if col in df.columns]]
+                final_order.extend([col for col in columns if col in current_columns])
 
-        # Save to session
-        st.session_state["filtered_df"] = df
+        # Step 4: Save the column selection to the session overlay
+        session_data.select_columns(final_order)
         st.session_state["FFR_BOOL"] = "Inflation / FFR" in new_var_selection
         st.session_state["VIX_BOOL"] = "Consumer Sentiment / VIX" in new_var_selection
         st.session_state["M1_BOOL"] = "M1 Supply" in new_var_selection
         st.success("Tariffs and variables reordered successfully.")
 
 # ─── Preview ──────────────────────────────────────────────
-if st.session_state["filtered_df"] is not None:
-    st.dataframe(st.session_state["filtered_df"], use_container_width=True)
+if session_data is not None:
+    st.dataframe(session_data.frame(), use_container_width=True)
 
 # ─── Navigation ───────────────────────────────────────────
 c1, _, c2 = st.columns([1, 6, 1])
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import date
 
+from utils.anchor_points import DATE_COLUMN, anchor_table, read_anchor_table, save_anchors
+from utils.session_data import get_session_data
+
 st.set_page_config(
     page_title="Consumer Sentiment & VIX",
     layout="wide",
@@ -22,10 +24,6 @@ st.markdown("""
   .stApp { background: linear-gradient(180deg,#000 0%,#072f5f 100%); color: white; font-family: 'Segoe UI', sans-serif; }
   .section-title { font-size:1.75rem; font-weight:700; color:#cbf0ff; margin-bottom:1.5rem; }
   .label-title { font-weight:600; font-size:1rem; color:#cbf0ff; text-align:center; padding-bottom:0.5rem; }
-  .date-box {
-    background: rgba(0,0,0,0.7); border-left:4px solid #58cced; border-radius:6px;
-    padding:0.5rem; color:#cbf0ff; text-align:center; margin-bottom:0.4rem; font-weight:600;
-  }
   .stButton>button {
     background:linear-gradient(90deg,#3895d3,#58cced);
     color:white!important; font-weight:600; padding:0.6rem 2rem;
@@ -41,97 +39,67 @@ st.markdown(
 )
 
 # ─── Load & Validate Data ─────────────────────────────────
-if "filtered_df" not in st.session_state:
+session_data = get_session_data(st.session_state)
+if session_data is None:
     st.error("No business day data found. Please run the Dashboard page first.")
     st.stop()
 
-# Copy & index by Business Day
-df = st.session_state["filtered_df"].copy()
-df["Business Day"] = pd.to_datetime(df["Business Day"])
-df.set_index("Business Day", inplace=True)
+# Materialize only the edited columns (missing ones come back as NaN), indexed by Business Day
+df = session_data.frame(["diff_CSD", "VIX_close"]).set_index("Business Day")
 
 today = pd.to_datetime(date.today())
 
-# ─── Ensure Columns Exist ────────────────────────────────
-for col in ["diff_CSD", "VIX_close"]:
-    if col not in df.columns:
-        df[col] = np.nan
-df["diff_CSD"]  = pd.to_numeric(df["diff_CSD"], errors="coerce")
-df["VIX_close"] = pd.to_numeric(df["VIX_close"], errors="coerce")
-
 # ─── Define Editable Range ───────────────────────────────
 editable_mask = df.index >= today
 editable_df   = df.loc[editable_mask]
 
-# ─── Build Input UI ───────────────────────────────────────
-inputs = {}
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.markdown("<div class='label-title'>Date</div>", unsafe_allow_html=True)
-with col2:
-    st.markdown("<div class='label-title'>Cumulative CSD</div>", unsafe_allow_html=True)
-with col3:
-    st.markdown("<div class='label-title'>VIX Close</div>", unsafe_allow_html=True)
-
-for i, (day, row) in enumerate(editable_df.iterrows()):
-    date_str = day.strftime("%Y-%m-%d")
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        st.markdown(f"<div class='date-box'>{date_str}</div>", unsafe_allow_html=True)
-    with c2:
-        csd_cum = st.number_input(
-            "CSD", key=f"cs_{i}", label_visibility="collapsed",
-            value=float(row["diff_CSD"]) if not np.isnan(row["diff_CSD"]) else 0.0,
-            format="%.2f"
-        )
-    with c3:
-        vix = st.number_input(
-            "VIX", key=f"vix_{i}", label_visibility="collapsed",
-            value=float(row["VIX_close"]) if not np.isnan(row["VIX_close"]) else 0.0,
-            format="%.2f"
-        )
-    inputs[date_str] = {"cum_CSD": csd_cum, "VIX_close": vix}
+# ─── Anchor Point Editor ─────────────────────────────────
+# Only the dates you anchor are entered; every other day is interpolated on save
+anchor_vars = ["cum_CSD", "VIX_close"]
+anchor_labels = ["Cumulative CSD", "VIX Close"]
+saved_anchors = session_data.anchors
+if "cum_CSD" not in saved_anchors:
+    # Until the first save, start from the non-zero values already in the editable range
+    saved_anchors = {
+        var: {day: float(v) for day, v in editable_df[col].items() if pd.notna(v) and v != 0}
+        for var, col in zip(anchor_vars, ["diff_CSD", "VIX_close"])
+    }
+
+if len(editable_df):
+    st.markdown("<div class='label-title'>Anchor Points</div>", unsafe_allow_html=True)
+    edited_anchors = st.data_editor(
+        anchor_table(saved_anchors, anchor_vars, anchor_labels),
+        key="csd_vix_anchors",
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            DATE_COLUMN: st.column_config.DateColumn(
+                DATE_COLUMN, min_value=editable_df.index[0].date(), max_value=editable_df.index[-1].date(), required=True
+            ),
+            "Cumulative CSD": st.column_config.NumberColumn("Cumulative CSD", format="%.2f"),
+            "VIX Close": st.column_config.NumberColumn("VIX Close", format="%.2f"),
+        },
+    )
+else:
+    st.info("The selected range has no business days from today on.")
+    edited_anchors = anchor_table({}, anchor_vars, anchor_labels)
 
 # ─── Save & Process ───────────────────────────────────────
 _, center, _ = st.columns([4,1,4])
 with center:
     if st.button("Save Data"):
-        # 1) Gather raw cumulative CSD inputs (0.0 → NaN for interpolate)
-        raw_cum = {
-            pd.to_datetime(dstr): vals["cum_CSD"] if vals["cum_CSD"] != 0.0 else np.nan
-            for dstr, vals in inputs.items()
-        }
+        # 1) Read the anchors, moving weekend and holiday dates to the next business day
+        anchors, dropped = read_anchor_table(edited_anchors, editable_df.index, anchor_vars, anchor_labels)
+        if dropped:
+            st.warning(f"Ignored anchors outside the editable range: {', '.join(map(str, dropped))}")
 
-        # 2) Build a Series over every editable date
-        cum_series = pd.Series(raw_cum).reindex(editable_df.index)
-
-        # 3) Interpolate forward & fill leading NaNs with 0 (just like VIX)
-        cum_series = (
-            cum_series
-            .interpolate(method="linear", limit_direction="forward")
-            .fillna(0.0)
-        )
-
-        # 4) Compute diff_CSD as day-over-day delta of that smooth curve
-        diff_series = cum_series.diff().fillna(cum_series)
-
-        # 5) Write diff_CSD back into DataFrame
-        df.loc[editable_mask, "diff_CSD"] = diff_series.values
-
-        # 6) Overwrite VIX inputs and interpolate as before
-        df.loc[editable_mask, "VIX_close"] = [
-            inputs[d.strftime("%Y-%m-%d")]["VIX_close"]
-            for d in editable_df.index
-        ]
-        v = df.loc[editable_mask, "VIX_close"].replace(0, np.nan)
-        df.loc[editable_mask, "VIX_close"] = (
-            v.interpolate(method="linear", limit_direction="forward")
-             .fillna(0)
-        )
+        # 2) Interpolate every variable forward in one pass (leading days 0), difference
+        #    cum_CSD into diff_CSD, and record the edits in the session overlay
+        save_anchors(session_data, anchors, editable_df.index)
 
-        # 7) Commit & preview
-        df.reset_index(inplace=True)
-        st.session_state["filtered_df"] = df
+        # 3) Commit & preview
+        df = session_data.frame()
         st.success(
             "Data saved:\n"
             "- `diff_CSD` interpolated on your cumulative inputs and then differenced\n"
@@ -4,6 +4,8 @@ import platform
 import subprocess
 import sys
 
+from utils.session_data import get_session_data
+
 # ─── Install streamlit-calendar if needed ─────────────────────────────
 try:
     from streamlit_calendar import calendar
@@ -81,17 +83,13 @@ st.title("Tariff Implementation Dates")
 st.write("Click dates on the calendar for each tariff to mark them for implementation.")
 
 # ─── Preconditions ────────────────────────────────────────────────────
-if "filtered_df" not in st.session_state or "base_df" not in st.session_state:
+session_data = get_session_data(st.session_state)
+if session_data is None:
     st.error("Missing required data. Please run the Dashboard page first.")
     st.stop()
 
-# Copy data
-df = st.session_state["filtered_df"].copy()
-base_df = st.session_state["base_df"].copy()
-
-# Prepare dates
-business_dates = pd.to_datetime(base_df["Business Day"]).dt.date.tolist()
-df["Business Day"] = pd.to_datetime(df["Business Day"]).dt.date
+# Prepare dates (any day of the shared window can be clicked; only selected days are saved)
+business_dates = set(pd.to_datetime(session_data.base.days).date)
 
 selected_tariffs = st.session_state.get("selected_tariffs", [])
 
@@ -150,16 +148,10 @@ with save_col:
         changed = []
         picks = st.session_state["calendar_picks"]
         for tariff, days in picks.items():
-            if tariff not in df.columns:
-                df[tariff] = 0
-            for day in days:
-                mask = df["Business Day"] == day
-                if not mask.any():
-                    continue
-                if df.loc[mask, tariff].values[0] != 1:
-                    df.loc[mask, tariff] = 1
-                    changed.append((tariff, day))
-        st.session_state["filtered_df"] = df
+            # Only the flagged days are stored in the session overlay
+            changed.extend((tariff, day) for day in session_data.flag(tariff, days))
+        df = session_data.frame()
+        df["Business Day"] = df["Business Day"].dt.date
         if changed:
             st.success("✅ Tariff dates updated:")
             for t, d in changed:
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
 
+from utils.session_data import get_session_data, session_frame
+
 st.set_page_config(
     page_title="Final Data Overview",
     layout="wide",
@@ -39,9 +41,13 @@ st.markdown("""
 st.markdown("<div class='page-title'>📊 Final Combined Data Preview</div>", unsafe_allow_html=True)
 
 # ─── Show Final DataFrame ─────────────────────────────────
-if "filtered_df" in st.session_state:
-    df = st.session_state["filtered_df"]
+df = session_frame(st.session_state)
+if df is not None:
     st.dataframe(df, use_container_width=True)
+    session_data = get_session_data(st.session_state)
+    if session_data is not None:
+        with st.expander("Session memory"):
+            st.json(session_data.memory_report())
 else:
     st.warning("⚠️ No data found. Please run the Dashboard page first.")
 
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import date
 
+from utils.anchor_points import DATE_COLUMN, anchor_table, read_anchor_table, save_anchors
+from utils.session_data import get_session_data
+
 st.set_page_config(
     page_title="Enter FFR & Inflation",
     layout="wide",
@@ -22,10 +24,6 @@ st.markdown("""
   .stApp { background: linear-gradient(180deg,#000 0%,#072f5f 100%); color: white; font-family: 'Segoe UI', sans-serif; }
   .section-title { font-size:1.75rem; font-weight:700; color:#cbf0ff; margin-bottom:1.5rem; }
   .label-title { font-weight:600; font-size:1rem; color:#cbf0ff; text-align:center; padding-bottom:0.5rem; }
-  .date-box {
-    background: rgba(0,0,0,0.7); border-left:4px solid #58cced; border-radius:6px;
-    padding:0.5rem; color:#cbf0ff; text-align:center; margin-bottom:0.4rem; font-weight:600;
-  }
   .stButton>button {
     background:linear-gradient(90deg,#3895d3,#58cced);
     color:white!important; font-weight:600; padding:0.6rem 2rem;
@@ -41,82 +39,58 @@ st.markdown(
 )
 
 # ─── Load & Validate Data ─────────────────────────────────
-if "filtered_df" not in st.session_state:
+session_data = get_session_data(st.session_state)
+if session_data is None:
     st.error("No business day data found. Please run the Dashboard page first.")
     st.stop()
 
-df = st.session_state["filtered_df"].copy()
-df["Business Day"] = pd.to_datetime(df["Business Day"])
-df.set_index("Business Day", inplace=True)
+# Materialize only the edited columns (missing ones come back as NaN), indexed by Business Day
+df = session_data.frame(["diff_FFR", "diff_CPI"]).set_index("Business Day")
 
 today = pd.to_datetime(date.today())
 
-# ─── Ensure Columns Exist ────────────────────────────────
-for col in ["diff_FFR", "diff_CPI"]:
-    if col not in df.columns:
-        df[col] = np.nan
-df["diff_FFR"] = pd.to_numeric(df["diff_FFR"], errors="coerce")
-df["diff_CPI"] = pd.to_numeric(df["diff_CPI"], errors="coerce")
-
 # ─── Define Editable Range ───────────────────────────────
 editable_mask = df.index >= today
 editable_df   = df.loc[editable_mask]
 
-# ─── Build Input UI ───────────────────────────────────────
-inputs = {}
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.markdown("<div class='label-title'>Date</div>", unsafe_allow_html=True)
-with col2:
-    st.markdown("<div class='label-title'>FFR Level</div>", unsafe_allow_html=True)
-with col3:
-    st.markdown("<div class='label-title'>Inflation (CPI) Level</div>", unsafe_allow_html=True)
-
-for i, (day, row) in enumerate(editable_df.iterrows()):
-    date_str = day.strftime("%Y-%m-%d")
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        st.markdown(f"<div class='date-box'>{date_str}</div>", unsafe_allow_html=True)
-    with c2:
-        ffr = st.number_input(
-            "FFR", key=f"ffr_{i}", label_visibility="collapsed",
-            value=0.0, format="%.2f"
-        )
-    with c3:
-        cpi = st.number_input(
-            "CPI", key=f"cpi_{i}", label_visibility="collapsed",
-            value=0.0, format="%.2f"
-        )
-    inputs[date_str] = {"FFR": ffr, "CPI": cpi}
+# ─── Anchor Point Editor ─────────────────────────────────
+# Only the dates you anchor are entered; every other day is interpolated on save
+anchor_vars = ["FFR", "CPI"]
+anchor_labels = ["FFR Level", "Inflation (CPI) Level"]
+
+if len(editable_df):
+    st.markdown("<div class='label-title'>Anchor Points</div>", unsafe_allow_html=True)
+    edited_anchors = st.data_editor(
+        anchor_table(session_data.anchors, anchor_vars, anchor_labels),
+        key="ffr_cpi_anchors",
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            DATE_COLUMN: st.column_config.DateColumn(
+                DATE_COLUMN, min_value=editable_df.index[0].date(), max_value=editable_df.index[-1].date(), required=True
+            ),
+            "FFR Level": st.column_config.NumberColumn("FFR Level", format="%.2f"),
+            "Inflation (CPI) Level": st.column_config.NumberColumn("Inflation (CPI) Level", format="%.2f"),
+        },
+    )
+else:
+    st.info("The selected range has no business days from today on.")
+    edited_anchors = anchor_table({}, anchor_vars, anchor_labels)
 
 # ─── Save & Process ───────────────────────────────────────
 _, center, _ = st.columns([4,1,4])
 with center:
     if st.button("Save Data"):
-        # 1) Treat zero as 'not entered'
-        raw_ffr = {
-            pd.to_datetime(d): v["FFR"] if v["FFR"] != 0.0 else np.nan
-            for d, v in inputs.items()
-        }
-        raw_cpi = {
-            pd.to_datetime(d): v["CPI"] if v["CPI"] != 0.0 else np.nan
-            for d, v in inputs.items()
-        }
-
-        # 2) Interpolate forward and fill early NaNs with 0
-        level_ffr = pd.Series(raw_ffr).reindex(editable_df.index).interpolate(method="linear", limit_direction="forward").fillna(0.0)
-        level_cpi = pd.Series(raw_cpi).reindex(editable_df.index).interpolate(method="linear", limit_direction="forward").fillna(0.0)
-
-        # 3) Compute differences and store in diff columns
-        diff_ffr = level_ffr.diff().fillna(level_ffr)
-        diff_cpi = level_cpi.diff().fillna(level_cpi)
-
-        df.loc[editable_mask, "diff_FFR"] = diff_ffr.values
-        df.loc[editable_mask, "diff_CPI"] = diff_cpi.values
-
-        # 4) Commit
-        df.reset_index(inplace=True)
-        st.session_state["filtered_df"] = df
+        # 1) Read the anchors, moving weekend and holiday dates to the next business day
+        anchors, dropped = read_anchor_table(edited_anchors, editable_df.index, anchor_vars, anchor_labels)
+        if dropped:
+            st.warning(f"Ignored anchors outside the editable range: {', '.join(map(str, dropped))}")
+
+        # 2) Interpolate forward (early days 0), store the differences in the diff columns
+        #    and record the edits in the session overlay (the shared history is left untouched)
+        save_anchors(session_data, anchors, editable_df.index)
+        df = session_data.frame()
         st.success("FFR and CPI levels interpolated; differences stored in diff_FFR and diff_CPI.")
         st.markdown("### Preview")
         st.dataframe(df[["Business Day", "diff_FFR", "diff_CPI"]], use_container_width=True)
@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 from datetime import date
 
+from utils.anchor_points import DATE_COLUMN, anchor_table, read_anchor_table, save_anchors
+from utils.session_data import get_session_data
+
 st.set_page_config(
     page_title="Enter M1 Supply",
     layout="wide",
@@ -22,10 +24,6 @@ st.markdown("""
   .stApp { background: linear-gradient(180deg,#000 0%,#072f5f 100%); color: white; font-family: 'Segoe UI', sans-serif; }
   .section-title { font-size:1.75rem; font-weight:700; color:#cbf0ff; margin-bottom:1.5rem; }
   .label-title { font-weight:600; font-size:1rem; color:#cbf0ff; text-align:center; padding-bottom:0.5rem; }
-  .date-box {
-    background: rgba(0,0,0,0.7); border-left:4px solid #58cced; border-radius:6px;
-    padding:0.5rem; color:#cbf0ff; text-align:center; margin-bottom:0.4rem; font-weight:600;
-  }
   .stButton>button {
     background:linear-gradient(90deg,#3895d3,#58cced);
     color:white!important; font-weight:600; padding:0.6rem 2rem;
@@ -41,61 +39,55 @@ st.markdown(
 )
 
 # ─── Load & Validate Data ─────────────────────────────────
-if "filtered_df" not in st.session_state:
+session_data = get_session_data(st.session_state)
+if session_data is None:
     st.error("No business day data found. Please run the Dashboard page first.")
     st.stop()
 
-df = st.session_state["filtered_df"].copy()
-df["Business Day"] = pd.to_datetime(df["Business Day"])
-df.set_index("Business Day", inplace=True)
+# Materialize only the edited column (NaN if missing), indexed by Business Day
+df = session_data.frame(["diff_M1_supply"]).set_index("Business Day")
 
 today = pd.to_datetime(date.today())
 
-# ─── Ensure Column Exists ────────────────────────────────
-if "diff_M1_supply" not in df.columns:
-    df["diff_M1_supply"] = np.nan
-df["diff_M1_supply"] = pd.to_numeric(df["diff_M1_supply"], errors="coerce")
-
 # ─── Define Editable Range ───────────────────────────────
 editable_mask = df.index >= today
 editable_df   = df.loc[editable_mask]
 
-# ─── Build Input UI ───────────────────────────────────────
-inputs = {}
-col1, col2 = st.columns(2)
-with col1:
-    st.markdown("<div class='label-title'>Date</div>", unsafe_allow_html=True)
-with col2:
-    st.markdown("<div class='label-title'>M1 Supply Level</div>", unsafe_allow_html=True)
-
-for i, (day, row) in enumerate(editable_df.iterrows()):
-    date_str = day.strftime("%Y-%m-%d")
-    c1, c2 = st.columns(2)
-    with c1:
-        st.markdown(f"<div class='date-box'>{date_str}</div>", unsafe_allow_html=True)
-    with c2:
-        m1 = st.number_input(
-            "M1 Supply", key=f"m1_{i}", label_visibility="collapsed",
-            value=0.0, format="%.2f"
-        )
-    inputs[date_str] = {"M1": m1}
+# ─── Anchor Point Editor ─────────────────────────────────
+# Only the dates you anchor are entered; every other day is interpolated on save
+anchor_vars = ["M1"]
+anchor_labels = ["M1 Supply Level"]
+
+if len(editable_df):
+    st.markdown("<div class='label-title'>Anchor Points</div>", unsafe_allow_html=True)
+    edited_anchors = st.data_editor(
+        anchor_table(session_data.anchors, anchor_vars, anchor_labels),
+        key="m1_anchors",
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            DATE_COLUMN: st.column_config.DateColumn(
+                DATE_COLUMN, min_value=editable_df.index[0].date(), max_value=editable_df.index[-1].date(), required=True
+            ),
+            "M1 Supply Level": st.column_config.NumberColumn("M1 Supply Level", format="%.2f"),
+        },
+    )
+else:
+    st.info("The selected range has no business days from today on.")
+    edited_anchors = anchor_table({}, anchor_vars, anchor_labels)
 
 # ─── Save & Process ───────────────────────────────────────
 _, center, _ = st.columns([4,1,4])
 with center:
     if st.button("Save Data"):
-        raw_m1 = {
-            pd.to_datetime(d): v["M1"] if v["M1"] != 0.0 else np.nan
-            for d, v in inputs.items()
-        }
-
-        level_m1 = pd.Series(raw_m1).reindex(editable_df.index).interpolate(method="linear", limit_direction="forward").fillna(0.0)
-        diff_m1 = level_m1.diff().fillna(level_m1)
-
-        df.loc[editable_mask, "diff_M1_supply"] = diff_m1.values
+        anchors, dropped = read_anchor_table(edited_anchors, editable_df.index, anchor_vars, anchor_labels)
+        if dropped:
+            st.warning(f"Ignored anchors outside the editable range: {', '.join(map(str, dropped))}")
 
-        df.reset_index(inplace=True)
-        st.session_state["filtered_df"] = df
+        # Interpolate, difference and record the edit in the session overlay (the shared history is left untouched)
+        save_anchors(session_data, anchors, editable_df.index)
+        df = session_data.frame()
         st.success("M1 Supply levels interpolated; differences stored in `diff_M1_supply`.")
         st.markdown("### Preview")
         st.dataframe(df[["Business Day", "diff_M1_supply"]], use_container_width=True)
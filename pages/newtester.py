@@ -1,25 +1,30 @@
+import io
+
 import streamlit as st
-import numpy as np
-from scipy.linalg import expm
-from scipy.optimize import minimize
-from scipy.special import expit
-from scipy.stats import norm
 import pandas as pd
-import statsmodels
-import os
 
-from utils.unpickling import get_yield_forecast_at_end_date
+from utils.forecasting import forecast_maturities
+from utils.unpickling import get_yield_simulation
+from utils.all_maturities import all_maturities
+from utils.model_catalog import VARIABLE_GROUPS, get_catalog, groups_from_flags, model_type_for
+from utils.session_data import session_frame
+from utils.tariff_mask import TariffMask
+from utils.model_registry import model_registry
+from utils.warmup import start_warmup, warmup_report
+
+######################################################################### ADD HERE
+#exogenous variable final values (materialized once per rerun)
+exog_data = session_frame(st.session_state)
+
+#########################################################################
 
 # Ensure required session state data exists
-if "filtered_df" not in st.session_state:
+if exog_data is None:
     st.error("No data found. Please complete the previous steps.")
     st.stop()
 
-######################################################################### ADD HERE
-#exogenous variable final values
-exog_data = st.session_state["filtered_df"]
-
-#########################################################################
+# Keep warming up the rest of the catalog in the background (started on the landing page unless it was skipped)
+start_warmup()
 
 
 
@@ -45,118 +50,105 @@ for col in exog_data.columns:
     if col != "DATE":
         exog_data[col] = pd.to_numeric(exog_data[col], errors="coerce")
 
+# Pack the daily tariff flags into one bitset per day
+tariff_mask = TariffMask.from_frame(exog_data)
+
 # Resample the data to monthly frequency
-exog_data_monthly = exog_data.resample('M').mean()
+exog_data_monthly = exog_data.resample('ME').mean()
 
 exogs = exog_data_monthly[[var for var in exog_vars if var in exog_data_monthly.columns]].dropna()
 
 # contain if statements to check if ffr/cpi, vix/csd, and m1 are in selected by user
 
 ######################################################################### ADD HERE
-FFR_BOOL = st.session_state["FFR_BOOL"]
-VIX_BOOL = st.session_state["VIX_BOOL"]
-M1_BOOL = st.session_state["M1_BOOL"]
-
-if FFR_BOOL == 0:
-    exogs = exogs.drop(columns=[col for col in ['diff_FFR', 'diff_CPI'] if col in exogs.columns])
+groups = groups_from_flags(st.session_state["FFR_BOOL"], st.session_state["VIX_BOOL"], st.session_state["M1_BOOL"])
 
-if VIX_BOOL == 0:
-    exogs = exogs.drop(columns=[col for col in ['VIX_close', 'diff_CSD'] if col in exogs.columns])
-
-if M1_BOOL == 0:
-    exogs = exogs.drop(columns=[col for col in ['diff_M1_supply'] if col in exogs.columns])
+# Drop the columns of the variable groups that were not selected
+for group, columns in VARIABLE_GROUPS:
+    if group not in groups:
+        exogs = exogs.drop(columns=[col for col in columns if col in exogs.columns])
 #########################################################################
 
-# make any value of exogs for tariff columns that is greater than 0 equal to 1
-exogs[tariffs] = exogs[tariffs].applymap(lambda x: 1 if x > 0 else 0)
+# A tariff counts in a month if it is active on any of its days; the lag and lead
+# effects shift by one of the kept months. A kept month without daily rows has no
+# active tariffs. The flags stay packed until here.
+monthly_mask = tariff_mask.monthly_any().reindex(exogs.index)
+exogs = pd.concat(
+    [exogs.drop(columns=[col for col in tariffs if col in exogs.columns]), monthly_mask.to_model_columns()],
+    axis=1
+)
 
-#create a new column for a lag effect before and after all tariffs in a new column called 'tariff_lag_effect' for each tariff column
-for tariff in tariffs:
-    exogs[f'{tariff}_lag_effect'] = exogs[tariff].shift(1).fillna(0)
+future_data = exogs
 
-for tariff in tariffs:
-    exogs[f'{tariff}_future_effect'] = exogs[tariff].shift(-1).fillna(0) 
+# Resolve the models for the selected variables from the catalog index
+catalog = get_catalog()
+entries = catalog.models_for(groups)
+missing_maturities = [maturity for maturity in all_maturities if catalog.get(groups, maturity) is None]
+if missing_maturities:
+    st.warning(f"No {model_type_for(groups)} model for maturities: {', '.join(f'{m}-year' for m in missing_maturities)}")
+if not entries:
+    st.error(f"The model catalog has no {model_type_for(groups)} models.")
+    st.stop()
 
-future_data = exogs
+# Reject a mismatched exog frame before any model is loaded, and put the columns in model order
+try:
+    future_data = future_data[catalog.validate_models(entries, future_data.columns)]
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
 
-#unpickle correct model and 
-import numpy as np
-from scipy.linalg import expm
-from scipy.optimize import minimize
-from scipy.special import expit
-from scipy.stats import norm
-import pandas as pd
 
-#blank list
-# to store the file names
-file_names = []
-
-# "arima_model_2-year_monthly_tariff_vix_cs_m1.pkl", 
-
-if FFR_BOOL == 1:
-    if VIX_BOOL == 1:
-        if M1_BOOL == 1:
-            # all variables selected
-            file_names.extend(["models/arima_model_2-year_monthly_all.pkl", "models/arima_model_3-year_monthly_all.pkl", "models/arima_model_5-year_monthly_all.pkl", "models/arima_model_7-year_monthly_all.pkl", "models/arima_model_10-year_monthly_all.pkl", "models/arima_model_20-year_monthly_all.pkl"])
-        else:
-            # ffr/cpi and vix/cs selected
-            file_names.extend(["models/arima_model_2-year_monthly_tariff_ffr_cpi_vix_cs.pkl", "models/arima_model_3-year_monthly_tariff_ffr_cpi_vix_cs.pkl", "models/arima_model_5-year_monthly_tariff_ffr_cpi_vix_cs.pkl", "models/arima_model_7-year_monthly_tariff_ffr_cpi_vix_cs.pkl", "models/arima_model_10-year_monthly_tariff_ffr_cpi_vix_cs.pkl", "models/arima_model_20-year_monthly_tariff_ffr_cpi_vix_cs.pkl"])
-    elif M1_BOOL == 1:
-        # ffr/cpi and m1 selected
-        file_names.extend(["models/arima_model_2-year_monthly_tariff_ffr_cpi_m1.pkl", "models/arima_model_3-year_monthly_tariff_ffr_cpi_m1.pkl", "models/arima_model_5-year_monthly_tariff_ffr_cpi_m1.pkl", "models/arima_model_7-year_monthly_tariff_ffr_cpi_m1.pkl", "models/arima_model_10-year_monthly_tariff_ffr_cpi_m1.pkl", "models/arima_model_20-year_monthly_tariff_ffr_cpi_m1.pkl"])
-    else:
-        # only ffr/cpi selected
-        file_names.extend(["models/arima_model_2-year_monthly_tariff_ffr_cpi.pkl", "models/arima_model_3-year_monthly_tariff_ffr_cpi.pkl", "models/arima_model_5-year_monthly_tariff_ffr_cpi.pkl", "models/arima_model_7-year_monthly_tariff_ffr_cpi.pkl", "models/arima_model_10-year_monthly_tariff_ffr_cpi.pkl", "models/arima_model_20-year_monthly_tariff_ffr_cpi.pkl"])
-elif VIX_BOOL == 1:
-    # only vix/cs selected
-    file_names.extend(["models/arima_model_2-year_monthly_tariff_vix_cs.pkl", "models/arima_model_3-year_monthly_tariff_vix_cs.pkl", "models/arima_model_5-year_monthly_tariff_vix_cs.pkl", "models/arima_model_7-year_monthly_tariff_vix_cs.pkl", "models/arima_model_10-year_monthly_tariff_vix_cs.pkl", "models/arima_model_20-year_monthly_tariff_vix_cs.pkl"])
-elif M1_BOOL == 1:
-    # only m1 selected
-    file_names.extend(["models/arima_model_2-year_monthly_tariff_m1.pkl", "models/arima_model_3-year_monthly_tariff_m1.pkl", "models/arima_model_5-year_monthly_tariff_m1.pkl", "models/arima_model_7-year_monthly_tariff_m1.pkl", "models/arima_model_10-year_monthly_tariff_m1.pkl", "models/arima_model_20-year_monthly_tariff_m1.pkl"])
-else:
-    # tariffs only selected
-    file_names.extend(["models/arima_model_2-year_monthly_tariff.pkl", "models/arima_model_3-year_monthly_tariff.pkl", "models/arima_model_5-year_monthly_tariff.pkl", "models/arima_model_7-year_monthly_tariff.pkl", "models/arima_model_10-year_monthly_tariff.pkl", "models/arima_model_20-year_monthly_tariff.pkl"])
-
-
-maturities = [2, 3, 5, 7, 10, 20]
 # create an empty dictionary to store the output
 output = {}
 end_date = future_data.index[-1]
 if isinstance(end_date, pd.Period):
     end_date = end_date.to_timestamp()
-for maturity, model in zip(maturities, file_names):
-    # Check if the model file exists
-    if not os.path.exists(model):
+jobs = [(entry.maturity, entry.path) for entry in entries]
+
+# Only wait for this page's models; ones the warm-up already loaded are cache hits
+with st.spinner("Loading forecasting models..."):
+    for _, path in jobs:
+        try:
+            model_registry.get(path)
+        except Exception:
+            # forecast_maturities reports it as that maturity's ForecastError below
+            pass
+
+# Forecast all maturities concurrently; results come back in maturity order
+# Passing the session lets a re-run after editing late months only recompute from the first changed month
+for result in forecast_maturities(jobs, future_data, executor="thread", session=st.session_state):
+    if result.error is not None:
+        st.warning(f"{result.maturity}-year forecast failed: {result.error.message}")
         continue
 
-    # Adrian function
-    # Make the end date the last date in future_data
-    predicted_yield = get_yield_forecast_at_end_date(model, future_data, end_date)
+    output[result.maturity] = result.mean.loc[end_date]
 
-    print(f"Running model: {model}")
-    output[maturity] = predicted_yield
+# Create a graph showing the predicted yields. A bare Figure rendered to PNG here
+# draws without importing pyplot (st.pyplot would import it on every run).
+from matplotlib.figure import Figure
+from matplotlib.style import context as style_context
 
-# Create a graph showing the predicted yields
-import matplotlib.pyplot as plt
 
-# Apply the theme
-plt.style.use('dark_background')
-
-# Plot the predicted yields
-plt.figure(figsize=(10, 6))
-plt.plot(output.keys(), output.values(), marker='o', linestyle='-', color='#3895d3')
-plt.title('Predicted Yields by Maturity', color='#FFFFFF', fontsize=16)
-plt.xlabel('Maturity (Years)', color='#FFFFFF', fontsize=12)
-plt.ylabel('Yield', color='#FFFFFF', fontsize=12)
-plt.grid(True, color='#072f5f')
-plt.xticks(maturities, color='#FFFFFF')  # Ensure x-axis ticks match maturities
-plt.yticks(color='#FFFFFF')
-plt.tight_layout()
+def figure_png(figure):
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=200, bbox_inches="tight")
+    return buffer.getvalue()
 
-import streamlit as st
-import pandas as pd
 
-from utils.unpickling import YieldForecastCalculator
+# Apply the theme
+with style_context('dark_background'):
+    # Plot the predicted yields
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(list(output.keys()), list(output.values()), marker='o', linestyle='-', color='#3895d3')
+    ax.set_title('Predicted Yields by Maturity', color='#FFFFFF', fontsize=16)
+    ax.set_xlabel('Maturity (Years)', color='#FFFFFF', fontsize=12)
+    ax.set_ylabel('Yield', color='#FFFFFF', fontsize=12)
+    ax.grid(True, color='#072f5f')
+    ax.set_xticks([entry.maturity for entry in entries])  # Ensure x-axis ticks match the catalog's maturities
+    ax.tick_params(colors='#FFFFFF')
+    fig.tight_layout()
+    chart_png = figure_png(fig)
 
 # Set up the page configuration
 st.set_page_config(page_title="Tester Page", layout="wide", initial_sidebar_state="collapsed")
@@ -172,7 +164,42 @@ st.markdown("""
 st.title("Predictions")
 
 
-st.pyplot(plt)
+st.image(chart_png, use_container_width=True)
+
+# Simulated fan chart: quantiles of Monte Carlo yield paths for each maturity
+if jobs and st.checkbox("Show simulated yield paths (fan chart)"):
+    n_paths = st.select_slider("Simulated paths", options=[1000, 10000, 100000], value=10000)
+    with style_context('dark_background'):
+        fan_fig = Figure(figsize=(14, 7))
+        fan_axes = fan_fig.subplots(2, 3, sharex=True)
+        # Maturities whose forecast failed above are left out; a failed simulation only blanks its panel
+        simulated = [(maturity, model) for maturity, model in jobs if maturity in output]
+        for ax in fan_axes.ravel()[len(simulated):]:
+            ax.set_visible(False)
+        for ax, (maturity, model) in zip(fan_axes.ravel(), simulated):
+            try:
+                summary = get_yield_simulation(model, future_data, n_paths=n_paths, seed=0)
+            except Exception as e:
+                st.warning(f"{maturity}-year simulation failed: {e}")
+                ax.set_visible(False)
+                continue
+            bands = summary.quantiles
+            dates = bands.index.to_timestamp() if isinstance(bands.index, pd.PeriodIndex) else bands.index
+            ax.fill_between(dates, bands[0.05], bands[0.95], color='#3895d3', alpha=0.25, label='5–95%')
+            ax.fill_between(dates, bands[0.25], bands[0.75], color='#3895d3', alpha=0.5, label='25–75%')
+            ax.plot(dates, bands[0.5], color='#58cced', label='Median')
+            ax.set_title(f'{maturity}-Year', color='#FFFFFF')
+            ax.grid(True, color='#072f5f')
+        drawn = [ax for ax in fan_axes.ravel() if ax.get_visible()]
+        if drawn:
+            drawn[0].legend(loc='upper left')
+        fan_fig.autofmt_xdate()
+        fan_fig.tight_layout()
+        fan_png = figure_png(fan_fig)
+    st.image(fan_png, use_container_width=True)
+
+with st.expander("Model warm-up report"):
+    st.json(warmup_report())
 
 # Navigation buttons
 col1, _, col2 = st.columns([1, 6, 1])
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 
+from utils.session_data import session_frame
 from utils.unpickling import YieldForecastCalculator
 
 # Set up the page configuration
@@ -17,7 +18,8 @@ st.markdown("""
 st.title("Tester Page")
 
 # Ensure required session state data exists
-if "filtered_df" not in st.session_state:
+filtered_df = session_frame(st.session_state)
+if filtered_df is None:
     st.error("No data found. Please complete the previous steps.")
     st.stop()
 
@@ -25,7 +27,6 @@ if "filtered_df" not in st.session_state:
 st.subheader("Yield Prediction Results")
 try:
     # Initialize the YieldForecastCalculator with the filtered DataFrame
-    filtered_df = st.session_state["filtered_df"]
     calculator = YieldForecastCalculator(filtered_df)
 
     # Get the forecasted yields
@@ -0,0 +1,152 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Default number of (lambda, maturity grid) loading pairs kept in memory
+DEFAULT_MAX_ENTRIES = 512
+
+AFNS_PARAMETERS = ["level", "slope", "curvature", "lambda"]
+
+
+class LoadingStore:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        LRU store of AFNS B1/B2 loading vectors keyed by lambda and maturity grid.
+
+        Parameters:
+        max_entries (int): Number of (lambda, grid) pairs kept before the least
+            recently used one is dropped.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def loadings(self, lambdas, maturities):
+        """
+        Returns the B1 and B2 loadings of every lambda on one maturity grid.
+
+        Parameters:
+        lambdas (np.ndarray): (sets,) decay parameters.
+        maturities (np.ndarray): (maturities,) grid in years.
+
+        Returns:
+        tuple: B1 and B2, each shaped (sets x maturities).
+        """
+        grid_key = (maturities.shape, maturities.tobytes())
+        unique, inverse = np.unique(lambdas, return_inverse=True)
+        B1 = np.empty((len(unique), len(maturities)))
+        B2 = np.empty_like(B1)
+
+        missing = []
+        with self._lock:
+            for i, lambda_ in enumerate(unique):
+                key = (float(lambda_), grid_key)
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.append(i)
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                B1[i], B2[i] = entry
+
+        if missing:
+            # Compute every missing lambda in one broadcasted pass
+            B1[missing], B2[missing] = compute_loadings(unique[missing], maturities)
+            with self._lock:
+                self.misses += len(missing)
+                for i in missing:
+                    entry = (B1[i].copy(), B2[i].copy())
+                    for array in entry:
+                        array.flags.writeable = False
+                    self._entries[(float(unique[i]), grid_key)] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return B1[inverse], B2[inverse]
+
+    def clear(self):
+        """
+        Empties the store and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns hit, miss and eviction counters and the number of stored entries.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+# Shared by every caller in this process
+loading_store = LoadingStore()
+
+
+def compute_loadings(lambdas, maturities):
+    """
+    Computes the B1 and B2 loadings without caching.
+
+    Parameters:
+    lambdas (array-like): (sets,) decay parameters.
+    maturities (array-like): (maturities,) grid in years.
+
+    Returns:
+    tuple: B1 and B2, each shaped (sets x maturities).
+    """
+    lambdas = np.asarray(lambdas, dtype=float)[:, None]
+    maturities = np.asarray(maturities, dtype=float)
+    decay = np.exp(-lambdas * maturities)
+    B1 = (1 - decay) / (lambdas * maturities)
+    return B1, B1 - decay
+
+
+def params_matrix(params):
+    """
+    Stacks AFNS parameter sets into a (sets x 4) array of level, slope, curvature and lambda.
+
+    Parameters:
+    params: A fit_afns dict, a list of such dicts, a dict of equal-length series
+        keyed like fit_afns_panel's output, or an array-like of rows.
+
+    Returns:
+    np.ndarray: (sets x 4) parameters.
+    """
+    if isinstance(params, dict):
+        return np.column_stack([np.atleast_1d(np.asarray(params[name], dtype=float)) for name in AFNS_PARAMETERS])
+    params = list(params) if not isinstance(params, np.ndarray) else params
+    if len(params) and isinstance(params[0], dict):
+        return np.array([[p[name] for name in AFNS_PARAMETERS] for p in params], dtype=float)
+    return np.atleast_2d(np.asarray(params, dtype=float))
+
+
+def afns_curves(params, maturities, store=loading_store):
+    """
+    Evaluates many AFNS yield curves on one maturity grid.
+
+    Parameters:
+    params: Parameter sets in any form accepted by params_matrix.
+    maturities (array-like): Maturity grid in years, e.g. 300 points for plotting.
+    store (LoadingStore): Store used to memoize the loadings, or None to compute them directly.
+
+    Returns:
+    np.ndarray: (sets x maturities) yields.
+    """
+    params = params_matrix(params)
+    maturities = np.atleast_1d(np.asarray(maturities, dtype=float))
+    if store is None:
+        B1, B2 = compute_loadings(params[:, 3], maturities)
+    else:
+        B1, B2 = store.loadings(params[:, 3], maturities)
+    return params[:, [0]] + params[:, [1]] * B1 + params[:, [2]] * B2
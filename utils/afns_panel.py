@@ -0,0 +1,227 @@
+import sys
+import time
+
+import numpy as np
+
+from utils.afns_curves import compute_loadings
+from utils.model_explanation import afns_design, feasible_sse
+
+# Golden-section ratio used to shrink the lambda brackets
+_INV_PHI = (np.sqrt(5) - 1) / 2
+
+
+def _grid_sse(designs, yields):
+    """
+    Profile SSE of every curve at every grid lambda.
+
+    Parameters:
+    designs (np.ndarray): (grid x maturities x 3) AFNS designs shared by all curves.
+    yields (np.ndarray): (curves x maturities) yields.
+
+    Returns:
+    tuple: SSE (grid x curves) and factors (grid x curves x 3).
+    """
+    factors = np.einsum("gkn,tn->gtk", np.linalg.pinv(designs), yields)
+    residuals = np.einsum("gnk,gtk->gtn", designs, factors) - yields
+    return np.einsum("gtn,gtn->gt", residuals, residuals), factors
+
+
+def _curve_sse(maturities, yields, log_lambdas):
+    """
+    Profile SSE of each curve at its own lambda.
+
+    The level is eliminated by centring, leaving a 2x2 least-squares problem
+    for slope and curvature that is solved in closed form for all curves.
+
+    Returns:
+    tuple: SSE (curves,) and factors (curves x 3).
+    """
+    B1, B2 = compute_loadings(np.exp(log_lambdas), maturities)
+    B1_mean, B2_mean, y_mean = B1.mean(axis=1), B2.mean(axis=1), yields.mean(axis=1)
+    x1 = B1 - B1_mean[:, None]
+    x2 = B2 - B2_mean[:, None]
+    yc = yields - y_mean[:, None]
+    s11, s12, s22 = (x1 * x1).sum(axis=1), (x1 * x2).sum(axis=1), (x2 * x2).sum(axis=1)
+    r1, r2 = (x1 * yc).sum(axis=1), (x2 * yc).sum(axis=1)
+    det = s11 * s22 - s12 * s12
+    slope = (s22 * r1 - s12 * r2) / det
+    curvature = (s11 * r2 - s12 * r1) / det
+    level = y_mean - slope * B1_mean - curvature * B2_mean
+    residuals = yc - slope[:, None] * x1 - curvature[:, None] * x2
+    return (residuals * residuals).sum(axis=1), np.column_stack([level, slope, curvature])
+
+
+def _fit_chunk(maturities, yields, log_grid, designs, xtol, factor_bounds):
+    """
+    Fits a chunk of complete curves: shared grid, then a batched golden-section search.
+    """
+    sse, factors = _grid_sse(designs, yields)
+    feasible = feasible_sse(sse, factors, factor_bounds)
+    # Curves with no lambda inside the bounds fall back to the unconstrained fit
+    bounded = np.isfinite(feasible).any(axis=0)
+    sse = np.where(bounded, feasible, sse)
+
+    def curve_sse(log_lambdas):
+        f, curve_factors = _curve_sse(maturities, yields, log_lambdas)
+        return np.where(bounded, feasible_sse(f, curve_factors, factor_bounds), f), curve_factors
+
+    best = np.argmin(sse, axis=0)
+    rows = np.arange(len(yields))
+    best_sse = sse[best, rows]
+    best_factors = factors[best, rows]
+    best_log = log_grid[best]
+
+    # Bracket each curve's minimum by the neighbours of its best grid point
+    a = log_grid[np.maximum(best - 1, 0)]
+    b = log_grid[np.minimum(best + 1, len(log_grid) - 1)]
+    c = b - _INV_PHI * (b - a)
+    d = a + _INV_PHI * (b - a)
+    fc, factors_c = curve_sse(c)
+    fd, factors_d = curve_sse(d)
+
+    while np.max(b - a) > xtol:
+        left = fc < fd
+        b = np.where(left, d, b)
+        a = np.where(left, a, c)
+        x = np.where(left, b - _INV_PHI * (b - a), a + _INV_PHI * (b - a))
+        fx, factors_x = curve_sse(x)
+        # Left: the old c becomes d and x the new c; right: the old d becomes c and x the new d
+        c, d = np.where(left, x, d), np.where(left, c, x)
+        fc, fd = np.where(left, fx, fd), np.where(left, fc, fx)
+        factors_c, factors_d = (
+            np.where(left[:, None], factors_x, factors_d),
+            np.where(left[:, None], factors_c, factors_x),
+        )
+
+    # Keep whichever of the grid point and the two interior points fits best
+    for candidate, f, cand_factors in ((c, fc, factors_c), (d, fd, factors_d)):
+        better = f < best_sse
+        best_sse = np.where(better, f, best_sse)
+        best_log = np.where(better, candidate, best_log)
+        best_factors = np.where(better[:, None], cand_factors, best_factors)
+    return best_factors, np.exp(best_log), best_sse
+
+
+def fit_afns_panel(maturities, yields, lambda_bounds=(0.01, 10.0), grid_size=60, xtol=1e-5, chunk_size=4096,
+                   factor_bounds=(-10, 10)):
+    """
+    Fits the AFNS model to every curve of a (dates x maturities) yield panel.
+
+    Each curve's level, slope and curvature are profiled out by least squares, as
+    in fit_afns_profile. All curves are first evaluated on a shared log-spaced
+    lambda grid, whose pseudo-inverses are computed once for the whole panel;
+    each curve's bracket around its best grid point is then narrowed by a
+    golden-section search run on all curves at once.
+
+    Parameters:
+    maturities (array-like): Maturities in years.
+    yields (array-like): (dates x maturities) yields. Rows with missing values are left as NaN.
+    lambda_bounds (tuple): (lower, upper) bounds for lambda.
+    grid_size (int): Number of points of the shared lambda grid.
+    xtol (float): Width of the final brackets, in log(lambda).
+    chunk_size (int): Curves fitted together, bounding memory to about
+        grid_size * chunk_size * maturities floats.
+    factor_bounds (tuple): (lower, upper) bounds for level, slope and curvature, as in fit_afns_profile.
+
+    Returns:
+    dict: "level", "slope", "curvature", "lambda" and "sse" arrays (dates,) and
+    "fitted_yields" (dates x maturities).
+    """
+    maturities = np.asarray(maturities, dtype=float)
+    yields = np.atleast_2d(np.asarray(yields, dtype=float))
+    n_curves = len(yields)
+
+    log_grid = np.linspace(np.log(lambda_bounds[0]), np.log(lambda_bounds[1]), grid_size)
+    designs = afns_design(maturities, np.exp(log_grid))
+
+    factors = np.full((n_curves, 3), np.nan)
+    lambdas = np.full(n_curves, np.nan)
+    sse = np.full(n_curves, np.nan)
+    complete = np.flatnonzero(np.isfinite(yields).all(axis=1))
+    for start in range(0, len(complete), chunk_size):
+        rows = complete[start:start + chunk_size]
+        factors[rows], lambdas[rows], sse[rows] = _fit_chunk(
+            maturities, yields[rows], log_grid, designs, xtol, factor_bounds
+        )
+
+    fitted = np.full(yields.shape, np.nan)
+    if len(complete):
+        fitted[complete] = np.einsum(
+            "tnk,tk->tn", afns_design(maturities, lambdas[complete]), factors[complete]
+        )
+    return {
+        "level": factors[:, 0],
+        "slope": factors[:, 1],
+        "curvature": factors[:, 2],
+        "lambda": lambdas,
+        "sse": sse,
+        "fitted_yields": fitted,
+    }
+
+
+def synthetic_panel(n_curves, maturities, seed=0):
+    """
+    Returns a random (curves x maturities) panel of plausible AFNS-shaped yield curves.
+    """
+    rng = np.random.default_rng(seed)
+    maturities = np.asarray(maturities, dtype=float)
+    level = 3 + rng.normal(size=n_curves)
+    slope = rng.normal(size=n_curves) * 1.5
+    curvature = rng.normal(size=n_curves)
+    lambdas = np.exp(rng.uniform(np.log(0.1), np.log(2), n_curves))
+    curves = np.einsum("tnk,tk->tn", afns_design(maturities, lambdas), np.column_stack([level, slope, curvature]))
+    return curves + rng.normal(size=curves.shape) * 0.02
+
+
+def benchmark(sizes=(100, 1000, 10000, 50000), maturities=(2, 3, 5, 7, 10, 20), loop_sample=200):
+    """
+    Times the panel fitter against looping fit_afns and fit_afns_profile.
+
+    Looping 10k+ curves through fit_afns takes minutes, so the loops are timed on
+    loop_sample curves and scaled to each panel size.
+
+    Returns:
+    list: One dict per size with the seconds of each approach and the largest
+    SSE excess of the panel fit over fit_afns on the sampled curves.
+    """
+    from utils.model_explanation import fit_afns, fit_afns_profile
+
+    sample = synthetic_panel(loop_sample, maturities, seed=1)
+    start = time.perf_counter()
+    loop_fits = [fit_afns(maturities, curve) for curve in sample]
+    fit_afns_seconds = (time.perf_counter() - start) / loop_sample
+    start = time.perf_counter()
+    for curve in sample:
+        fit_afns_profile(maturities, curve)
+    profile_seconds = (time.perf_counter() - start) / loop_sample
+
+    panel = fit_afns_panel(maturities, sample)
+    loop_sse = np.array([np.sum((fit["fitted_yields"] - curve) ** 2) for fit, curve in zip(loop_fits, sample)])
+    sse_excess = float(np.max(panel["sse"] - loop_sse))
+
+    reports = []
+    for size in sizes:
+        yields = synthetic_panel(size, maturities)
+        start = time.perf_counter()
+        fit_afns_panel(maturities, yields)
+        reports.append({
+            "curves": size,
+            "panel_seconds": time.perf_counter() - start,
+            "fit_afns_seconds": fit_afns_seconds * size,
+            "profile_loop_seconds": profile_seconds * size,
+            "sse_excess": sse_excess,
+        })
+    return reports
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.afns_panel [n_curves ...]
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000, 50000]
+    for report in benchmark(sizes):
+        print(
+            f"{report['curves']:>6} curves: panel {report['panel_seconds']:.3f} s, "
+            f"fit_afns loop ~{report['fit_afns_seconds']:.1f} s "
+            f"({report['fit_afns_seconds'] / report['panel_seconds']:.0f}x), "
+            f"fit_afns_profile loop ~{report['profile_loop_seconds']:.1f} s; "
+            f"max SSE excess over fit_afns {report['sse_excess']:.1e}"
+        )
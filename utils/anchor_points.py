@@ -0,0 +1,258 @@
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Name of the date column of the anchor editor
+DATE_COLUMN = "Date"
+
+# How one anchored variable becomes a model column: the column written, "linear"
+# or "previous" filling between anchors (after the last anchor the last level is
+# held), the level used before the first anchor (None leaves NaN) and whether the
+# day-over-day difference of the filled levels is stored instead of the levels
+AnchorPolicy = namedtuple("AnchorPolicy", ["column", "interpolate", "leading", "difference"])
+
+ANCHOR_POLICIES = {
+    "cum_CSD": AnchorPolicy("diff_CSD", "linear", 0.0, True),
+    "VIX_close": AnchorPolicy("VIX_close", "linear", 0.0, False),
+    "FFR": AnchorPolicy("diff_FFR", "linear", 0.0, True),
+    "CPI": AnchorPolicy("diff_CPI", "linear", 0.0, True),
+    "M1": AnchorPolicy("diff_M1_supply", "linear", 0.0, True),
+}
+
+
+def anchor_table(anchors, variables, labels):
+    """
+    Builds the editor table of the anchor points entered so far.
+
+    Parameters:
+    anchors (dict): Variable -> {date: level}, as kept by SessionData.anchors.
+    variables (list): Variables edited in the table, e.g. ["FFR", "CPI"].
+    labels (list): Column label of each variable in the table.
+
+    Returns:
+    pd.DataFrame: One row per anchored date, with a Date column and one column
+    per variable (empty where that variable has no anchor on the date).
+    """
+    days = sorted({day for variable in variables for day in anchors.get(variable, {})})
+    table = pd.DataFrame({DATE_COLUMN: pd.Series([day.date() for day in days], dtype=object)})
+    for variable, label in zip(variables, labels):
+        points = anchors.get(variable, {})
+        table[label] = pd.Series([points.get(day, np.nan) for day in days], dtype=np.float64)
+    return table
+
+
+def read_anchor_table(table, days, variables, labels):
+    """
+    Reads the anchor points out of an edited table.
+
+    Dates falling on weekends or holidays move to the next business day; dates
+    outside the editable days and rows without a date are dropped. Empty cells
+    are not anchors. If several rows land on the same day, the last one wins.
+
+    Parameters:
+    table (pd.DataFrame): Table returned by the editor.
+    days (array-like): Editable business days (sorted).
+    variables (list): Variables edited in the table.
+    labels (list): Column label of each variable in the table.
+
+    Returns:
+    tuple: Variable -> {pd.Timestamp: level} anchors, and the list of dropped dates.
+    """
+    days = np.asarray(days, dtype="datetime64[D]")
+    dates = pd.to_datetime(table[DATE_COLUMN], errors="coerce") if len(table) else pd.Series([], dtype="datetime64[ns]")
+    valid = dates.notna().to_numpy()
+    positions = np.searchsorted(days, dates[valid].to_numpy().astype("datetime64[D]"), "left")
+    inside = positions < len(days)
+    if len(days):
+        inside &= dates[valid].to_numpy().astype("datetime64[D]") >= days[0]
+    dropped = [day.date() for day in dates[valid][~inside]]
+
+    rows = np.flatnonzero(valid)[inside]
+    snapped = pd.to_datetime(days[positions[inside]])
+    anchors = {}
+    for variable, label in zip(variables, labels):
+        levels = pd.to_numeric(table[label], errors="coerce").to_numpy(dtype=np.float64)[rows]
+        entered = ~np.isnan(levels)
+        anchors[variable] = dict(zip(snapped[entered], levels[entered].tolist()))
+    return anchors, dropped
+
+
+def anchor_matrix(anchors, days, variables):
+    """
+    Stacks the anchors of several variables into one (days x variables) array.
+
+    Parameters:
+    anchors (dict): Variable -> {date: level}.
+    days (array-like): Sorted business days the array covers.
+    variables (list): Variables, one column each.
+
+    Returns:
+    np.ndarray: Anchor levels, NaN where a variable has no anchor. Anchors on
+    dates that are not in days are ignored.
+    """
+    days = np.asarray(days, dtype="datetime64[D]")
+    levels = np.full((len(days), len(variables)), np.nan)
+    for j, variable in enumerate(variables):
+        points = anchors.get(variable, {})
+        if not points or not len(days):
+            continue
+        dates = pd.DatetimeIndex(list(points)).values.astype("datetime64[D]")
+        positions = np.minimum(np.searchsorted(days, dates), len(days) - 1)
+        found = days[positions] == dates
+        levels[positions[found], j] = np.fromiter(points.values(), dtype=np.float64, count=len(points))[found]
+    return levels
+
+
+def resolve_anchors(levels, policies):
+    """
+    Turns sparse anchor levels into model values for every variable in one pass.
+
+    Each column is filled between its anchors (linearly by position or by
+    holding the previous level), held at its last level after the last anchor,
+    set to its leading level before the first one and, if its policy says so,
+    differenced day over day (the first day keeps its level, as
+    Series.diff().fillna(level) does).
+
+    Parameters:
+    levels (np.ndarray): (days x variables) anchor levels, NaN where not anchored.
+    policies (list): AnchorPolicy of each column.
+
+    Returns:
+    np.ndarray: (days x variables) values to write to the policies' columns.
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    n_days, n_vars = levels.shape
+    if n_days == 0:
+        return levels.copy()
+    anchored = ~np.isnan(levels)
+    rows = np.arange(n_days)[:, None]
+    columns = np.arange(n_vars)
+
+    # Position of the nearest anchor at or before / at or after each day
+    previous = np.maximum.accumulate(np.where(anchored, rows, -1), axis=0)
+    following = np.minimum.accumulate(np.where(anchored, rows, n_days)[::-1], axis=0)[::-1]
+    has_previous = previous >= 0
+    has_following = following < n_days
+    previous_level = levels[np.maximum(previous, 0), columns]
+    following_level = levels[np.minimum(following, n_days - 1), columns]
+
+    weight = (rows - previous) / np.maximum(following - previous, 1)
+    linear = np.array([policy.interpolate == "linear" for policy in policies])
+    filled = np.where(
+        linear & has_previous & has_following,
+        previous_level + (following_level - previous_level) * weight,
+        previous_level,
+    )
+    leading = np.array([np.nan if policy.leading is None else policy.leading for policy in policies], dtype=np.float64)
+    filled = np.where(has_previous, filled, leading)
+
+    differences = np.empty_like(filled)
+    differences[0] = filled[0]
+    differences[1:] = filled[1:] - filled[:-1]
+    differences = np.where(np.isnan(differences), filled, differences)
+    difference = np.array([policy.difference for policy in policies])
+    return np.where(difference, differences, filled)
+
+
+def save_anchors(session_data, anchors, days, policies=ANCHOR_POLICIES):
+    """
+    Resolves a page's anchors and writes the results to the session by position.
+
+    Parameters:
+    session_data (SessionData): The session to write to.
+    anchors (dict): Variable -> {date: level}, e.g. from read_anchor_table.
+    days (array-like): Editable business days, the tail of the session's selection.
+    policies (dict): AnchorPolicy of each variable.
+
+    Returns:
+    dict: Column -> values written.
+    """
+    variables = list(anchors)
+    values = resolve_anchors(anchor_matrix(anchors, days, variables), [policies[v] for v in variables])
+    start = days[0] if len(days) else None
+    written = {}
+    for j, variable in enumerate(variables):
+        session_data.set_anchors(variable, anchors[variable])
+        if start is not None:
+            session_data.set_values(policies[variable].column, values[:, j], start=start)
+        written[policies[variable].column] = values[:, j]
+    return written
+
+
+def _resolve_with_pandas(anchors, days, variables, policies):
+    """
+    The per-series pandas version of resolve_anchors the pages used, kept for the benchmark.
+    """
+    index = pd.DatetimeIndex(np.asarray(days, dtype="datetime64[D]").astype("datetime64[ns]"))
+    results = []
+    for variable in variables:
+        policy = policies[variable]
+        series = pd.Series(anchors[variable], dtype=np.float64).reindex(index)
+        if policy.interpolate == "linear":
+            series = series.interpolate(method="linear", limit_direction="forward")
+        else:
+            series = series.ffill()
+        if policy.leading is not None:
+            series = series.fillna(policy.leading)
+        if policy.difference:
+            series = series.diff().fillna(series)
+        results.append(series.to_numpy())
+    return np.column_stack(results)
+
+
+def benchmark(years=(2, 10, 30), anchors_per_year=12, repeats=5, seed=0):
+    """
+    Times resolve_anchors against per-series pandas on daily horizons with every anchored variable.
+
+    Returns:
+    list: One dict per horizon with the mean seconds of each approach and the largest difference.
+    """
+    rng = np.random.default_rng(seed)
+    variables = list(ANCHOR_POLICIES)
+    policies = [ANCHOR_POLICIES[v] for v in variables]
+    reports = []
+    for n_years in years:
+        days = pd.bdate_range("2025-03-21", periods=int(n_years * 261)).values.astype("datetime64[D]")
+        anchors = {}
+        for variable in variables:
+            picks = np.sort(rng.choice(len(days), size=max(1, int(n_years * anchors_per_year)), replace=False))
+            anchors[variable] = dict(zip(pd.to_datetime(days[picks]), rng.normal(size=len(picks)).tolist()))
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            expected = _resolve_with_pandas(anchors, days, variables, ANCHOR_POLICIES)
+        pandas_seconds = (time.perf_counter() - start) / repeats
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            matrix = anchor_matrix(anchors, days, variables)
+        matrix_seconds = (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            resolved = resolve_anchors(matrix, policies)
+        resolve_seconds = (time.perf_counter() - start) / repeats
+
+        reports.append({
+            "years": n_years,
+            "days": len(days),
+            "pandas_seconds": pandas_seconds,
+            "matrix_seconds": matrix_seconds,
+            "resolve_seconds": resolve_seconds,
+            "max_difference": float(np.nanmax(np.abs(resolved - expected))),
+        })
+    return reports
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.anchor_points [years ...]
+    lengths = [float(arg) for arg in sys.argv[1:]] or [2, 10, 30]
+    for report in benchmark(lengths):
+        print(
+            f"{report['years']:>4g} years ({report['days']} days x {len(ANCHOR_POLICIES)} variables): "
+            f"pandas per series {report['pandas_seconds'] * 1e3:.2f} ms, "
+            f"engine {report['resolve_seconds'] * 1e3:.3f} ms (+ {report['matrix_seconds'] * 1e3:.2f} ms to stack anchors); "
+            f"max difference {report['max_difference']:.1e}"
+        )
@@ -0,0 +1,216 @@
+import sys
+import time
+from statistics import NormalDist
+
+import numpy as np
+
+from utils.model_artifact import CompactARIMAXResults, extract_state_space
+
+
+def state_space_arrays(model):
+    """
+    Returns the forecasting arrays of a compact model or a fitted SARIMAX results object.
+    """
+    if isinstance(model, CompactARIMAXResults):
+        return model.arrays
+    return extract_state_space(model)[1]
+
+
+def model_exog_names(model):
+    """
+    Returns the exog column names, in order, of a compact model or a fitted SARIMAX results object.
+    """
+    if isinstance(model, CompactARIMAXResults):
+        return list(model.exog_names)
+    return list(model.model.exog_names or [])
+
+
+class BatchedStateSpace:
+    def __init__(self, models, labels=None):
+        """
+        Stacks the state-space systems of several univariate ARIMAX models so
+        their forecasts can be run together.
+
+        Models with fewer states are zero-padded to the largest state dimension;
+        the padded states have no transition, noise or loading, so they do not
+        change any forecast.
+
+        Parameters:
+        models (list): Compact models (utils.model_artifact) or SARIMAX results, all
+            using the same exogenous columns, e.g. the six maturities of one model type.
+        labels (list): Optional label per model (e.g. maturities), kept for reporting.
+
+        Raises:
+        ValueError: If the models' exog column names or their order differ.
+        """
+        models = list(models)
+        n = len(models)
+        self.labels = list(labels) if labels is not None else list(range(n))
+        self.exog_names = model_exog_names(models[0])
+        for label, model in zip(self.labels[1:], models[1:]):
+            exog_names = model_exog_names(model)
+            if exog_names != self.exog_names:
+                raise ValueError(
+                    f"Model {label!r} does not use the same exog columns, in the same order, as model "
+                    f"{self.labels[0]!r} ({exog_names} vs {self.exog_names})."
+                )
+
+        arrays = [state_space_arrays(model) for model in models]
+        k = max(len(a["state"]) for a in arrays)
+        self.k_exog = len(self.exog_names)
+
+        self.design = np.zeros((n, k))
+        self.transition = np.zeros((n, k, k))
+        self.state_intercept = np.zeros((n, k))
+        self.state_noise = np.zeros((n, k, k))
+        self.state = np.zeros((n, k))
+        self.state_cov = np.zeros((n, k, k))
+        self.obs_intercept = np.zeros(n)
+        self.obs_var = np.zeros(n)
+        self.exog_coef = np.zeros((n, self.k_exog))
+
+        for i, a in enumerate(arrays):
+            m = len(a["state"])
+            selection = a["selection"]
+            self.design[i, :m] = a["design"][0]
+            self.transition[i, :m, :m] = a["transition"]
+            self.state_intercept[i, :m] = a["state_intercept"]
+            self.state_noise[i, :m, :m] = selection @ a["state_cov"] @ selection.T
+            self.state[i, :m] = a["state"]
+            self.state_cov[i, :m, :m] = a["state_cov_final"]
+            self.obs_intercept[i] = a["obs_intercept"][0]
+            self.obs_var[i] = a["obs_cov"][0, 0]
+            self.exog_coef[i] = a["exog_coef"]
+
+    def state_moments(self, steps, state=None, state_cov=None):
+        """
+        Runs the exog-free part of the forecast recursion for all models at once.
+
+        Exogenous regressors only shift the observation intercept, so the state
+        path and forecast variances do not depend on the exog values.
+
+        Parameters:
+        steps (int): Forecast horizon.
+        state (np.ndarray): Starting states (models x states). Defaults to the end of the sample.
+        state_cov (np.ndarray): Starting state covariances. Defaults to the end of the sample.
+
+        Returns:
+        tuple: (means without exog, variances), each shaped (models x steps).
+        """
+        state = self.state if state is None else state
+        state_cov = self.state_cov if state_cov is None else state_cov
+        n = len(self.labels)
+        means = np.empty((n, steps))
+        variances = np.empty((n, steps))
+        transition_t = self.transition.transpose(0, 2, 1)
+        for t in range(steps):
+            means[:, t] = self.obs_intercept + np.einsum("nk,nk->n", self.design, state)
+            variances[:, t] = np.einsum("nk,nkj,nj->n", self.design, state_cov, self.design) + self.obs_var
+            state = self.state_intercept + np.einsum("nkj,nj->nk", self.transition, state)
+            state_cov = self.transition @ state_cov @ transition_t + self.state_noise
+        return means, variances
+
+    def exog_effect(self, exog):
+        """
+        Returns the regression contribution exog @ beta for every model.
+
+        Parameters:
+        exog (array-like): (steps x k_exog) shared by all models, or (models x steps x k_exog).
+
+        Returns:
+        np.ndarray: (models x steps) contributions.
+        """
+        exog = np.asarray(exog, dtype=float)
+        if exog.shape[-1] != self.k_exog:
+            raise ValueError(f"Expected {self.k_exog} exog columns, got {exog.shape[-1]}.")
+        if exog.ndim == 2:
+            return self.exog_coef @ exog.T
+        return np.einsum("nsk,nk->ns", exog, self.exog_coef)
+
+    def forecast(self, steps, exog=None, alpha=0.2):
+        """
+        Forecasts every stacked model over the same horizon.
+
+        Parameters:
+        steps (int): Forecast horizon.
+        exog (array-like): Exogenous values, (steps x k_exog) or (models x steps x k_exog).
+        alpha (float): Significance level of the prediction interval.
+
+        Returns:
+        dict: "mean", "lower", "upper" and "variance" arrays shaped (models x steps).
+        """
+        means, variances = self.state_moments(steps)
+        if self.k_exog:
+            if exog is None:
+                raise ValueError("Out-of-sample forecasting requires exog values.")
+            means = means + self.exog_effect(exog)
+        half_width = NormalDist().inv_cdf(1 - alpha / 2) * np.sqrt(variances)
+        return {
+            "mean": means,
+            "lower": means - half_width,
+            "upper": means + half_width,
+            "variance": variances,
+        }
+
+
+def benchmark(model_paths, steps=24, repeat=20):
+    """
+    Times the batched engine against one statsmodels get_forecast call per model.
+
+    Parameters:
+    model_paths (list): Pickled SARIMAX results sharing one exog layout (one model type).
+    steps (int): Forecast horizon.
+    repeat (int): Timed repetitions of each approach.
+
+    Returns:
+    dict: Seconds per run for both approaches and the largest absolute differences.
+    """
+    import pickle
+
+    results = []
+    for path in model_paths:
+        with open(path, 'rb') as f:
+            results.append(pickle.load(f))
+    k_exog = len(model_exog_names(results[0]))
+    exog = np.random.default_rng(0).normal(size=(steps, k_exog)) if k_exog else None
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        loop = [res.get_forecast(steps=steps, exog=exog) for res in results]
+    loop_seconds = (time.perf_counter() - start) / repeat
+
+    engine = BatchedStateSpace(results)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        batched = engine.forecast(steps, exog)
+    batched_seconds = (time.perf_counter() - start) / repeat
+
+    expected_mean = np.array([f.predicted_mean.values for f in loop])
+    expected_ci = np.array([f.conf_int(alpha=0.2).values for f in loop])
+    return {
+        "loop_seconds": loop_seconds,
+        "batched_seconds": batched_seconds,
+        "mean_diff": float(np.max(np.abs(expected_mean - batched["mean"]))),
+        "lower_diff": float(np.max(np.abs(expected_ci[:, :, 0] - batched["lower"]))),
+        "upper_diff": float(np.max(np.abs(expected_ci[:, :, 1] - batched["upper"]))),
+    }
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.batched_forecast [models_dir] [model_type]
+    import os
+
+    from utils.all_maturities import all_maturities
+
+    models_dir = sys.argv[1] if len(sys.argv) > 1 else "models"
+    model_type = sys.argv[2] if len(sys.argv) > 2 else "tariff"
+    paths = [os.path.join(models_dir, f"arima_model_{m}-year_monthly_{model_type}.pkl") for m in all_maturities]
+    paths = [path for path in paths if os.path.exists(path)]
+    for steps in (12, 24, 60):
+        report = benchmark(paths, steps=steps)
+        print(
+            f"{len(paths)} models, {steps} steps: statsmodels loop {report['loop_seconds'] * 1000:.2f} ms, "
+            f"batched {report['batched_seconds'] * 1000:.3f} ms "
+            f"({report['loop_seconds'] / report['batched_seconds']:.0f}x); "
+            f"max diff mean {report['mean_diff']:.1e}, lower {report['lower_diff']:.1e}, upper {report['upper_diff']:.1e}"
+        )
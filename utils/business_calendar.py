@@ -0,0 +1,228 @@
+import sys
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.historical_store import widen
+
+# Fixed start of the forecast window and its length, as used by the Dashboard
+DEFAULT_START = "2025-03-21"
+DEFAULT_DAYS = 730
+
+
+def _to_day(value):
+    return np.datetime64(pd.Timestamp(value), "D")
+
+
+class BusinessCalendar:
+    def __init__(self, start=DEFAULT_START, end=None):
+        """
+        US business days (weekdays that are not federal holidays) of a fixed window.
+
+        The days are computed once and held as a sorted, read-only datetime64[D]
+        array, so selecting a range is two binary searches and joining it with
+        the historical store reuses one precomputed row mapping.
+
+        Parameters:
+        start: First day of the window (anything pd.Timestamp accepts).
+        end: Last day of the window; defaults to DEFAULT_DAYS after start.
+        """
+        from pandas.tseries.holiday import USFederalHolidayCalendar
+        from pandas.tseries.offsets import CustomBusinessDay
+
+        self.start = pd.Timestamp(start).normalize()
+        self.end = pd.Timestamp(end).normalize() if end is not None else self.start + pd.Timedelta(days=DEFAULT_DAYS)
+        us_bd = CustomBusinessDay(calendar=USFederalHolidayCalendar())
+        self.days = pd.date_range(start=self.start, end=self.end, freq=us_bd).values.astype("datetime64[D]")
+        self.days.flags.writeable = False
+        self._rows = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.days)
+
+    def bounds(self, start=None, end=None):
+        """
+        Returns the [lo, hi) positions of the business days between start and end, both inclusive.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.days, _to_day(start), "left"))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, _to_day(end), "right"))
+        return lo, max(lo, hi)
+
+    def slice(self, start=None, end=None):
+        """
+        Returns the business days between start and end as a read-only datetime64[D] view.
+        """
+        lo, hi = self.bounds(start, end)
+        return self.days[lo:hi]
+
+    def index(self, start=None, end=None):
+        """
+        Returns the business days between start and end as a DatetimeIndex.
+        """
+        return pd.DatetimeIndex(self.slice(start, end).astype("datetime64[ns]"))
+
+    def store_rows(self, store):
+        """
+        Returns the row of the historical store holding each business day, or -1 if it has none.
+
+        The mapping is computed once per store version (the store's cache path
+        changes whenever its CSV does).
+        """
+        with self._lock:
+            rows = self._rows.get(store.path)
+            if rows is None:
+                dates = np.asarray(store.dates)
+                rows = np.searchsorted(dates, self.days)
+                found = rows < len(dates)
+                found[found] = dates[rows[found]] == self.days[found]
+                rows = np.where(found, rows, -1)
+                rows.flags.writeable = False
+                self._rows = {store.path: rows}
+            return rows
+
+    def join_columns(self, store, start=None, end=None, columns=None):
+        """
+        Returns the store's columns on the business days between start and end,
+        in the cache's narrow types.
+
+        Rows are taken by position through store_rows. Days the store has no row
+        for get NaN; an integer column with such days becomes float32 (int8 flags
+        fit exactly).
+
+        Parameters:
+        store (HistoricalStore): The historical data.
+        start, end: Inclusive bounds of the selected days.
+        columns (list): Store columns to include; defaults to all.
+
+        Returns:
+        dict: Column name -> array with one value per selected day.
+        """
+        lo, hi = self.bounds(start, end)
+        rows = self.store_rows(store)[lo:hi]
+        found = rows >= 0
+        joined = {}
+        for column in store.columns if columns is None else columns:
+            source = store.column(column)
+            if found.all():
+                values = source[rows]
+            else:
+                values = np.full(len(rows), np.nan, dtype=np.result_type(source.dtype, np.float32))
+                values[found] = source[rows[found]]
+            joined[column] = values
+        return joined
+
+    def join(self, store, start=None, end=None, columns=None, date_column="Business Day"):
+        """
+        Left-joins the historical store onto the business days between start and end.
+
+        Equivalent to merging a frame of the days with the store's frame on the
+        date, but done by position (see join_columns). Columns come back as
+        float64 and int64, the types of the CSV rather than the cache's narrow
+        ones; days the store has no row for get NaN, and integer columns then
+        become float64, as in a merge.
+
+        Parameters:
+        store (HistoricalStore): The historical data.
+        start, end: Inclusive bounds of the selected days.
+        columns (list): Store columns to include; defaults to all.
+        date_column (str): Name of the date column.
+
+        Returns:
+        pd.DataFrame: One row per selected business day.
+        """
+        lo, hi = self.bounds(start, end)
+        data = {date_column: self.days[lo:hi].astype("datetime64[ns]")}
+        data.update((column, widen(values)) for column, values in self.join_columns(store, start, end, columns).items())
+        return pd.DataFrame(data)
+
+
+@lru_cache(maxsize=8)
+def _calendar(start, end):
+    return BusinessCalendar(start, end)
+
+
+def get_business_calendar(start=DEFAULT_START, end=None):
+    """
+    Returns the process-wide calendar for a window, building it on first use.
+
+    Parameters:
+    start: First day of the window.
+    end: Last day of the window; defaults to DEFAULT_DAYS after start.
+
+    Returns:
+    BusinessCalendar: The shared calendar.
+    """
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize() if end is not None else start + pd.Timedelta(days=DEFAULT_DAYS)
+    return _calendar(start, end)
+
+
+def benchmark(years=(2, 10, 30), selections=20, csv_path=None):
+    """
+    Times selecting an end date the way the Dashboard used to (rebuild the
+    calendar, mask it and merge the historical frame) against a cached slice
+    and positional join.
+
+    Parameters:
+    years (tuple): Window lengths to test.
+    selections (int): End dates picked per window.
+    csv_path (str): Historical CSV; defaults to the store's HISTORICAL_CSV.
+
+    Returns:
+    list: One dict per window with the mean seconds per selection of each path.
+    """
+    from pandas.tseries.holiday import USFederalHolidayCalendar
+    from pandas.tseries.offsets import CustomBusinessDay
+
+    from utils.historical_store import HISTORICAL_CSV, get_historical_store
+
+    store = get_historical_store(csv_path or HISTORICAL_CSV)
+    historical_df = store.frame(date_column="Business Day")
+    reports = []
+    for n_years in years:
+        start = pd.Timestamp(DEFAULT_START)
+        end = start + pd.Timedelta(days=int(n_years * 365.25))
+        picks = pd.to_datetime(np.linspace(start.value, end.value, selections)).normalize()
+
+        began = time.perf_counter()
+        for pick in picks:
+            us_bd = CustomBusinessDay(calendar=USFederalHolidayCalendar())
+            days = pd.DataFrame({"Business Day": pd.date_range(start=start, end=end, freq=us_bd)})
+            selected = days[(days["Business Day"] >= start) & (days["Business Day"] <= pick)]
+            merged = pd.merge(selected, historical_df, on="Business Day", how="left")
+        rebuild_seconds = (time.perf_counter() - began) / selections
+
+        began = time.perf_counter()
+        calendar = get_business_calendar(start, end)
+        build_seconds = time.perf_counter() - began
+        calendar.store_rows(store)
+        began = time.perf_counter()
+        for pick in picks:
+            joined = calendar.join(store, start, pick)
+        join_seconds = (time.perf_counter() - began) / selections
+
+        assert np.allclose(joined.iloc[:, 1:].to_numpy(dtype=float), merged.iloc[:, 1:].to_numpy(dtype=float), equal_nan=True)
+        reports.append({
+            "years": n_years,
+            "days": len(calendar),
+            "rebuild_seconds": rebuild_seconds,
+            "build_seconds": build_seconds,
+            "join_seconds": join_seconds,
+        })
+    return reports
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.business_calendar [years ...]
+    lengths = [float(arg) for arg in sys.argv[1:]] or [2, 10, 30]
+    for report in benchmark(lengths):
+        print(
+            f"{report['years']:>4g} years ({report['days']} business days): "
+            f"rebuild + mask + merge {report['rebuild_seconds'] * 1e3:.2f} ms per selection; "
+            f"cached slice + join {report['join_seconds'] * 1e3:.3f} ms "
+            f"(calendar built once in {report['build_seconds'] * 1e3:.1f} ms)"
+        )
@@ -0,0 +1,216 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Default memory budget for cached forecasts (64 MiB)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Default disk budget when the on-disk tier is enabled (512 MiB)
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+
+def exog_digest(exog):
+    """
+    Returns a content hash of a prepared exogenous frame.
+
+    The values, column names and index all take part, so two frames hash the
+    same only if they would produce identical forecasts.
+
+    Parameters:
+    exog (pd.DataFrame): Exogenous values as passed to the models.
+
+    Returns:
+    str: Hex digest.
+    """
+    values = np.ascontiguousarray(exog.to_numpy(dtype=np.float64))
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(values.shape).encode())
+    h.update("\x1f".join(map(str, exog.columns)).encode())
+    if isinstance(exog.index, pd.PeriodIndex):
+        h.update(exog.index.freqstr.encode())
+        h.update(np.ascontiguousarray(exog.index.asi8).tobytes())
+    else:
+        h.update("\x1f".join(map(str, exog.index)).encode())
+    h.update(values.tobytes())
+    return h.hexdigest()
+
+
+def _value_bytes(value):
+    """
+    Approximates the memory held by a cached (mean, lower, upper) tuple.
+    """
+    return sum(series.memory_usage(index=True, deep=False) for series in value)
+
+
+class ForecastCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        """
+        Two-tier cache of forecast results keyed by exog content, model identity,
+        horizon and alpha.
+
+        The in-memory tier is an LRU bounded by max_bytes. The optional on-disk
+        tier stores one pickle per entry in disk_dir and evicts the least recently
+        used files once max_disk_bytes is exceeded; it is shared by every process
+        pointed at the same directory.
+
+        Parameters:
+        max_bytes (int): Memory budget of the in-memory tier, in bytes.
+        disk_dir (str): Directory of the on-disk tier, or None to disable it.
+        max_disk_bytes (int): Size budget of the on-disk tier, in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.RLock()
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(digest, model_identity, steps, alpha):
+        """
+        Combines the parts of a forecast request into a cache key.
+
+        Parameters:
+        digest (str): exog_digest of the exogenous frame.
+        model_identity (tuple): Identity of the model file (see ModelRegistry.identity).
+        steps (int): Forecast horizon.
+        alpha (float): Significance level of the prediction interval.
+
+        Returns:
+        str: Hex key.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((digest, tuple(model_identity), int(steps), float(alpha))).encode())
+        return h.hexdigest()
+
+    def enable_disk(self, disk_dir, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        """
+        Turns on the on-disk tier.
+        """
+        os.makedirs(disk_dir, exist_ok=True)
+        with self._lock:
+            self.disk_dir = disk_dir
+            self.max_disk_bytes = max_disk_bytes
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """
+        Returns the cached (mean, lower, upper) forecast for key, or None.
+
+        Cached Series are shared between callers and must not be modified.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._entries[key][0]
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+                # Refresh the access time used for disk eviction
+                os.utime(path)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Stores a (mean, lower, upper) forecast in both tiers.
+        """
+        with self._lock:
+            self._store(key, value)
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self._shrink_disk()
+
+    def _store(self, key, value):
+        nbytes = _value_bytes(value)
+        if key in self._entries:
+            self._current_bytes -= self._entries.pop(key)[1]
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (value, nbytes)
+        self._current_bytes += nbytes
+        while self._current_bytes > self.max_bytes:
+            _, (_, dropped) = self._entries.popitem(last=False)
+            self._current_bytes -= dropped
+            self.evictions += 1
+
+    def _shrink_disk(self):
+        """
+        Deletes the least recently used files until the disk tier fits its budget.
+        """
+        entries = []
+        with os.scandir(self.disk_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".pkl"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Empties the in-memory tier and resets the counters. Disk files are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns hit, miss and eviction counters, the hit rate and memory usage.
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Shared by every Streamlit session served from this process
+forecast_cache = ForecastCache()
@@ -0,0 +1,183 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from utils.model_registry import model_registry
+from utils.forecast_cache import exog_digest, forecast_cache
+from utils.incremental_forecast import IncrementalForecaster
+
+# Result of forecasting one maturity; error is None on success
+MaturityForecast = namedtuple("MaturityForecast", ["maturity", "model_path", "mean", "lower", "upper", "error"])
+
+# Why a maturity could not be forecast, returned instead of raised
+ForecastError = namedtuple("ForecastError", ["maturity", "model_path", "error_type", "message"])
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def prepare_exog(future_data):
+    """
+    Returns the exogenous frame indexed by monthly periods, as the models expect.
+
+    Parameters:
+    future_data (pd.DataFrame): Future exogenous values indexed by date.
+
+    Returns:
+    pd.DataFrame: The exogenous columns (everything except "date") with a PeriodIndex.
+    """
+    exog = future_data[[col for col in future_data.columns if col != "date"]]
+    if not isinstance(exog.index, pd.PeriodIndex):
+        exog = exog.set_axis(pd.to_datetime(exog.index).to_period("M"))
+    return exog
+
+
+def forecast_model(model, exog, alpha=0.2):
+    """
+    Forecasts one model over the periods of exog.
+
+    Parameters:
+    model: Fitted SARIMAX results or a compact model from utils.model_artifact.
+    exog (pd.DataFrame): Exogenous values with a PeriodIndex, one row per step.
+    alpha (float): Significance level of the prediction interval.
+
+    Returns:
+    tuple: The forecasted mean, lower bound and upper bound as Series indexed like exog.
+    """
+    forecast = model.get_forecast(steps=len(exog), exog=exog)
+    forecast_ci = forecast.conf_int(alpha=alpha)
+
+    forecast_mean = pd.Series(forecast.predicted_mean.values, index=exog.index)
+    forecast_lower = pd.Series(forecast_ci.iloc[:, 0].values, index=exog.index)
+    forecast_upper = pd.Series(forecast_ci.iloc[:, 1].values, index=exog.index)
+    return forecast_mean, forecast_lower, forecast_upper
+
+
+def session_forecasters(session):
+    """
+    Returns the session's IncrementalForecaster store, a plain dict kept in the session.
+
+    Call this from the script thread: worker threads have no script context, and
+    a Streamlit session_state read there falls back to one store shared by every
+    user. The returned dict can then be handed to workers.
+    """
+    return session.setdefault("incremental_forecasters", {})
+
+
+def _incremental_forecast(model_path, identity, exog, alpha, forecasters):
+    """
+    Forecasts with the IncrementalForecaster for this model, creating it on first use.
+    """
+    forecaster = forecasters.get(identity)
+    if forecaster is None:
+        # setdefault keeps the first forecaster if two workers create one at once
+        forecaster = forecasters.setdefault(identity, IncrementalForecaster(model_registry.get(model_path)))
+    return forecaster.forecast(exog, alpha)
+
+
+def cached_forecast(model_path, exog, alpha=0.2, digest=None, forecasters=None):
+    """
+    Forecasts a model file, reusing an earlier result for identical inputs.
+
+    Parameters:
+    model_path (str): Path to the model file.
+    exog (pd.DataFrame): Exogenous values with a PeriodIndex, one row per step.
+    alpha (float): Significance level of the prediction interval.
+    digest (str): exog_digest(exog), if the caller already computed it.
+    forecasters (dict): One session's IncrementalForecaster store, from
+        session_forecasters. When given, a cache miss only recomputes the months
+        after the first exog change since this session's previous forecast with
+        the same model.
+
+    Returns:
+    tuple: The forecasted mean, lower bound and upper bound as Series indexed like exog.
+    """
+    if digest is None:
+        digest = exog_digest(exog)
+    identity = model_registry.identity(model_path)
+    key = forecast_cache.make_key(digest, identity, len(exog), alpha)
+    result = forecast_cache.get(key)
+    if result is None:
+        if forecasters is not None:
+            result = _incremental_forecast(model_path, identity, exog, alpha, forecasters)
+        else:
+            result = forecast_model(model_registry.get(model_path), exog, alpha)
+        forecast_cache.put(key, result)
+    return result
+
+
+def _forecast_maturity(maturity, model_path, exog, alpha, digest=None, forecasters=None):
+    """
+    Loads and forecasts a single maturity, capturing any failure as a ForecastError.
+    """
+    try:
+        mean, lower, upper = cached_forecast(model_path, exog, alpha, digest, forecasters)
+    except Exception as e:
+        error = ForecastError(maturity, model_path, type(e).__name__, str(e))
+        return MaturityForecast(maturity, model_path, None, None, None, error)
+    return MaturityForecast(maturity, model_path, mean, lower, upper, None)
+
+
+def _get_executor(kind, max_workers):
+    """
+    Returns a pool shared across calls, so reruns do not pay for pool start-up.
+    """
+    with _executors_lock:
+        executor = _executors.get((kind, max_workers))
+        if executor is None:
+            if kind == "thread":
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="forecast")
+            elif kind == "process":
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+            else:
+                raise ValueError(f"Unknown executor type: {kind}. Use 'thread', 'process' or None.")
+            _executors[(kind, max_workers)] = executor
+        return executor
+
+
+def forecast_maturities(jobs, future_data, executor="thread", max_workers=None, alpha=0.2, session=None):
+    """
+    Forecasts several maturities concurrently.
+
+    Parameters:
+    jobs (list): (maturity, model_path) pairs.
+    future_data (pd.DataFrame): Future exogenous values shared by all models.
+    executor (str): "thread", "process", or None to run sequentially.
+    max_workers (int): Pool size. Defaults to one worker per job, capped at the CPU count.
+    alpha (float): Significance level of the prediction intervals.
+    session (dict): Per-session store (e.g. st.session_state) enabling incremental
+        re-forecasting (see cached_forecast). Its forecaster dict is looked up
+        here, in the calling thread, and only that dict reaches the workers.
+        Ignored with a process pool, which cannot share it.
+
+    Returns:
+    list: One MaturityForecast per job, in the same order as jobs. Failed
+    maturities carry a ForecastError instead of forecasts.
+    """
+    exog = prepare_exog(future_data)
+    # Hash the shared exog once rather than once per maturity
+    digest = exog_digest(exog)
+    forecasters = None if session is None or executor == "process" else session_forecasters(session)
+    if executor is None or len(jobs) <= 1:
+        return [_forecast_maturity(maturity, path, exog, alpha, digest, forecasters) for maturity, path in jobs]
+
+    if max_workers is None:
+        max_workers = max(1, min(len(jobs), os.cpu_count() or 1))
+    pool = _get_executor(executor, max_workers)
+    futures = [
+        pool.submit(_forecast_maturity, maturity, path, exog, alpha, digest, forecasters)
+        for maturity, path in jobs
+    ]
+
+    results = []
+    for (maturity, path), future in zip(jobs, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            # The worker itself failed (e.g. a crashed process pool)
+            error = ForecastError(maturity, path, type(e).__name__, str(e))
+            results.append(MaturityForecast(maturity, path, None, None, None, error))
+    return results
@@ -0,0 +1,399 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.all_tariffs import all_tariffs
+
+HISTORICAL_CSV = os.path.join("mnt", "data", "filtered.csv")
+
+# Bump when the on-disk layout changes so older caches are rebuilt
+CACHE_VERSION = 1
+
+# Largest relative error accepted when storing a float column as float32; the
+# CSV is written with about 8 significant digits, which float32 still resolves
+FLOAT32_RTOL = 1e-6
+
+# Environment variable naming a writable directory for the caches, for deploys
+# where the data directory is read-only
+CACHE_DIR_ENV = "HISTORICAL_CACHE_DIR"
+
+_INT8_RANGE = (np.iinfo(np.int8).min, np.iinfo(np.int8).max)
+
+
+def cache_dir_for(csv_path):
+    """
+    Returns the directory holding the typed caches of a CSV, e.g. "mnt/data/filtered.cache".
+    """
+    return os.path.splitext(csv_path)[0] + ".cache"
+
+
+def cache_dirs_for(csv_path):
+    """
+    Returns the directories a CSV's cache may live in, in the order they are tried:
+    $HISTORICAL_CACHE_DIR, next to the CSV, then the system temp directory.
+    """
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    source = hashlib.sha1(os.path.abspath(csv_path).encode()).hexdigest()[:12]
+    dirs = []
+    if os.environ.get(CACHE_DIR_ENV):
+        dirs.append(os.path.join(os.environ[CACHE_DIR_ENV], f"{name}-{source}.cache"))
+    dirs.append(cache_dir_for(csv_path))
+    dirs.append(os.path.join(tempfile.gettempdir(), "historical-cache", f"{name}-{source}.cache"))
+    return dirs
+
+
+def _cache_target(csv_path, cache_dir):
+    mtime_ns, size = _source_signature(csv_path)
+    return os.path.join(cache_dir, f"v{CACHE_VERSION}-{mtime_ns}-{size}")
+
+
+def find_cache(csv_path, cache_dirs=None):
+    """
+    Returns the directory of a finished cache of the CSV's current version, or None.
+
+    Parameters:
+    csv_path (str): Path to the historical CSV.
+    cache_dirs (list): Directories to look in; defaults to cache_dirs_for(csv_path).
+    """
+    for cache_dir in cache_dirs or cache_dirs_for(csv_path):
+        target = _cache_target(csv_path, cache_dir)
+        if os.path.exists(os.path.join(target, "meta.json")):
+            return target
+    return None
+
+
+def ensure_cache(csv_path, cache_dir=None):
+    """
+    Returns a cache of the CSV's current version, building one if none exists.
+
+    An existing cache is only read, so a cache built ahead of time (python -m
+    utils.historical_store build) works on a read-only deploy. Otherwise the
+    cache is built in the first of cache_dirs_for(csv_path) that is writable.
+
+    Parameters:
+    csv_path (str): Path to the historical CSV.
+    cache_dir (str): Use only this directory instead of cache_dirs_for(csv_path).
+
+    Returns:
+    str: Directory of the cache.
+
+    Raises:
+    OSError: If no candidate directory is writable.
+    """
+    cache_dirs = [cache_dir] if cache_dir else cache_dirs_for(csv_path)
+    target = find_cache(csv_path, cache_dirs)
+    if target is not None:
+        return target
+    error = None
+    for candidate in cache_dirs:
+        try:
+            return build_cache(csv_path, candidate)
+        except OSError as e:
+            error = e
+    raise error
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _parse_dates(values):
+    """
+    Parses the CSV's M/D/YYYY dates, falling back to pandas' inference for other layouts.
+    """
+    try:
+        dates = pd.to_datetime(values, format="%m/%d/%Y")
+    except (ValueError, TypeError):
+        dates = pd.to_datetime(values)
+    return dates.values.astype("datetime64[D]")
+
+
+def _typed_column(values, flag=False):
+    """
+    Returns the narrowest safe storage for one numeric column.
+
+    Flag columns (the tariffs) become int8 when every value is a small integer.
+    Other columns become float32 when that keeps every value within FLOAT32_RTOL
+    and stay float64 otherwise; they are never narrowed to integers, since the
+    pages write fractional values into them.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    if flag and finite.all() and np.array_equal(values, np.round(values)):
+        if len(values) == 0 or (values.min() >= _INT8_RANGE[0] and values.max() <= _INT8_RANGE[1]):
+            return values.astype(np.int8)
+    narrowed = values.astype(np.float32)
+    error = np.abs(narrowed[finite].astype(np.float64) - values[finite])
+    if np.all(error <= FLOAT32_RTOL * np.maximum(np.abs(values[finite]), 1.0)):
+        return narrowed
+    return values
+
+
+def build_cache(csv_path, cache_dir=None, date_column="date"):
+    """
+    Converts the historical CSV into one .npy file per column.
+
+    The cache is written to a new directory named after the source's mtime and
+    size and then renamed into place, so readers never see a partial cache.
+    Caches of older versions of the source are removed.
+
+    Parameters:
+    csv_path (str): Path to the CSV, e.g. HISTORICAL_CSV.
+    cache_dir (str): Directory holding the caches; defaults to cache_dir_for(csv_path).
+    date_column (str): Name of the date column in the CSV.
+
+    Returns:
+    str: Directory of the new cache.
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    mtime_ns, size = _source_signature(csv_path)
+    target = _cache_target(csv_path, cache_dir)
+    if os.path.exists(os.path.join(target, "meta.json")):
+        return target
+
+    df = pd.read_csv(csv_path, dtype={date_column: str})
+    df = df.drop(columns=[col for col in df.columns if col.startswith("Unnamed:")])
+    dates = _parse_dates(df.pop(date_column))
+    order = np.argsort(dates, kind="stable")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(staging)
+    np.save(os.path.join(staging, "dates.npy"), dates[order])
+    dtypes = {}
+    for i, column in enumerate(df.columns):
+        values = _typed_column(df[column].to_numpy()[order], flag=column in all_tariffs)
+        np.save(os.path.join(staging, f"{i}.npy"), values)
+        dtypes[column] = values.dtype.str
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump({
+            "version": CACHE_VERSION,
+            "source": os.path.abspath(csv_path),
+            "mtime_ns": mtime_ns,
+            "size": size,
+            "rows": int(len(dates)),
+            "columns": list(df.columns),
+            "dtypes": dtypes,
+        }, f)
+    try:
+        os.rename(staging, target)
+    except OSError:
+        # Another process finished the same cache first
+        shutil.rmtree(staging, ignore_errors=True)
+
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if path != target and ".tmp-" not in name:
+            shutil.rmtree(path, ignore_errors=True)
+    return target
+
+
+def widen(values):
+    """
+    Returns a float64 (or, for integer columns, int64) copy of a cached column,
+    the type read_csv would give it.
+    """
+    return np.array(values, dtype=np.float64 if values.dtype.kind == "f" else np.int64)
+
+
+class HistoricalStore:
+    def __init__(self, csv_path=HISTORICAL_CSV, cache_dir=None):
+        """
+        Typed, memory-mapped view of the historical dataset.
+
+        The CSV is converted once (see ensure_cache) and every later load maps
+        the column files instead of parsing text. Dates are held as a sorted
+        datetime64[D] array, so a date range is two binary searches and the
+        columns are sliced without copying.
+
+        Parameters:
+        csv_path (str): Path to the historical CSV.
+        cache_dir (str): Directory holding the caches; defaults to the first
+            usable one of cache_dirs_for(csv_path).
+        """
+        self.csv_path = csv_path
+        self.path = ensure_cache(csv_path, cache_dir)
+        with open(os.path.join(self.path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.columns = list(self.meta["columns"])
+        self.dates = np.load(os.path.join(self.path, "dates.npy"), mmap_mode="r")
+        self._arrays = {
+            column: np.load(os.path.join(self.path, f"{i}.npy"), mmap_mode="r")
+            for i, column in enumerate(self.columns)
+        }
+
+    def __len__(self):
+        return len(self.dates)
+
+    def column(self, name):
+        """
+        Returns the full read-only column array.
+        """
+        return self._arrays[name]
+
+    def bounds(self, start=None, end=None):
+        """
+        Returns the [lo, hi) row positions of the dates between start and end, both inclusive.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start), "D"), "left"))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end), "D"), "right"))
+        return lo, max(lo, hi)
+
+    def slice(self, start=None, end=None, columns=None):
+        """
+        Returns the dates and read-only column views between start and end, without copying.
+
+        Returns:
+        tuple: dates (datetime64[D]) and a dict of column arrays.
+        """
+        lo, hi = self.bounds(start, end)
+        columns = self.columns if columns is None else columns
+        return self.dates[lo:hi], {column: self._arrays[column][lo:hi] for column in columns}
+
+    def frame(self, start=None, end=None, columns=None, date_column="date"):
+        """
+        Returns the rows between start and end as a DataFrame.
+
+        Columns come back as float64 and int64, as read_csv would give them, so
+        callers can write float64 values into them; the narrow types stay in
+        the cache.
+
+        Parameters:
+        start, end: Inclusive date bounds (anything pd.Timestamp accepts), or None for open.
+        columns (list): Columns to include; defaults to all.
+        date_column (str): Name given to the date column, e.g. "Business Day".
+
+        Returns:
+        pd.DataFrame: The selected rows, with its own copy of the data.
+        """
+        dates, values = self.slice(start, end, columns)
+        data = {date_column: dates.astype("datetime64[ns]")}
+        data.update((column, widen(array)) for column, array in values.items())
+        return pd.DataFrame(data)
+
+    def nbytes(self):
+        """
+        Returns the size of the mapped data in bytes.
+        """
+        return self.dates.nbytes + sum(array.nbytes for array in self._arrays.values())
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_historical_store(csv_path=HISTORICAL_CSV):
+    """
+    Returns the shared store for a CSV, rebuilding its cache only when the CSV's
+    mtime or size changes.
+
+    Parameters:
+    csv_path (str): Path to the historical CSV.
+
+    Returns:
+    HistoricalStore: The typed store.
+    """
+    key = os.path.abspath(csv_path)
+    signature = _source_signature(csv_path)
+    with _stores_lock:
+        cached = _stores.get(key)
+        if cached is None or cached[0] != signature:
+            cached = (signature, HistoricalStore(csv_path))
+            _stores[key] = cached
+        return cached[1]
+
+
+def synthetic_csv(path, years, seed=0):
+    """
+    Writes a daily dataset shaped like filtered.csv covering a number of years.
+    """
+    from utils.non_tariff_columns import non_tariff_columns
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1990-01-01", periods=int(years * 365.25), freq="D")
+    # Same unpadded M/D/YYYY layout as the real file
+    df = pd.DataFrame({"date": dates.month.astype(str) + "/" + dates.day.astype(str) + "/" + dates.year.astype(str)})
+    for tariff in all_tariffs:
+        df[tariff] = (rng.random(len(dates)) < 0.01).astype(int)
+    for column in non_tariff_columns:
+        df[column] = rng.normal(size=len(dates)).astype(np.float32)
+    df.to_csv(path)
+
+
+def benchmark(years=(2, 10, 30, 60), work_dir=None, window_days=730):
+    """
+    Compares the CSV path with the typed store on synthetic daily data.
+
+    Parameters:
+    years (tuple): Lengths of history to generate.
+    work_dir (str): Scratch directory; a temporary one by default.
+    window_days (int): Length of the date range sliced from the end of the data.
+
+    Returns:
+    list: One dict per length with seconds and bytes for each path.
+    """
+    import tempfile
+
+    reports = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        for n_years in years:
+            csv_path = os.path.join(tmp, f"history_{n_years}y.csv")
+            synthetic_csv(csv_path, n_years)
+
+            start = time.perf_counter()
+            df = pd.read_csv(csv_path, parse_dates=["date"])
+            end = df["date"].max()
+            window = df[(df["date"] > end - pd.Timedelta(days=window_days)) & (df["date"] <= end)]
+            csv_seconds = time.perf_counter() - start
+            csv_bytes = int(df.memory_usage(index=True, deep=True).sum())
+
+            start = time.perf_counter()
+            build_cache(csv_path)
+            build_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store = HistoricalStore(csv_path)
+            load_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            sliced = store.frame(end - pd.Timedelta(days=window_days - 1), end)
+            slice_seconds = time.perf_counter() - start
+            assert len(sliced) == len(window)
+
+            reports.append({
+                "years": n_years,
+                "rows": len(store),
+                "csv_seconds": csv_seconds,
+                "csv_bytes": csv_bytes,
+                "build_seconds": build_seconds,
+                "load_seconds": load_seconds,
+                "slice_seconds": slice_seconds,
+                "store_bytes": store.nbytes(),
+            })
+    return reports
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.historical_store build [csv] [cache_dir]  (ahead of a read-only deploy)
+    #        python -m utils.historical_store [years ...]
+    if sys.argv[1:2] == ["build"]:
+        csv_path = sys.argv[2] if len(sys.argv) > 2 else HISTORICAL_CSV
+        print(ensure_cache(csv_path, sys.argv[3] if len(sys.argv) > 3 else None))
+        sys.exit(0)
+    lengths = [float(arg) for arg in sys.argv[1:]] or [2, 10, 30, 60]
+    for report in benchmark(lengths):
+        print(
+            f"{report['years']:>5g} years ({report['rows']} rows): "
+            f"read_csv + filter {report['csv_seconds'] * 1e3:.1f} ms, {report['csv_bytes'] / 2**20:.1f} MiB; "
+            f"store build {report['build_seconds'] * 1e3:.1f} ms (once), "
+            f"load {report['load_seconds'] * 1e3:.2f} ms + slice {report['slice_seconds'] * 1e3:.2f} ms, "
+            f"{report['store_bytes'] / 2**20:.1f} MiB mapped"
+        )
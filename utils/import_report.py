@@ -0,0 +1,181 @@
+import argparse
+import ast
+import glob
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold-start import budget of each page, in milliseconds
+DEFAULT_BUDGET_MS = 1200
+PAGE_BUDGETS_MS = {
+    # Imports matplotlib (without pyplot) to draw its chart on every run
+    "pages/newtester.py": 1600,
+}
+
+
+def page_imports(page_path):
+    """
+    Lists the modules a page imports when its script body runs.
+
+    Only module-level statements are considered (including those inside
+    top-level if/try blocks); imports inside functions run lazily and are skipped.
+
+    Parameters:
+    page_path (str): Path to a Streamlit page script.
+
+    Returns:
+    list: Module names in import order, without duplicates.
+    """
+    with open(page_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=page_path)
+
+    modules = []
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop(0)
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            names = []
+            if isinstance(node, (ast.If, ast.Try, ast.With)):
+                children = list(node.body) + list(getattr(node, "orelse", [])) + list(getattr(node, "finalbody", []))
+                for handler in getattr(node, "handlers", []):
+                    children.extend(handler.body)
+                pending[:0] = children
+        for name in names:
+            if name not in modules:
+                modules.append(name)
+    return modules
+
+
+def _parse_importtime(stderr):
+    """
+    Parses the output of python -X importtime.
+
+    Returns:
+    list: {"module", "self_ms", "cumulative_ms", "depth"} entries in completion order.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        entries.append({
+            "module": module,
+            "self_ms": int(fields[0]) / 1000,
+            "cumulative_ms": int(fields[1]) / 1000,
+            "depth": (len(name) - len(module) - 1) // 2,
+        })
+    return entries
+
+
+def measure_imports(modules, python=sys.executable, cwd=REPO_ROOT):
+    """
+    Imports modules in a fresh interpreter and times each one.
+
+    A module already pulled in by an earlier one in the list costs nothing,
+    just as it would when a page runs.
+
+    Parameters:
+    modules (list): Module names, imported in this order.
+    python (str): Interpreter to run.
+    cwd (str): Working directory, so the repo's own packages resolve.
+
+    Returns:
+    dict: "modules" as a list of (module, ms) pairs, "total_ms", "missing"
+    modules that could not be imported and the raw "entries" of every module loaded.
+    """
+    lines = ["missing = []"]
+    for module in modules:
+        lines += [
+            "try:",
+            f"    import {module}",
+            "except ImportError:",
+            f"    missing.append({module!r})",
+        ]
+    lines.append("print('\\n'.join(missing))")
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", "\n".join(lines)],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import timing failed: {proc.stderr.strip().splitlines()[-1]}")
+
+    entries = _parse_importtime(proc.stderr)
+    top_level = {}
+    for entry in entries:
+        if entry["depth"] == 0:
+            top_level[entry["module"]] = entry["cumulative_ms"]
+
+    timings = []
+    for module in modules:
+        # "import a.b" loads the parent packages first; charge them to the module
+        parts = module.split(".")
+        parents = [".".join(parts[:i]) for i in range(1, len(parts) + 1)]
+        timings.append((module, sum(top_level.pop(name, 0.0) for name in parents)))
+    missing = [name for name in proc.stdout.split() if name]
+    return {
+        "modules": [(module, ms) for module, ms in timings if module not in missing],
+        "total_ms": sum(entry["cumulative_ms"] for entry in entries if entry["depth"] == 0),
+        "missing": missing,
+        "entries": entries,
+    }
+
+
+def page_report(page_path, python=sys.executable):
+    """
+    Measures the cold-start import cost of one page against its budget.
+
+    Parameters:
+    page_path (str): Page path relative to the repo root, e.g. "pages/newtester.py".
+    python (str): Interpreter to run.
+
+    Returns:
+    dict: page, budget_ms, total_ms, over_budget, modules and missing.
+    """
+    report = measure_imports(page_imports(os.path.join(REPO_ROOT, page_path)), python=python)
+    budget = PAGE_BUDGETS_MS.get(page_path, DEFAULT_BUDGET_MS)
+    return {
+        "page": page_path,
+        "budget_ms": budget,
+        "total_ms": report["total_ms"],
+        "over_budget": report["total_ms"] > budget,
+        "modules": report["modules"],
+        "missing": report["missing"],
+    }
+
+
+def _default_pages():
+    pages = ["Home.py"] + sorted(glob.glob("pages/*.py", root_dir=REPO_ROOT))
+    return [page.replace(os.sep, "/") for page in pages]
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.import_report [--budget-ms MS] [page ...]
+    parser = argparse.ArgumentParser(description="Report the cold-start import time of each page.")
+    parser.add_argument("pages", nargs="*", help="Pages relative to the repo root (default: all).")
+    parser.add_argument("--budget-ms", type=float, help="Budget applied to every page instead of PAGE_BUDGETS_MS.")
+    args = parser.parse_args()
+
+    failed = False
+    for page in args.pages or _default_pages():
+        report = page_report(page)
+        if args.budget_ms is not None:
+            report["budget_ms"] = args.budget_ms
+            report["over_budget"] = report["total_ms"] > args.budget_ms
+        status = "OVER BUDGET" if report["over_budget"] else "ok"
+        print(f"{page}: {report['total_ms']:.1f} ms (budget {report['budget_ms']:.0f} ms) {status}")
+        for module, ms in sorted(report["modules"], key=lambda item: -item[1]):
+            print(f"    {module:<40} {ms:9.1f} ms")
+        for module in report["missing"]:
+            print(f"    {module:<40}   missing")
+        failed = failed or report["over_budget"]
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,94 @@
+import threading
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils.batched_forecast import BatchedStateSpace
+
+
+def first_changed_row(previous, current):
+    """
+    Returns the first row where two exog matrices differ.
+
+    Parameters:
+    previous (np.ndarray): Exog matrix of the last run, or None.
+    current (np.ndarray): Exog matrix of this run.
+
+    Returns:
+    int: Index of the first differing row; rows beyond the shorter matrix count
+    as changed, and len(current) means nothing changed.
+    """
+    if previous is None or previous.shape[1:] != current.shape[1:]:
+        return 0
+    common = min(len(previous), len(current))
+    changed = np.flatnonzero((previous[:common] != current[:common]).any(axis=1))
+    if len(changed):
+        return int(changed[0])
+    return common
+
+
+class IncrementalForecaster:
+    def __init__(self, model):
+        """
+        Forecasts one model repeatedly, recomputing only the exog effect of the
+        months whose exog values changed since the previous call.
+
+        Out of sample, exog only shifts the observation mean, so the exog-free
+        means and the variances depend on the horizon alone. They are computed
+        once for the longest horizon seen and sliced for shorter ones; each call
+        then redoes exog @ beta from the first changed row onwards.
+
+        Parameters:
+        model: Compact model (utils.model_artifact) or fitted SARIMAX results.
+        """
+        self.engine = BatchedStateSpace([model])
+        self.exog = None
+        self.base_means = None
+        self.variances = None
+        self.effect = None
+        # Row the last call recomputed the exog effect from (len(exog) when everything was reused)
+        self.recomputed_from = None
+        # Calls that overlap would interleave updates of the stored run
+        self._lock = threading.Lock()
+
+    def forecast(self, exog, alpha=0.2):
+        """
+        Forecasts the periods of exog.
+
+        Parameters:
+        exog (pd.DataFrame): Exogenous values with a PeriodIndex, one row per step.
+        alpha (float): Significance level of the prediction interval.
+
+        Returns:
+        tuple: The forecasted mean, lower bound and upper bound as Series indexed like exog.
+        """
+        with self._lock:
+            return self._forecast(exog, alpha)
+
+    def _forecast(self, exog, alpha):
+        values = np.asarray(exog, dtype=float).reshape(len(exog), -1)
+        steps = len(values)
+
+        if self.base_means is None or len(self.base_means) < steps:
+            base, variances = self.engine.state_moments(steps)
+            self.base_means, self.variances = base[0], variances[0]
+
+        start = 0 if self.effect is None else first_changed_row(self.exog, values)
+        effect = np.zeros(steps)
+        if start:
+            effect[:start] = self.effect[:start]
+        if self.engine.k_exog and start < steps:
+            effect[start:] = values[start:] @ self.engine.exog_coef[0]
+        self.effect = effect
+        self.exog = values.copy()
+        self.recomputed_from = start
+
+        means = self.base_means[:steps] + effect
+        half_width = NormalDist().inv_cdf(1 - alpha / 2) * np.sqrt(self.variances[:steps])
+        index = exog.index if isinstance(exog, (pd.DataFrame, pd.Series)) else pd.RangeIndex(steps)
+        return (
+            pd.Series(means, index=index),
+            pd.Series(means - half_width, index=index),
+            pd.Series(means + half_width, index=index),
+        )
@@ -0,0 +1,374 @@
+import json
+import os
+import pickle
+import sys
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+ARTIFACT_FORMAT = "matrix-arimax-v1"
+
+# State-space arrays kept in the artifact; everything else in the results
+# pickle (training data, fitted values, smoother output) is dropped.
+ARRAY_NAMES = [
+    "params",
+    "exog_coef",
+    "design",
+    "obs_intercept",
+    "obs_cov",
+    "transition",
+    "state_intercept",
+    "selection",
+    "state_cov",
+    "state",
+    "state_cov_final",
+]
+
+
+def artifact_paths(model_path):
+    """
+    Returns the (.npz, .json) artifact paths that belong to a model file.
+
+    Parameters:
+    model_path (str): Path to a model pickle, artifact .npz or artifact .json.
+
+    Returns:
+    tuple: The array file path and the header file path.
+    """
+    stem = os.path.splitext(model_path)[0]
+    return stem + ".npz", stem + ".json"
+
+
+def _time_invariant(matrix, name):
+    """
+    Returns the single time slice of a state-space matrix, rejecting time-varying ones.
+    """
+    if matrix.ndim == 3 or (matrix.ndim == 2 and name in ("obs_intercept", "state_intercept")):
+        first = matrix[..., :1]
+        if not np.allclose(matrix, first):
+            raise ValueError(f"Cannot export a model with a time-varying {name} matrix.")
+        return first[..., 0]
+    return matrix
+
+
+def extract_state_space(results):
+    """
+    Extracts what forecasting needs from a fitted statsmodels SARIMAX results object.
+
+    Parameters:
+    results: Fitted SARIMAX results (as stored in the models/*.pkl files).
+
+    Returns:
+    tuple: (header dict, dict of numpy arrays).
+    """
+    model = results.model
+    ssm = model.ssm
+    if ssm.k_endog != 1:
+        raise ValueError("Only univariate models can be exported.")
+    if getattr(model, "state_regression", False) or not getattr(model, "mle_regression", True):
+        raise ValueError("Only models with exogenous regression in the observation equation can be exported.")
+
+    exog_names = list(model.exog_names or [])
+    params = np.asarray(results.params, dtype=float)
+    param_names = list(model.param_names)
+    exog_coef = np.array([params[param_names.index(name)] for name in exog_names], dtype=float)
+
+    # The observation intercept holds exog @ beta for every training period;
+    # whatever is left once that is removed must be constant to be forecastable.
+    obs_intercept = np.array(ssm.obs_intercept, dtype=float)
+    if exog_names:
+        obs_intercept = obs_intercept - (np.asarray(model.exog, dtype=float) @ exog_coef)[None, :]
+
+    arrays = {
+        "params": params,
+        "exog_coef": exog_coef,
+        "design": _time_invariant(np.asarray(ssm["design"], dtype=float), "design"),
+        "obs_intercept": _time_invariant(obs_intercept, "obs_intercept"),
+        "obs_cov": _time_invariant(np.asarray(ssm["obs_cov"], dtype=float), "obs_cov"),
+        "transition": _time_invariant(np.asarray(ssm["transition"], dtype=float), "transition"),
+        "state_intercept": _time_invariant(np.asarray(ssm["state_intercept"], dtype=float), "state_intercept"),
+        "selection": _time_invariant(np.asarray(ssm["selection"], dtype=float), "selection"),
+        "state_cov": _time_invariant(np.asarray(ssm["state_cov"], dtype=float), "state_cov"),
+        # One-step-ahead prediction for the first out-of-sample period
+        "state": np.asarray(results.predicted_state[:, -1], dtype=float),
+        "state_cov_final": np.asarray(results.predicted_state_cov[:, :, -1], dtype=float),
+    }
+
+    index = getattr(model, "_index", None)
+    last_period = None
+    freq = None
+    if isinstance(index, pd.PeriodIndex) and len(index):
+        last_period = str(index[-1])
+        freq = index.freqstr
+
+    header = {
+        "format": ARTIFACT_FORMAT,
+        "order": list(model.order),
+        "seasonal_order": list(model.seasonal_order),
+        "trend": model.trend,
+        "param_names": param_names,
+        "exog_names": exog_names,
+        "nobs": int(model.nobs),
+        "last_period": last_period,
+        "freq": freq,
+    }
+    return header, arrays
+
+
+def export_artifact(model_path, out_dir=None):
+    """
+    Converts a pickled SARIMAX results file into a compact .npz + .json artifact.
+
+    Parameters:
+    model_path (str): Path to the pickled model file.
+    out_dir (str): Directory for the artifact. Defaults to the pickle's directory.
+
+    Returns:
+    str: Path to the written .npz file.
+    """
+    with open(model_path, 'rb') as f:
+        results = pickle.load(f)
+    header, arrays = extract_state_space(results)
+    header["source"] = os.path.basename(model_path)
+
+    target = model_path if out_dir is None else os.path.join(out_dir, os.path.basename(model_path))
+    npz_path, json_path = artifact_paths(target)
+    with open(json_path, "w") as f:
+        json.dump(header, f, indent=2)
+    # Written last so the .npz mtime marks a complete artifact
+    np.savez(npz_path, **arrays)
+    return npz_path
+
+
+def load_artifact(path):
+    """
+    Loads a compact artifact written by export_artifact.
+
+    Parameters:
+    path (str): Path to the artifact's .npz or .json file.
+
+    Returns:
+    CompactARIMAXResults: A forecast-capable model.
+    """
+    npz_path, json_path = artifact_paths(path)
+    with open(json_path) as f:
+        header = json.load(f)
+    if header.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported model artifact format: {header.get('format')}")
+    with np.load(npz_path) as data:
+        arrays = {name: data[name] for name in ARRAY_NAMES}
+    return CompactARIMAXResults(header, arrays)
+
+
+class CompactForecast:
+    def __init__(self, predicted_mean, var_pred_mean):
+        """
+        Forecast output mirroring the parts of statsmodels' PredictionResults used by the app.
+
+        Parameters:
+        predicted_mean (pd.Series): Forecasted means.
+        var_pred_mean (pd.Series): Forecast variances.
+        """
+        self.predicted_mean = predicted_mean
+        self.var_pred_mean = var_pred_mean
+        self.se_mean = np.sqrt(var_pred_mean)
+
+    def conf_int(self, alpha=0.05):
+        """
+        Returns the (1 - alpha) confidence interval as a DataFrame with lower and upper columns.
+        """
+        q = NormalDist().inv_cdf(1 - alpha / 2)
+        return pd.DataFrame(
+            {
+                "lower y": self.predicted_mean - q * self.se_mean,
+                "upper y": self.predicted_mean + q * self.se_mean,
+            },
+            index=self.predicted_mean.index,
+        )
+
+
+class CompactARIMAXResults:
+    def __init__(self, header, arrays):
+        """
+        Forecast-only stand-in for a fitted SARIMAX results object.
+
+        Parameters:
+        header (dict): Artifact header (orders, exog names, index metadata).
+        arrays (dict): State-space arrays keyed by ARRAY_NAMES.
+        """
+        self.header = header
+        self.exog_names = header["exog_names"]
+        self.params = pd.Series(arrays["params"], index=header["param_names"])
+        self.arrays = arrays
+
+    def _forecast_index(self, steps, exog):
+        if isinstance(exog, (pd.DataFrame, pd.Series)) and len(exog.index) == steps:
+            return exog.index
+        if self.header["last_period"] is not None:
+            start = pd.Period(self.header["last_period"], freq=self.header["freq"]) + 1
+            return pd.period_range(start=start, periods=steps, freq=self.header["freq"])
+        nobs = self.header["nobs"]
+        return pd.RangeIndex(nobs, nobs + steps)
+
+    def forecast_moments(self, steps, exog=None):
+        """
+        Runs the state-space forecast recursion.
+
+        Parameters:
+        steps (int): Number of periods to forecast.
+        exog (array-like): Exogenous values with shape (steps, k_exog).
+
+        Returns:
+        tuple: numpy arrays of forecast means and variances.
+        """
+        arrays = self.arrays
+        k_exog = len(self.exog_names)
+        if k_exog:
+            if exog is None:
+                raise ValueError("Out-of-sample forecasting requires exog values.")
+            exog = np.asarray(exog, dtype=float).reshape(steps, -1)
+            if exog.shape[1] != k_exog:
+                raise ValueError(f"Expected {k_exog} exog columns, got {exog.shape[1]}.")
+            obs_intercept = arrays["obs_intercept"][0] + exog @ arrays["exog_coef"]
+        else:
+            obs_intercept = np.full(steps, arrays["obs_intercept"][0])
+
+        design = arrays["design"][0]
+        transition = arrays["transition"]
+        selection = arrays["selection"]
+        state_noise = selection @ arrays["state_cov"] @ selection.T
+        obs_var = arrays["obs_cov"][0, 0]
+
+        state = arrays["state"].copy()
+        state_cov = arrays["state_cov_final"].copy()
+        means = np.empty(steps)
+        variances = np.empty(steps)
+        for t in range(steps):
+            means[t] = obs_intercept[t] + design @ state
+            variances[t] = design @ state_cov @ design + obs_var
+            state = arrays["state_intercept"] + transition @ state
+            state_cov = transition @ state_cov @ transition.T + state_noise
+        return means, variances
+
+    def get_forecast(self, steps=1, exog=None):
+        """
+        Forecasts the next steps periods, like SARIMAXResults.get_forecast.
+
+        Parameters:
+        steps (int): Number of periods to forecast.
+        exog (pd.DataFrame or array-like): Exogenous values for the forecast periods.
+
+        Returns:
+        CompactForecast: Means, variances and confidence intervals.
+        """
+        means, variances = self.forecast_moments(steps, exog)
+        index = self._forecast_index(steps, exog)
+        return CompactForecast(pd.Series(means, index=index), pd.Series(variances, index=index))
+
+
+def compare_forecasts(model_path, steps=24, seed=0):
+    """
+    Checks that a model's artifact reproduces the pickle's get_forecast output.
+
+    Parameters:
+    model_path (str): Path to the pickled model file (its artifact must exist).
+    steps (int): Forecast horizon.
+    seed (int): Seed for the random exog path.
+
+    Returns:
+    dict: Maximum absolute differences in means and 80% interval bounds.
+    """
+    with open(model_path, 'rb') as f:
+        results = pickle.load(f)
+    compact = load_artifact(artifact_paths(model_path)[0])
+    exog = np.random.default_rng(seed).normal(size=(steps, len(compact.exog_names)))
+    if not compact.exog_names:
+        exog = None
+
+    expected = results.get_forecast(steps=steps, exog=exog)
+    actual = compact.get_forecast(steps=steps, exog=exog)
+    expected_ci = expected.conf_int(alpha=0.2).values
+    actual_ci = actual.conf_int(alpha=0.2).values
+    return {
+        "mean": float(np.max(np.abs(expected.predicted_mean.values - actual.predicted_mean.values))),
+        "interval": float(np.max(np.abs(expected_ci - actual_ci))),
+    }
+
+
+def _rss_bytes():
+    """
+    Returns the current resident set size of this process, in bytes.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _load_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _measure_catalog_load(paths, loader_name):
+    """
+    Loads every path with the given loader and prints the elapsed time and RSS growth as JSON.
+    """
+    import time
+
+    loader = load_artifact if loader_name == "artifact" else _load_pickle
+    # Import the heavy modules first so only the model loads are measured
+    import statsmodels.tsa.statespace.sarimax  # noqa: F401
+    rss_before = _rss_bytes()
+    start = time.perf_counter()
+    models = [loader(path) for path in paths]
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "rss_bytes": _rss_bytes() - rss_before, "models": len(models)}))
+
+
+def _catalog_report(models_dir):
+    """
+    Exports every catalog model in models_dir and prints equivalence, load-time and RSS results.
+    """
+    import subprocess
+
+    from utils.all_models import all_models
+
+    pickles = [os.path.join(models_dir, name) for name in all_models]
+    pickles = [path for path in pickles if os.path.exists(path)]
+    if not pickles:
+        print(f"No catalog models found in {models_dir}")
+        return
+
+    npz_paths = []
+    for path in pickles:
+        npz_paths.append(export_artifact(path))
+        diffs = compare_forecasts(path)
+        print(f"{os.path.basename(path)}: max |mean diff| {diffs['mean']:.2e}, max |interval diff| {diffs['interval']:.2e}")
+
+    pickle_bytes = sum(os.path.getsize(path) for path in pickles)
+    artifact_bytes = sum(sum(os.path.getsize(p) for p in artifact_paths(path)) for path in npz_paths)
+    print(f"\nOn disk: pickles {pickle_bytes / 1e6:.1f} MB, artifacts {artifact_bytes / 1e6:.2f} MB")
+
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for loader_name, paths in (("pickle", pickles), ("artifact", npz_paths)):
+        code = (
+            "import sys; from utils.model_artifact import _measure_catalog_load; "
+            f"_measure_catalog_load(sys.argv[1:], {loader_name!r})"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code, *paths], cwd=repo_root, capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        print(
+            f"{loader_name:>8}: loaded {result['models']} models in {result['seconds'] * 1000:.1f} ms, "
+            f"RSS +{result['rss_bytes'] / 1e6:.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.model_artifact [models_dir]
+    _catalog_report(sys.argv[1] if len(sys.argv) > 1 else "models")
@@ -0,0 +1,263 @@
+import json
+import mmap
+import os
+import pickle
+import re
+import struct
+import sys
+
+import numpy as np
+
+from utils.model_artifact import CompactARIMAXResults, artifact_paths, extract_state_space, load_artifact
+
+BUNDLE_FORMAT = "matrix-bundle-v1"
+BUNDLE_MAGIC = b"MATRIXB1"
+MODELS_DIR = "models"
+DEFAULT_BUNDLE_PATH = os.path.join(MODELS_DIR, "catalog.bundle")
+
+# Arrays are aligned so every view starts on a cache-line boundary
+_ALIGNMENT = 64
+_MODEL_NAME = re.compile(r"arima_model_(\d+)-year_monthly_(\w+?)\.(?:pkl|npz|json)$")
+
+
+def parse_model_name(model_path):
+    """
+    Extracts the maturity and model type from a catalog file name.
+
+    Parameters:
+    model_path (str): e.g. "models/arima_model_2-year_monthly_tariff_m1.pkl".
+
+    Returns:
+    tuple: (maturity, model_type), e.g. (2, "tariff_m1"), or None if the name does not match.
+    """
+    match = _MODEL_NAME.search(os.path.basename(model_path))
+    if match is None:
+        return None
+    return int(match.group(1)), match.group(2)
+
+
+def source_file(model_path):
+    """
+    Returns the file a model is read from: its exported artifact if there is one, else model_path.
+    """
+    npz_path = artifact_paths(model_path)[0]
+    return npz_path if os.path.exists(npz_path) else model_path
+
+
+def _read_model(model_path):
+    """
+    Returns the artifact header and arrays for a model, preferring an exported artifact.
+    """
+    npz_path = artifact_paths(model_path)[0]
+    if os.path.exists(npz_path):
+        compact = load_artifact(npz_path)
+        return compact.header, compact.arrays
+    with open(model_path, 'rb') as f:
+        header, arrays = extract_state_space(pickle.load(f))
+    header["source"] = os.path.basename(model_path)
+    return header, arrays
+
+
+def _file_record(path, bundle_dir):
+    """
+    Returns where a bundled model came from, relative to the bundle, with the file's mtime and size.
+    """
+    stat = os.stat(path)
+    return {
+        "file": os.path.relpath(os.path.abspath(path), bundle_dir),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+
+
+def _pad(offset):
+    return -offset % _ALIGNMENT
+
+
+def build_bundle(model_paths, bundle_path=DEFAULT_BUNDLE_PATH):
+    """
+    Packs every model into one file: a JSON index by maturity and model type,
+    followed by the aligned raw arrays of each model. The index records the
+    file each model was read from, with its mtime and size, so a model file
+    changed after the bundle was built is not shadowed by its bundled copy.
+
+    Parameters:
+    model_paths (list): Model pickles or artifacts to include.
+    bundle_path (str): Destination of the bundle.
+
+    Returns:
+    list: The (maturity, model_type) keys stored in the bundle.
+    """
+    bundle_dir = os.path.dirname(os.path.abspath(bundle_path))
+    models = {}
+    sources = {}
+    for model_path in model_paths:
+        key = parse_model_name(model_path)
+        if key is None:
+            raise ValueError(f"Not a catalog model file name: {model_path}")
+        sources[key] = _file_record(source_file(model_path), bundle_dir)
+        models[key] = _read_model(model_path)
+
+    # Lay out the data region first so the index can hold relative offsets
+    index = {}
+    blobs = []
+    offset = 0
+    for (maturity, model_type), (header, arrays) in sorted(models.items()):
+        layout = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array, dtype="<f8")
+            offset += _pad(offset)
+            layout[name] = {"offset": offset, "shape": list(array.shape)}
+            blobs.append((offset, array))
+            offset += array.nbytes
+        index[f"{maturity}/{model_type}"] = {
+            "header": header,
+            "arrays": layout,
+            "source": sources[(maturity, model_type)],
+        }
+
+    meta = json.dumps({"format": BUNDLE_FORMAT, "dtype": "<f8", "models": index}).encode("utf-8")
+    data_start = len(BUNDLE_MAGIC) + 16 + len(meta)
+    data_start += _pad(data_start)
+
+    tmp_path = bundle_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack("<QQ", len(meta), data_start))
+        f.write(meta)
+        for rel_offset, array in blobs:
+            f.seek(data_start + rel_offset)
+            f.write(array.tobytes())
+    # Atomic swap: processes that still map the old bundle keep a valid view
+    os.replace(tmp_path, bundle_path)
+    return sorted(models)
+
+
+class ModelBundle:
+    def __init__(self, bundle_path=DEFAULT_BUNDLE_PATH):
+        """
+        Read-only, memory-mapped view of a bundle written by build_bundle.
+
+        The arrays of each model are numpy views into the mapping, so every
+        process that opens the bundle shares the same OS page-cache pages.
+
+        Parameters:
+        bundle_path (str): Path to the bundle file.
+        """
+        self.path = bundle_path
+        with open(bundle_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            raise ValueError(f"{bundle_path} is not a model bundle.")
+        meta_len, self._data_start = struct.unpack_from("<QQ", self._mmap, len(BUNDLE_MAGIC))
+        meta_start = len(BUNDLE_MAGIC) + 16
+        meta = json.loads(self._mmap[meta_start:meta_start + meta_len].decode("utf-8"))
+        if meta.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported model bundle format: {meta.get('format')}")
+        self._dtype = np.dtype(meta["dtype"])
+
+        self._index = {}
+        for name, entry in meta["models"].items():
+            maturity, model_type = name.split("/", 1)
+            self._index[(int(maturity), model_type)] = entry
+        self._models = {}
+
+    def keys(self):
+        """
+        Returns the (maturity, model_type) pairs stored in the bundle.
+        """
+        return list(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def header(self, maturity, model_type):
+        """
+        Returns the artifact header (orders, exog names, ...) of a bundled model
+        without creating any array views.
+        """
+        return self._index[(maturity, model_type)]["header"]
+
+    def _view(self, layout):
+        shape = layout["shape"]
+        count = int(np.prod(shape)) if shape else 1
+        array = np.frombuffer(self._mmap, dtype=self._dtype, count=count, offset=self._data_start + layout["offset"])
+        return array.reshape(shape)
+
+    def get(self, maturity, model_type):
+        """
+        Returns the forecast-capable model for a maturity and model type.
+
+        Parameters:
+        maturity (int): Maturity in years.
+        model_type (str): Model type suffix, e.g. "tariff_ffr_cpi".
+
+        Returns:
+        CompactARIMAXResults: The model, backed by zero-copy views into the bundle.
+        """
+        key = (maturity, model_type)
+        model = self._models.get(key)
+        if model is None:
+            if key not in self._index:
+                raise KeyError(f"No {maturity}-year {model_type} model in {self.path}")
+            entry = self._index[key]
+            arrays = {name: self._view(layout) for name, layout in entry["arrays"].items()}
+            model = CompactARIMAXResults(entry["header"], arrays)
+            self._models[key] = model
+        return model
+
+    def is_current(self, model_path):
+        """
+        Returns True if the bundle should serve the model at model_path.
+
+        If the file the model would be read from (see source_file) exists, it
+        must be the bundled file with the same mtime and size; a model refit
+        after the bundle was built, or a same-named model in another directory,
+        is read from disk instead. If the file does not exist, the bundle serves
+        it for paths in the bundle's directory or the one it was bundled from.
+        Bundles that predate source records only serve models without a file.
+
+        Parameters:
+        model_path (str): Path of the model file, e.g. "models/arima_model_5-year_monthly_tariff.pkl".
+        """
+        key = parse_model_name(model_path)
+        if key is None or key not in self._index:
+            return False
+        bundle_dir = os.path.dirname(os.path.abspath(self.path))
+        source = self._index[key].get("source")
+        bundled = None if source is None else os.path.normpath(os.path.join(bundle_dir, source["file"]))
+        path = os.path.abspath(source_file(model_path))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            model_dir = os.path.dirname(path)
+            return model_dir == bundle_dir or (bundled is not None and model_dir == os.path.dirname(bundled))
+        return (
+            path == bundled
+            and (stat.st_mtime_ns, stat.st_size) == (source["mtime_ns"], source["size"])
+        )
+
+    def find(self, model_path):
+        """
+        Returns the bundled model for model_path, or None if it is not bundled or
+        its file changed since the bundle was built (see is_current).
+
+        Parameters:
+        model_path (str): Path of the model file, e.g. "models/arima_model_5-year_monthly_tariff.pkl".
+        """
+        if not self.is_current(model_path):
+            return None
+        return self.get(*parse_model_name(model_path))
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.model_bundle [models_dir] [bundle_path]
+    models_dir = sys.argv[1] if len(sys.argv) > 1 else MODELS_DIR
+    bundle_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(models_dir, "catalog.bundle")
+    paths = sorted(
+        os.path.join(models_dir, name)
+        for name in os.listdir(models_dir)
+        if name.endswith(".pkl") and parse_model_name(name) is not None
+    )
+    keys = build_bundle(paths, bundle_path)
+    print(f"Bundled {len(keys)} models into {bundle_path} ({os.path.getsize(bundle_path) / 1e6:.2f} MB)")
@@ -0,0 +1,406 @@
+import json
+import os
+import pickle
+import threading
+from collections import namedtuple
+
+from utils.all_maturities import all_maturities
+from utils.all_models import all_models
+from utils.all_tariffs import all_tariffs
+from utils.model_artifact import artifact_paths
+from utils.model_bundle import MODELS_DIR, ModelBundle, parse_model_name
+
+# Non-tariff variable groups, in the order their columns follow the tariffs in the models' exog
+VARIABLE_GROUPS = [
+    ("ffr_cpi", ["diff_FFR", "diff_CPI"]),
+    ("vix_cs", ["VIX_close", "diff_CSD"]),
+    ("m1", ["diff_M1_supply"]),
+]
+
+# Model type of the catalog models that use every group
+ALL_GROUPS_MODEL_TYPE = "all"
+
+# Labels the pages (and older callers) use for the groups
+GROUP_ALIASES = {
+    "Inflation / FFR": "ffr_cpi",
+    "FFR": "ffr_cpi",
+    "Inflation": "ffr_cpi",
+    "Consumer Sentiment / VIX": "vix_cs",
+    "VIX": "vix_cs",
+    "Consumer Sentiment": "vix_cs",
+    "M1 Supply": "m1",
+}
+
+# Sidecar in the models directory recording the exog columns of models that only have a pickle
+INDEX_NAME = "catalog_index.json"
+INDEX_FORMAT = "catalog-index-v1"
+
+# One model in the catalog; source says where exog_names came from ("artifact", "bundle" or "index")
+CatalogEntry = namedtuple("CatalogEntry", ["maturity", "model_type", "groups", "path", "exog_names", "source"])
+
+_GROUP_NAMES = [name for name, _ in VARIABLE_GROUPS]
+_GROUP_COLUMNS = dict(VARIABLE_GROUPS)
+
+
+def model_path_for(maturity, model_type, models_dir=MODELS_DIR):
+    """
+    Returns the path of the catalog model for a maturity and model type.
+
+    Parameters:
+    maturity (int): Maturity in years.
+    model_type (str): Model type suffix, e.g. "tariff_ffr_cpi".
+    models_dir (str): Directory holding the model catalog.
+
+    Returns:
+    str: e.g. "models/arima_model_2-year_monthly_tariff_ffr_cpi.pkl".
+    """
+    return os.path.join(models_dir, f"arima_model_{maturity}-year_monthly_{model_type}.pkl")
+
+
+def normalize_groups(groups):
+    """
+    Returns variable groups as a tuple in catalog order.
+
+    Parameters:
+    groups (iterable): Group names ("ffr_cpi", "vix_cs", "m1") or their GROUP_ALIASES labels.
+
+    Returns:
+    tuple: e.g. ("ffr_cpi", "m1").
+    """
+    selected = set()
+    for group in groups:
+        group = GROUP_ALIASES.get(group, group)
+        if group not in _GROUP_COLUMNS:
+            raise ValueError(f"Unknown variable group: {group!r}. Expected one of {_GROUP_NAMES}.")
+        selected.add(group)
+    return tuple(name for name in _GROUP_NAMES if name in selected)
+
+
+def model_type_for(groups):
+    """
+    Returns the model type suffix for a set of variable groups, e.g. ("ffr_cpi", "m1") -> "tariff_ffr_cpi_m1".
+    """
+    groups = normalize_groups(groups)
+    if len(groups) == len(VARIABLE_GROUPS):
+        return ALL_GROUPS_MODEL_TYPE
+    return "_".join(("tariff",) + groups)
+
+
+def groups_for_model_type(model_type):
+    """
+    Returns the variable groups a model type uses, or None if the name is not a catalog model type.
+    """
+    if model_type == ALL_GROUPS_MODEL_TYPE:
+        return tuple(_GROUP_NAMES)
+    if not model_type.startswith("tariff"):
+        return None
+    rest = model_type[len("tariff"):]
+    groups = []
+    for name in _GROUP_NAMES:
+        if rest.startswith(f"_{name}"):
+            groups.append(name)
+            rest = rest[len(name) + 1:]
+    if rest:
+        return None
+    return tuple(groups)
+
+
+def groups_from_columns(exog_columns):
+    """
+    Returns the variable groups present in a list of exogenous columns.
+
+    A group counts as present if any of its columns (or one of its labels) is
+    there; validate_exog then reports the columns it is missing.
+
+    Parameters:
+    exog_columns (list): Exogenous column names.
+
+    Returns:
+    tuple: Groups in catalog order.
+    """
+    present = set()
+    for column in exog_columns:
+        if column in GROUP_ALIASES:
+            present.add(GROUP_ALIASES[column])
+        for name, columns in VARIABLE_GROUPS:
+            if column in columns:
+                present.add(name)
+    return normalize_groups(present)
+
+
+def groups_from_flags(ffr_cpi=False, vix_cs=False, m1=False):
+    """
+    Returns the variable groups switched on by the page's selection flags.
+    """
+    return normalize_groups(
+        name for name, selected in zip(_GROUP_NAMES, (ffr_cpi, vix_cs, m1)) if selected
+    )
+
+
+def read_index(models_dir=MODELS_DIR):
+    """
+    Returns the catalog index of a models directory: file name -> {"mtime_ns", "size", "exog_names"}.
+    A missing or unreadable index is returned as empty.
+    """
+    try:
+        with open(os.path.join(models_dir, INDEX_NAME)) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if index.get("format") != INDEX_FORMAT:
+        return {}
+    return index["models"]
+
+
+def write_index(models, models_dir=MODELS_DIR):
+    """
+    Writes the catalog index atomically. A read-only models directory is skipped;
+    its pickles are then read again whenever the directory is rescanned.
+
+    Returns:
+    bool: True if the index was written.
+    """
+    index_path = os.path.join(models_dir, INDEX_NAME)
+    tmp_path = index_path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump({"format": INDEX_FORMAT, "models": models}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, index_path)
+    except OSError:
+        return False
+    return True
+
+
+def pickle_exog_names(model_path):
+    """
+    Returns the exog columns, in order, of a pickled SARIMAX results object.
+    """
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    return list(model.model.exog_names or [])
+
+
+class ModelCatalog:
+    def __init__(self, models_dir=MODELS_DIR):
+        """
+        Index of the model catalog, built from one scan of the models directory.
+
+        Models are found from their file names (pickles, exported artifacts and the
+        catalog bundle). Each entry records the maturity, the variable groups and
+        the exog columns the model expects. Those come from the artifact or bundle
+        header; for a model that only has a pickle they are read from the pickle
+        once and recorded in the INDEX_NAME sidecar against the file's mtime and
+        size, so later scans and every validate_exog call never unpickle a model.
+
+        Parameters:
+        models_dir (str): Directory holding the model catalog.
+        """
+        self.models_dir = models_dir
+        self.unrecognized = []
+        self.unreadable = []
+        self._entries = {}
+        self._scan()
+
+    def _scan(self):
+        found = {}
+        try:
+            names = sorted(os.listdir(self.models_dir))
+        except OSError:
+            names = []
+        for name in names:
+            key = parse_model_name(name)
+            if key is None:
+                continue
+            found.setdefault(key, set()).add(os.path.splitext(name)[1])
+
+        bundle = None
+        bundle_path = os.path.join(self.models_dir, "catalog.bundle")
+        if os.path.exists(bundle_path):
+            bundle = ModelBundle(bundle_path)
+            for key in bundle.keys():
+                found.setdefault(key, set()).add(".bundle")
+
+        stored = read_index(self.models_dir)
+        index = dict(stored)
+        indexed = {}
+        for (maturity, model_type), kinds in sorted(found.items()):
+            groups = groups_for_model_type(model_type)
+            path = model_path_for(maturity, model_type, self.models_dir)
+            if groups is None:
+                self.unrecognized.append(path)
+                continue
+            if ".json" in kinds:
+                with open(artifact_paths(path)[1]) as f:
+                    exog_names, source = json.load(f)["exog_names"], "artifact"
+            elif ".bundle" in kinds and bundle.is_current(path):
+                exog_names, source = bundle.header(maturity, model_type)["exog_names"], "bundle"
+            else:
+                exog_names = self._indexed_exog_names(path, index)
+                if exog_names is None:
+                    self.unreadable.append(path)
+                    continue
+                indexed[os.path.basename(path)] = index[os.path.basename(path)]
+                source = "index"
+            self._entries[(groups, maturity)] = CatalogEntry(
+                maturity, model_type, groups, path, list(exog_names), source
+            )
+
+        if indexed != stored:
+            write_index(indexed, self.models_dir)
+
+    @staticmethod
+    def _indexed_exog_names(path, index):
+        """
+        Returns a pickle's exog columns from the index, reading the pickle (and
+        updating index) only if it is not indexed or changed since. None if it cannot be read.
+        """
+        name = os.path.basename(path)
+        stat = os.stat(path)
+        record = index.get(name)
+        if record is None or (record["mtime_ns"], record["size"]) != (stat.st_mtime_ns, stat.st_size):
+            try:
+                exog_names = pickle_exog_names(path)
+            except Exception:
+                return None
+            record = index[name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "exog_names": exog_names}
+        return record["exog_names"]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entries(self):
+        """
+        Returns every catalog entry, ordered by variable groups and maturity.
+        """
+        return [self._entries[key] for key in sorted(self._entries)]
+
+    def get(self, groups, maturity):
+        """
+        Returns the entry for a set of variable groups and a maturity, or None.
+        """
+        return self._entries.get((normalize_groups(groups), maturity))
+
+    def resolve(self, groups, maturity):
+        """
+        Returns the entry for a set of variable groups and a maturity.
+
+        Raises:
+        KeyError: If the catalog has no such model.
+        """
+        entry = self.get(groups, maturity)
+        if entry is None:
+            raise KeyError(f"No {maturity}-year {model_type_for(groups)} model in {self.models_dir}")
+        return entry
+
+    def models_for(self, groups, maturities=all_maturities):
+        """
+        Returns the available entries for a set of variable groups, in maturity order.
+        """
+        groups = normalize_groups(groups)
+        return [self._entries[(groups, m)] for m in maturities if (groups, m) in self._entries]
+
+    def missing(self, names=all_models):
+        """
+        Returns the expected model file names (utils.all_models by default) the catalog does not hold.
+        """
+        present = {os.path.basename(entry.path) for entry in self._entries.values()}
+        return [name for name in names if name not in present]
+
+    @staticmethod
+    def validate_exog(entry, exog_columns):
+        """
+        Checks exogenous columns against what a model expects, using the catalog index only.
+
+        Parameters:
+        entry (CatalogEntry): The model to check against.
+        exog_columns (list): Column names of the exog frame.
+
+        Returns:
+        list: The model's exog columns in the order it expects them.
+
+        Raises:
+        ValueError: If columns are missing, unexpected or duplicated.
+        """
+        exog_columns = list(exog_columns)
+        duplicated = sorted({col for col in exog_columns if exog_columns.count(col) > 1})
+        missing = [col for col in entry.exog_names if col not in exog_columns]
+        extra = [col for col in exog_columns if col not in entry.exog_names]
+        if duplicated or missing or extra:
+            raise ValueError(
+                f"Exog columns do not match the {entry.maturity}-year {entry.model_type} model "
+                f"(missing: {missing}, unexpected: {extra}, duplicated: {duplicated})."
+            )
+        return list(entry.exog_names)
+
+    @staticmethod
+    def validate_models(entries, exog_columns):
+        """
+        Checks exogenous columns against every model in entries, e.g. all maturities of one model type.
+
+        Returns:
+        list: The exog columns in the order all the models expect them.
+
+        Raises:
+        ValueError: If the columns do not match a model, or the models order them differently.
+        """
+        model_columns = ModelCatalog.validate_exog(entries[0], exog_columns)
+        for entry in entries[1:]:
+            if ModelCatalog.validate_exog(entry, exog_columns) != model_columns:
+                raise ValueError(
+                    f"The {entry.maturity}-year {entry.model_type} model orders its exog columns differently "
+                    f"from the {entries[0].maturity}-year model."
+                )
+        return model_columns
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def _dir_signature(models_dir):
+    signature = []
+    for path in (models_dir, os.path.join(models_dir, "catalog.bundle")):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def get_catalog(models_dir=MODELS_DIR):
+    """
+    Returns the shared catalog for a models directory, rescanning it only when
+    files were added, removed or the bundle was rebuilt.
+
+    Parameters:
+    models_dir (str): Directory holding the model catalog.
+
+    Returns:
+    ModelCatalog: The catalog index.
+    """
+    key = os.path.abspath(models_dir)
+    signature = _dir_signature(models_dir)
+    with _catalogs_lock:
+        cached = _catalogs.get(key)
+        if cached is None or cached[0] != signature:
+            catalog = ModelCatalog(models_dir)
+            # Taken again after the scan, which may have rewritten the index file
+            cached = (_dir_signature(models_dir), catalog)
+            _catalogs[key] = cached
+        return cached[1]
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.model_catalog [models_dir]
+    import sys
+
+    catalog = get_catalog(sys.argv[1] if len(sys.argv) > 1 else MODELS_DIR)
+    for entry in catalog.entries():
+        print(f"{entry.model_type:<24} {entry.maturity:>2}-year  {len(entry.exog_names)} exog ({entry.source})  {entry.path}")
+    for path in catalog.unrecognized:
+        print(f"unrecognized model type: {path}")
+    for path in catalog.unreadable:
+        print(f"unreadable model: {path}")
+    for name in catalog.missing():
+        print(f"missing: {name}")
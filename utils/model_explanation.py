@@ -1,6 +1,133 @@
+import io
+from functools import lru_cache
+
 import numpy as np
-from scipy.optimize import minimize
-import matplotlib.pyplot as plt
+
+from utils.afns_curves import AFNS_PARAMETERS, afns_curves, compute_loadings, params_matrix
+
+
+DEFAULT_THRESHOLDS = {
+    "level": 0.05,
+    "slope": 0.05,
+    "curvature": 0.05,
+    "lambda": 0.05
+}
+
+# Narrative for each (parameter, regime) transition; {cur} and {fut} are the rounded values
+NARRATIVES = {
+    ("level", "rise"): ("The level factor increased from {cur} to {fut}, suggesting that long-term yields are expected to rise. "
+                        "This could reflect market expectations of higher long-run inflation or stronger economic growth."),
+    ("level", "fall"): ("The level factor decreased from {cur} to {fut}, indicating expectations for lower long-term interest rates. "
+                        "This may signal concerns about weaker growth or lower inflation in the future."),
+    ("slope", "inversion easing"): ("The slope factor increased from {cur} to {fut}, but both values remain negative. "
+                                    "This indicates a still-inverted curve, though the inversion is expected to lessen—potentially a sign of easing recession fears."),
+    ("slope", "inversion deepening"): ("The slope factor decreased from {cur} to {fut}, deepening the yield curve inversion. "
+                                       "This may reinforce market expectations of an economic slowdown."),
+    ("slope", "un-inversion"): ("The slope factor shifted from negative ({cur}) to positive ({fut}), marking a transition from an inverted yield curve to a normal upward-sloping one. "
+                                "This often signals improved economic outlooks."),
+    ("slope", "inversion"): ("The slope factor flipped from positive ({cur}) to negative ({fut}), indicating an expected inversion of the yield curve—often viewed as a warning of recession."),
+    ("slope", "steepening"): ("The slope factor increased from {cur} to {fut}, steepening the yield curve. "
+                              "This could point to expectations for stronger economic activity or rising long-term rates."),
+    ("slope", "flattening"): ("The slope factor decreased from {cur} to {fut}, flattening the curve. "
+                              "A flatter curve may suggest market uncertainty or weakening economic momentum."),
+    ("curvature", "dip easing"): ("The curvature factor increased from {cur} to {fut}, though both values are negative. "
+                                  "This means the mid-term yields are expected to be less depressed than before."),
+    ("curvature", "dip deepening"): ("The curvature factor decreased further into negative territory ({cur} to {fut}), indicating an even more pronounced dip in medium-term yields."),
+    ("curvature", "to concave"): ("The curvature factor changed from positive ({cur}) to negative ({fut}), suggesting a shift toward a concave yield curve—possibly reflecting mid-term pessimism."),
+    ("curvature", "to convex"): ("The curvature factor moved from negative ({cur}) to positive ({fut}), pointing to a shift toward more convexity—suggesting a possible mid-term rate rebound."),
+    ("curvature", "hump rising"): ("The curvature factor increased from {cur} to {fut}, indicating a more pronounced hump in the yield curve at intermediate maturities. "
+                                   "This could reflect increased uncertainty or mixed expectations across time horizons."),
+    ("curvature", "hump flattening"): ("The curvature factor decreased from {cur} to {fut}, smoothing out the mid-term segment of the curve. "
+                                       "This suggests more consistency in market expectations across maturities."),
+    ("lambda", "faster decay"): ("The lambda parameter rose from {cur} to {fut}, meaning yield curve factors decay more quickly with maturity. "
+                                 "This suggests short-term influences are expected to play a stronger role in shaping yields."),
+    ("lambda", "slower decay"): ("The lambda parameter fell from {cur} to {fut}, indicating slower decay of yield curve components. "
+                                 "This suggests that long-term expectations are expected to have more influence."),
+}
+
+NO_CHANGE_NARRATIVE = "There are no significant changes in the yield curve parameters between the current and forecasted periods."
+
+
+def _classify(name, cur, fut, diff):
+    """Regime label of every transition of one parameter, decided by sign and direction."""
+    rising = diff > 0
+    if name == "level":
+        return np.where(rising, "rise", "fall")
+    if name == "lambda":
+        return np.where(rising, "faster decay", "slower decay")
+    if name == "slope":
+        conditions = [(cur < 0) & (fut < 0) & rising, (cur < 0) & (fut < 0), (cur < 0) & (fut > 0), (cur > 0) & (fut < 0), rising]
+        labels = ["inversion easing", "inversion deepening", "un-inversion", "inversion", "steepening"]
+        return np.select(conditions, labels, "flattening")
+    conditions = [(cur < 0) & (fut < 0) & rising, (cur < 0) & (fut < 0), (cur > 0) & (fut < 0), (cur < 0) & (fut > 0), rising]
+    labels = ["dip easing", "dip deepening", "to concave", "to convex", "hump rising"]
+    return np.select(conditions, labels, "hump flattening")
+
+
+def explain_afns_series(params, dates=None, thresholds=None):
+    """
+    Classify every significant parameter change along a series of AFNS fits.
+
+    Each consecutive pair of fits is compared the way explain_afns_difference
+    compares one pair, but for all pairs and parameters at once. No text is
+    generated; pass the rows to be shown to describe_afns_events.
+
+    :param params: Fits over time: a DataFrame with level/slope/curvature/lambda
+        columns (its index is used as dates), fit_afns_panel output, or a list of fit_afns dicts
+    :param dates: Date of each fit; defaults to the DataFrame index or 0..n-1
+    :param thresholds: dict of thresholds for each parameter
+    :return: DataFrame of events with date, previous_date, parameter, regime,
+        previous, value, change and magnitude (abs(change) / threshold) columns,
+        ordered by date and then parameter
+    """
+    import pandas as pd
+
+    if thresholds is None:
+        thresholds = DEFAULT_THRESHOLDS
+    if isinstance(params, pd.DataFrame):
+        if dates is None:
+            dates = params.index
+        values = params[AFNS_PARAMETERS].to_numpy(dtype=float)
+    else:
+        values = params_matrix(params)
+    dates = pd.Index(dates if dates is not None else range(len(values)))
+
+    # Compare rounded values, as the single-pair explanation does
+    cur = np.round(values[:-1], 3)
+    fut = np.round(values[1:], 3)
+    diff = np.round(values[1:] - values[:-1], 3)
+    limits = np.array([thresholds.get(name, 0.05) for name in AFNS_PARAMETERS])
+    significant = np.abs(diff) > limits
+
+    regimes = np.empty(diff.shape, dtype=object)
+    for j, name in enumerate(AFNS_PARAMETERS):
+        regimes[:, j] = _classify(name, cur[:, j], fut[:, j], diff[:, j])
+
+    steps, columns = np.nonzero(significant)
+    return pd.DataFrame({
+        "date": dates[steps + 1],
+        "previous_date": dates[steps],
+        "parameter": np.array(AFNS_PARAMETERS, dtype=object)[columns],
+        "regime": regimes[steps, columns],
+        "previous": cur[steps, columns],
+        "value": fut[steps, columns],
+        "change": diff[steps, columns],
+        "magnitude": np.abs(diff[steps, columns]) / limits[columns],
+    })
+
+
+def describe_afns_events(events):
+    """
+    Generate the narrative text for event rows from explain_afns_series.
+
+    :param events: DataFrame of events (or a slice of it, e.g. the rows on screen)
+    :return: List of natural language explanations, one per row
+    """
+    return [
+        NARRATIVES[(parameter, regime)].format(cur=float(previous), fut=float(value))
+        for parameter, regime, previous, value in zip(events["parameter"], events["regime"], events["previous"], events["value"])
+    ]
+
 
 def explain_afns_difference(current_params, future_params, thresholds=None):
     """
@@ -12,101 +139,10 @@ def explain_afns_difference(current_params, future_params, thresholds=None):
     :param thresholds: dict of thresholds for each parameter
     :return: List of natural language explanations
     """
-    if thresholds is None:
-        thresholds = {
-            "level": 0.05,
-            "slope": 0.05,
-            "curvature": 0.05,
-            "lambda": 0.05
-        }
-
-    explanations = []
-
-    def describe_change(name, cur, fut, diff, thresh):
-        cur = round(cur, 3)
-        fut = round(fut, 3)
-        diff = round(diff, 3)
-
-        # LEVEL
-        if name == "level" and abs(diff) > thresh:
-            if diff > 0:
-                return (f"The level factor increased from {cur} to {fut}, suggesting that long-term yields are expected to rise. "
-                        f"This could reflect market expectations of higher long-run inflation or stronger economic growth.")
-            else:
-                return (f"The level factor decreased from {cur} to {fut}, indicating expectations for lower long-term interest rates. "
-                        f"This may signal concerns about weaker growth or lower inflation in the future.")
-
-        # SLOPE
-        elif name == "slope" and abs(diff) > thresh:
-            if cur < 0 and fut < 0:
-                if diff > 0:
-                    return (f"The slope factor increased from {cur} to {fut}, but both values remain negative. "
-                            f"This indicates a still-inverted curve, though the inversion is expected to lessen—potentially a sign of easing recession fears.")
-                else:
-                    return (f"The slope factor decreased from {cur} to {fut}, deepening the yield curve inversion. "
-                            f"This may reinforce market expectations of an economic slowdown.")
-            elif cur < 0 < fut:
-                return (f"The slope factor shifted from negative ({cur}) to positive ({fut}), marking a transition from an inverted yield curve to a normal upward-sloping one. "
-                        f"This often signals improved economic outlooks.")
-            elif cur > 0 and fut < 0:
-                return (f"The slope factor flipped from positive ({cur}) to negative ({fut}), indicating an expected inversion of the yield curve—often viewed as a warning of recession.")
-            elif diff > 0:
-                return (f"The slope factor increased from {cur} to {fut}, steepening the yield curve. "
-                        f"This could point to expectations for stronger economic activity or rising long-term rates.")
-            else:
-                return (f"The slope factor decreased from {cur} to {fut}, flattening the curve. "
-                        f"A flatter curve may suggest market uncertainty or weakening economic momentum.")
-
-        # CURVATURE
-        elif name == "curvature" and abs(diff) > thresh:
-            if cur < 0 and fut < 0:
-                if diff > 0:
-                    return (f"The curvature factor increased from {cur} to {fut}, though both values are negative. "
-                            f"This means the mid-term yields are expected to be less depressed than before.")
-                else:
-                    return (f"The curvature factor decreased further into negative territory ({cur} to {fut}), indicating an even more pronounced dip in medium-term yields.")
-            elif cur > 0 and fut < 0:
-                return (f"The curvature factor changed from positive ({cur}) to negative ({fut}), suggesting a shift toward a concave yield curve—possibly reflecting mid-term pessimism.")
-            elif cur < 0 and fut > 0:
-                return (f"The curvature factor moved from negative ({cur}) to positive ({fut}), pointing to a shift toward more convexity—suggesting a possible mid-term rate rebound.")
-            elif diff > 0:
-                return (f"The curvature factor increased from {cur} to {fut}, indicating a more pronounced hump in the yield curve at intermediate maturities. "
-                        f"This could reflect increased uncertainty or mixed expectations across time horizons.")
-            else:
-                return (f"The curvature factor decreased from {cur} to {fut}, smoothing out the mid-term segment of the curve. "
-                        f"This suggests more consistency in market expectations across maturities.")
-
-        # LAMBDA
-        elif name == "lambda" and abs(diff) > thresh:
-            if diff > 0:
-                return (f"The lambda parameter rose from {cur} to {fut}, meaning yield curve factors decay more quickly with maturity. "
-                        f"This suggests short-term influences are expected to play a stronger role in shaping yields.")
-            else:
-                return (f"The lambda parameter fell from {cur} to {fut}, indicating slower decay of yield curve components. "
-                        f"This suggests that long-term expectations are expected to have more influence.")
-
-        return None
-
-    diffs = {
-        "level": future_params["level"] - current_params["level"],
-        "slope": future_params["slope"] - current_params["slope"],
-        "curvature": future_params["curvature"] - current_params["curvature"],
-        "lambda": future_params["lambda"] - current_params["lambda"],
-    }
-
-    for param in ["level", "slope", "curvature", "lambda"]:
-        explanation = describe_change(
-            name=param,
-            cur=current_params[param],
-            fut=future_params[param],
-            diff=diffs[param],
-            thresh=thresholds.get(param, 0.05)
-        )
-        if explanation:
-            explanations.append(explanation)
+    explanations = describe_afns_events(explain_afns_series([current_params, future_params], thresholds=thresholds))
 
     if not explanations:
-        explanations.append("There are no significant changes in the yield curve parameters between the current and forecasted periods.")
+        explanations.append(NO_CHANGE_NARRATIVE)
 
     return explanations
 
@@ -116,33 +152,56 @@ def afns_yield(maturities, x, lambda_):
     """AFNS yield curve function assuming Vasicek dynamics."""
     level, slope, curvature = x
 
-    maturities = np.array(maturities)
-    B1 = (1 - np.exp(-lambda_ * maturities)) / (lambda_ * maturities)
-    B2 = B1 - np.exp(-lambda_ * maturities)
+    maturities = np.asarray(maturities, dtype=float)
+    return afns_curves([[level, slope, curvature, lambda_]], maturities.ravel())[0].reshape(maturities.shape)
+
+def afns_loading_derivatives(maturities, lambda_):
+    """Derivatives of the B1 and B2 loadings with respect to lambda."""
+    maturities = np.asarray(maturities, dtype=float)
+    decay = np.exp(-lambda_ * maturities)
+    B1 = (1 - decay) / (lambda_ * maturities)
+    dB1 = (decay - B1) / lambda_
+    return dB1, dB1 + maturities * decay
 
-    return level + slope * B1 + curvature * B2
 
-def fit_afns(maturities, yields, lambda_init=0.5):
+def fit_afns(maturities, yields, lambda_init=0.5, initial_guess=None, analytic_jac=True):
     """
     Fit the AFNS model to observed yields.
     :param maturities: List or array of maturities (in years)
     :param yields: Observed yields corresponding to the maturities
     :param lambda_init: Initial guess for lambda (decay parameter)
-    :return: Dictionary with optimal parameters
+    :param initial_guess: [level, slope, curvature, lambda] to start from, e.g. a previous fit
+    :param analytic_jac: Use the analytic gradient of the MSE instead of finite differences
+    :return: Dictionary with optimal parameters, plus the optimizer's nit, nfev and njev counts
     """
-    maturities = np.array(maturities)
-    yields = np.array(yields)
+    from scipy.optimize import minimize
+
+    maturities = np.array(maturities, dtype=float)
+    yields = np.array(yields, dtype=float)
 
     def objective(params):
         level, slope, curvature, lambda_ = params
-        fitted = afns_yield(maturities, [level, slope, curvature], lambda_)
+        fitted = afns_design(maturities, lambda_) @ [level, slope, curvature]
         return np.mean((fitted - yields) ** 2)
 
+    def objective_and_gradient(params):
+        level, slope, curvature, lambda_ = params
+        design = afns_design(maturities, lambda_)
+        residuals = design @ [level, slope, curvature] - yields
+        dB1, dB2 = afns_loading_derivatives(maturities, lambda_)
+        # d/dtheta mean(r^2) = 2 mean(r * dr/dtheta)
+        jacobian = np.column_stack([design, slope * dB1 + curvature * dB2])
+        return np.mean(residuals ** 2), 2 * residuals @ jacobian / len(yields)
+
     # Initial guesses: level, slope, curvature, lambda
-    initial_guess = [np.mean(yields), -1.0, 1.0, lambda_init]
+    if initial_guess is None:
+        initial_guess = [np.mean(yields), -1.0, 1.0, lambda_init]
     bounds = [(-10, 10), (-10, 10), (-10, 10), (0.01, 10.0)]
 
-    result = minimize(objective, initial_guess, bounds=bounds)
+    if analytic_jac:
+        result = minimize(objective_and_gradient, initial_guess, jac=True, bounds=bounds)
+    else:
+        result = minimize(objective, initial_guess, bounds=bounds)
 
     if not result.success:
         raise RuntimeError("AFNS fitting failed: " + result.message)
@@ -153,13 +212,178 @@ def fit_afns(maturities, yields, lambda_init=0.5):
         "slope": slope,
         "curvature": curvature,
         "lambda": lambda_,
-        "fitted_yields": afns_yield(maturities, [level, slope, curvature], lambda_)
+        "fitted_yields": afns_yield(maturities, [level, slope, curvature], lambda_),
+        "nit": result.nit,
+        "nfev": result.nfev,
+        "njev": result.njev,
     }
 
-import numpy as np
-import matplotlib.pyplot as plt
+def fit_afns_sequence(maturities, yield_curves, lambda_init=0.5, analytic_jac=True, warm_start=True, reseed=True):
+    """
+    Fit the AFNS model to a sequence of yield curves, e.g. one per month.
 
-def plot_yield_curve_comparison(maturities, observed_yields, forecast_yields, current_params, forecast_params):
+    With warm_start, each fit starts from the previous curve's solution instead
+    of the default initial guess. The fit objective is multimodal in lambda, so a
+    warm start can keep following a basin that is no longer the best one; with
+    reseed, the coarse lambda grid of fit_afns_profile also proposes a start and
+    whichever start has the lower error is used.
+
+    :param maturities: List or array of maturities (in years)
+    :param yield_curves: Sequence of yield curves, one per date, each matching maturities
+    :param lambda_init: Initial guess for lambda when no other start is available
+    :param analytic_jac: Use the analytic gradient of the MSE instead of finite differences
+    :param warm_start: Start each fit from the previous solution
+    :param reseed: Also consider the best point of the profile grid as a start
+    :return: Tuple of (list of fit_afns dictionaries, each with the "start" used
+        and its "grid_evals", and totals of nit, nfev, njev and grid_evals over the
+        sequence). grid_evals counts the lambda grid points of the reseed and the
+        error evaluations used to pick the start, which nfev leaves out
+    """
+    maturities = np.asarray(maturities, dtype=float)
+    fits = []
+    previous = None
+    for yields in yield_curves:
+        yields = np.asarray(yields, dtype=float)
+        starts = {}
+        grid_evals = 0
+        if previous is not None:
+            starts["previous"] = previous
+        if reseed:
+            seed = fit_afns_profile(maturities, yields, xtol=np.inf)
+            starts["grid"] = [seed["level"], seed["slope"], seed["curvature"], seed["lambda"]]
+            grid_evals += seed["nfev"]
+        if starts:
+            grid_evals += len(starts)
+            errors = np.mean((afns_curves(list(starts.values()), maturities, store=None) - yields) ** 2, axis=1)
+            start = list(starts)[int(np.argmin(errors))]
+            initial_guess = starts[start]
+        else:
+            start, initial_guess = "default", None
+
+        try:
+            fit = fit_afns(maturities, yields, lambda_init, initial_guess=initial_guess, analytic_jac=analytic_jac)
+        except RuntimeError:
+            if initial_guess is None:
+                raise
+            start = "default"
+            fit = fit_afns(maturities, yields, lambda_init, analytic_jac=analytic_jac)
+        fit["start"] = start
+        fit["grid_evals"] = grid_evals
+        fits.append(fit)
+        if warm_start:
+            previous = [fit["level"], fit["slope"], fit["curvature"], fit["lambda"]]
+
+    totals = {key: sum(fit[key] for fit in fits) for key in ("nit", "nfev", "njev", "grid_evals")}
+    return fits, totals
+
+def afns_design(maturities, lambda_):
+    """Columns [1, B1, B2] of the AFNS loadings; an array of lambdas gives one design per lambda."""
+    lambda_ = np.asarray(lambda_, dtype=float)
+    maturities = np.asarray(maturities, dtype=float)
+    B1, B2 = compute_loadings(lambda_.ravel(), maturities)
+    shape = lambda_.shape + maturities.shape
+    return np.stack([np.ones(shape), B1.reshape(shape), B2.reshape(shape)], axis=-1)
+
+
+def _profile_sse(maturities, yields, lambdas):
+    """Least-squares [level, slope, curvature] for each lambda, and the residual sums of squares."""
+    designs = afns_design(maturities, lambdas)
+    factors = np.linalg.pinv(designs) @ yields
+    residuals = np.einsum("gnk,gk->gn", designs, factors) - yields
+    return np.einsum("gn,gn->g", residuals, residuals), factors
+
+
+def feasible_sse(sse, factors, factor_bounds):
+    """Sets the SSE of points whose factors fall outside factor_bounds to infinity."""
+    inside = ((factors >= factor_bounds[0]) & (factors <= factor_bounds[1])).all(axis=-1)
+    return np.where(inside, sse, np.inf)
+
+
+def fit_afns_profile(maturities, yields, lambda_bounds=(0.01, 10.0), grid_size=60, refine_points=17, xtol=1e-5,
+                     factor_bounds=(-10, 10)):
+    """
+    Fit the AFNS model by profiling out the factors and searching lambda alone.
+
+    For a fixed lambda the level, slope and curvature are a linear least-squares
+    problem, so only lambda needs a numerical search: a log-spaced grid over
+    lambda_bounds locates the best point, and finer grids around it narrow the
+    bracket until it is below xtol. Every step keeps the best point found, so
+    the fit never gets worse and cannot fail to converge.
+
+    Lambdas whose least-squares factors fall outside factor_bounds (the bounds
+    fit_afns uses) are skipped: at large lambda the slope and curvature loadings
+    become nearly collinear, and noisy curves can otherwise pick huge offsetting
+    factors for a negligible gain.
+
+    :param maturities: List or array of maturities (in years)
+    :param yields: Observed yields corresponding to the maturities
+    :param lambda_bounds: (lower, upper) bounds for lambda
+    :param grid_size: Number of points of the initial grid
+    :param refine_points: Number of points of each refinement grid
+    :param xtol: Width of the final bracket, in log(lambda); np.inf stops after the initial grid
+    :param factor_bounds: (lower, upper) bounds for level, slope and curvature
+    :return: Dictionary with optimal parameters and counters, shaped like fit_afns's: "nit" is the number of
+        grid passes, "nfev" the number of lambdas evaluated and "njev" 0, as no gradient is used
+    """
+    maturities = np.asarray(maturities, dtype=float)
+    yields = np.asarray(yields, dtype=float)
+    log_low, log_high = np.log(lambda_bounds[0]), np.log(lambda_bounds[1])
+
+    log_grid = np.linspace(log_low, log_high, grid_size)
+    sse, factors = _profile_sse(maturities, yields, np.exp(log_grid))
+    feasible = feasible_sse(sse, factors, factor_bounds)
+    # With no lambda inside the bounds, fall back to the unconstrained fit
+    bounded = bool(np.isfinite(feasible).any())
+    if bounded:
+        sse = feasible
+    best = int(np.argmin(sse))
+    log_lambda, best_factors = log_grid[best], factors[best]
+    step = log_grid[1] - log_grid[0]
+    nfev = grid_size
+    nit = 1
+
+    # Zoom in on the best point; the bracket shrinks by (refine_points - 1) / 2 per pass
+    while step > xtol:
+        points = np.clip(log_lambda + step * np.linspace(-1, 1, refine_points), log_low, log_high)
+        sse, factors = _profile_sse(maturities, yields, np.exp(points))
+        if bounded:
+            sse = feasible_sse(sse, factors, factor_bounds)
+        best = int(np.argmin(sse))
+        log_lambda, best_factors = points[best], factors[best]
+        step = 2 * step / (refine_points - 1)
+        nfev += refine_points
+        nit += 1
+
+    level, slope, curvature = best_factors
+    lambda_ = float(np.exp(log_lambda))
+    return {
+        "level": level,
+        "slope": slope,
+        "curvature": curvature,
+        "lambda": lambda_,
+        "fitted_yields": afns_yield(maturities, [level, slope, curvature], lambda_),
+        "nit": nit,
+        "nfev": nfev,
+        "njev": 0,
+    }
+
+
+# Rendered comparison figures kept in memory, keyed by their inputs
+RENDER_CACHE_SIZE = 64
+
+
+def draw_yield_curve_comparison(fig, maturities, observed_yields, forecast_yields, current_params, forecast_params):
+    """
+    Draws the current, forecast and comparison panels onto a matplotlib Figure.
+
+    :param fig: Figure to draw on (pyplot or a headless matplotlib.figure.Figure)
+    :param maturities: Maturities of the observed and forecast yields (in years)
+    :param observed_yields: Observed yields
+    :param forecast_yields: Forecast yields
+    :param current_params: dict from fit_afns for the present curve
+    :param forecast_params: dict from fit_afns for the forecasted curve
+    :return: The figure's three axes
+    """
     # Configurable colors
     observed_color = "navy"
     forecast_color = "darkgreen"
@@ -170,70 +394,112 @@ def plot_yield_curve_comparison(maturities, observed_yields, forecast_yields, cu
     # Interpolation grid
     x_vals = np.linspace(min(maturities), max(maturities), 300)
 
-    # AFNS formula
-    def afns_yields(params, taus):
-        level = params["level"]
-        slope = params["slope"]
-        curvature = params["curvature"]
-        lambd = params["lambda"]
-        taus = np.array(taus)
-        term1 = (1 - np.exp(-lambd * taus)) / (lambd * taus)
-        term2 = term1 - np.exp(-lambd * taus)
-        return level + slope * term1 + curvature * term2
+    # Both fitted curves on the dense grid in one call
+    fitted_observed, fitted_forecast = afns_curves([current_params, forecast_params], x_vals)
 
-    fitted_observed = afns_yields(current_params, x_vals)
-    fitted_forecast = afns_yields(forecast_params, x_vals)
+    current_ax, forecast_ax, comparison_ax = fig.subplots(1, 3)
 
     # Plot 1: Observed vs Fitted (Current)
-    plt.figure(figsize=(14, 4))
-    plt.subplot(1, 3, 1)
-    plt.plot(x_vals, fitted_observed, label="Fitted (current)", color=observed_color, linestyle=fitted_line_style)
-    plt.scatter(maturities, observed_yields, label="Observed Yields", color=observed_color, zorder=5)
-    plt.title("Current Yield Curve")
-    plt.xlabel("Maturity (Years)")
-    plt.ylabel("Yield (%)")
-    plt.legend()
-    plt.grid(True)
+    current_ax.plot(x_vals, fitted_observed, label="Fitted (current)", color=observed_color, linestyle=fitted_line_style)
+    current_ax.scatter(maturities, observed_yields, label="Observed Yields", color=observed_color, zorder=5)
+    current_ax.set_title("Current Yield Curve")
+    current_ax.set_xlabel("Maturity (Years)")
+    current_ax.set_ylabel("Yield (%)")
+    current_ax.legend()
+    current_ax.grid(True)
 
     # Plot 2: Forecast vs Fitted (Forecast)
-    plt.subplot(1, 3, 2)
-    plt.plot(x_vals, fitted_forecast, label="Fitted (forecast)", color=forecast_color, linestyle=fitted_line_style)
-    plt.scatter(maturities, forecast_yields, label="Forecast Yields", color=forecast_color, zorder=5)
-    plt.title("Forecasted Yield Curve")
-    plt.xlabel("Maturity (Years)")
-    plt.legend()
-    plt.grid(True)
+    forecast_ax.plot(x_vals, fitted_forecast, label="Fitted (forecast)", color=forecast_color, linestyle=fitted_line_style)
+    forecast_ax.scatter(maturities, forecast_yields, label="Forecast Yields", color=forecast_color, zorder=5)
+    forecast_ax.set_title("Forecasted Yield Curve")
+    forecast_ax.set_xlabel("Maturity (Years)")
+    forecast_ax.legend()
+    forecast_ax.grid(True)
 
     # Plot 3: Fitted Comparison with Color Highlight
-    plt.subplot(1, 3, 3)
-    plt.plot(x_vals, fitted_observed, label="Current (Fitted)", color=observed_color)
-    plt.plot(x_vals, fitted_forecast, label="Forecast (Fitted)", color=forecast_color)
-
-    # Highlight which curve is higher
-    for i in range(len(x_vals) - 1):
-        x_segment = x_vals[i:i+2]
-        y1_segment = fitted_observed[i:i+2]
-        y2_segment = fitted_forecast[i:i+2]
-        if np.mean(y1_segment) > np.mean(y2_segment):
-            plt.fill_between(x_segment, y1_segment, y2_segment, color=higher_current_color, alpha=0.2)
-        else:
-            plt.fill_between(x_segment, y1_segment, y2_segment, color=higher_forecast_color, alpha=0.2)
+    comparison_ax.plot(x_vals, fitted_observed, label="Current (Fitted)", color=observed_color)
+    comparison_ax.plot(x_vals, fitted_forecast, label="Forecast (Fitted)", color=forecast_color)
 
-    plt.title("Fitted Curve Comparison")
-    plt.xlabel("Maturity (Years)")
-    plt.grid(True)
-    plt.legend()
+    # Highlight which curve is higher: one masked fill per colour, split exactly at the crossings
+    current_higher = fitted_observed > fitted_forecast
+    comparison_ax.fill_between(x_vals, fitted_observed, fitted_forecast, where=current_higher,
+                               interpolate=True, color=higher_current_color, alpha=0.2)
+    comparison_ax.fill_between(x_vals, fitted_observed, fitted_forecast, where=~current_higher,
+                               interpolate=True, color=higher_forecast_color, alpha=0.2)
 
-    plt.tight_layout()
+    comparison_ax.set_title("Fitted Curve Comparison")
+    comparison_ax.set_xlabel("Maturity (Years)")
+    comparison_ax.grid(True)
+    comparison_ax.legend()
+    return current_ax, forecast_ax, comparison_ax
+
+
+def plot_yield_curve_comparison(maturities, observed_yields, forecast_yields, current_params, forecast_params):
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(14, 4))
+    draw_yield_curve_comparison(fig, maturities, observed_yields, forecast_yields, current_params, forecast_params)
+    fig.tight_layout()
     plt.show()
 
+
+def _params_key(params):
+    return tuple(float(params[name]) for name in ("level", "slope", "curvature", "lambda"))
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_cached(maturities, observed_yields, forecast_yields, current_key, forecast_key, fmt, dpi):
+    from matplotlib.figure import Figure
+
+    names = ("level", "slope", "curvature", "lambda")
+    # A bare Figure renders through the Agg/SVG canvases without pyplot or a GUI backend
+    fig = Figure(figsize=(14, 4), dpi=dpi)
+    draw_yield_curve_comparison(
+        fig, list(maturities), list(observed_yields), list(forecast_yields),
+        dict(zip(names, current_key)), dict(zip(names, forecast_key)),
+    )
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def render_yield_curve_comparison(maturities, observed_yields, forecast_yields, current_params, forecast_params,
+                                  fmt="png", dpi=100):
+    """
+    Renders the yield curve comparison headlessly and returns the image bytes.
+
+    Results are cached by their inputs, so a Streamlit rerun with the same
+    curves and fits returns the stored image instead of drawing it again.
+
+    :param maturities: Maturities of the observed and forecast yields (in years)
+    :param observed_yields: Observed yields
+    :param forecast_yields: Forecast yields
+    :param current_params: dict from fit_afns for the present curve
+    :param forecast_params: dict from fit_afns for the forecasted curve
+    :param fmt: "png" or "svg"
+    :param dpi: Resolution of PNG output
+    :return: The encoded image, e.g. for st.image (PNG) or an HTML embed (SVG)
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"Unsupported image format: {fmt}")
+    return _render_cached(
+        tuple(map(float, maturities)),
+        tuple(map(float, observed_yields)),
+        tuple(map(float, forecast_yields)),
+        _params_key(current_params),
+        _params_key(forecast_params),
+        fmt,
+        dpi,
+    )
+
 if __name__ == "__main__":
     maturities = [1, 2, 3, 5, 10, 20, 30]  # in years
     observed_yields = [4.9, 4.8, 4.7, 4.5, 4.2, 4.1, 4.0]  # example yield curve
     forecast_yields = [4.8, 4.7, 4.6, 4.6, 4.4, 4.3, 4.2]  # example yield curve
 
-    current_params = fit_afns(maturities, observed_yields)
-    forecast_params = fit_afns(maturities, forecast_yields)
+    current_params = fit_afns_profile(maturities, observed_yields)
+    forecast_params = fit_afns_profile(maturities, forecast_yields)
 
     plot_yield_curve_comparison(maturities, observed_yields, forecast_yields, current_params, forecast_params)
 
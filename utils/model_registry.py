@@ -0,0 +1,253 @@
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+from utils.model_artifact import artifact_paths, load_artifact
+from utils.model_bundle import DEFAULT_BUNDLE_PATH, ModelBundle
+
+# Default memory budget for cached models (1 GiB)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class ModelRegistry:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, prefer_artifacts=True, bundle_path=DEFAULT_BUNDLE_PATH):
+        """
+        Thread-safe, process-wide cache of loaded forecasting models with LRU eviction.
+
+        Models are keyed by absolute path plus the file's mtime and size, so a
+        replaced model file is picked up on the next lookup. The size of the file
+        on disk is used as the memory weight of each entry.
+
+        Parameters:
+        max_bytes (int): Memory budget for all cached models, in bytes.
+        prefer_artifacts (bool): Load the compact .npz artifact written by
+            utils.model_artifact instead of a .pkl when one exists next to it.
+        bundle_path (str): Catalog bundle written by utils.model_bundle. Models it
+            holds are served from its memory mapping without touching their files.
+        """
+        self.max_bytes = max_bytes
+        self.prefer_artifacts = prefer_artifacts
+        self.bundle_path = bundle_path
+        self._bundle = None
+        self._bundle_key = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.RLock()
+        self._key_locks = {}
+
+    def _make_key(self, model_path):
+        """
+        Builds the cache key (absolute path, mtime, size) for a model file.
+        """
+        path = os.path.abspath(model_path)
+        if self.prefer_artifacts and path.endswith(".pkl"):
+            npz_path = artifact_paths(path)[0]
+            if os.path.exists(npz_path):
+                path = npz_path
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _load(path):
+        """
+        Loads a model file from disk.
+        """
+        if path.endswith((".npz", ".json")):
+            return load_artifact(path)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def bundle(self):
+        """
+        Returns the memory-mapped catalog bundle, reopening it if the file was rebuilt.
+
+        Returns:
+        ModelBundle: The bundle, or None if no bundle file exists.
+        """
+        if self.bundle_path is None:
+            return None
+        try:
+            stat = os.stat(self.bundle_path)
+        except OSError:
+            self._bundle = self._bundle_key = None
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._bundle_key != key:
+                self._bundle = ModelBundle(self.bundle_path)
+                self._bundle_key = key
+            return self._bundle
+
+    def identity(self, model_path):
+        """
+        Returns a tuple that changes whenever the model served for model_path changes.
+
+        Parameters:
+        model_path (str): Path to the model file.
+
+        Returns:
+        tuple: Bundle path, mtime, size and model name for bundled models;
+        otherwise the (path, mtime, size) cache key of the file.
+        """
+        bundle = self.bundle()
+        if bundle is not None and bundle.find(model_path) is not None:
+            return (self.bundle_path,) + self._bundle_key + (os.path.basename(model_path),)
+        return self._make_key(model_path)
+
+    def exists(self, model_path):
+        """
+        Returns True if the model can be served from the bundle or from disk.
+        """
+        bundle = self.bundle()
+        if bundle is not None and bundle.find(model_path) is not None:
+            return True
+        return os.path.exists(model_path)
+
+    def get(self, model_path):
+        """
+        Returns the model stored at model_path, loading it on a cache miss.
+
+        Parameters:
+        model_path (str): Path to the model file.
+
+        Returns:
+        object: The loaded model.
+        """
+        bundle = self.bundle()
+        if bundle is not None:
+            model = bundle.find(model_path)
+            if model is not None:
+                with self._lock:
+                    self.hits += 1
+                return model
+
+        key = self._make_key(model_path)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models stay available;
+        # the per-key lock ensures a file is only unpickled once.
+        with key_lock:
+            try:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return self._entries[key][0]
+                    self.misses += 1
+
+                model = self._load(key[0])
+
+                with self._lock:
+                    self._store(key, model)
+            finally:
+                # Also dropped when the load fails, so failed paths do not pile up
+                with self._lock:
+                    self._key_locks.pop(key, None)
+        return model
+
+    def _store(self, key, model):
+        """
+        Inserts a loaded model, dropping stale versions of the same file and
+        evicting least recently used entries to stay within the budget.
+        """
+        path, _, nbytes = key
+        for stale in [k for k in self._entries if k[0] == path]:
+            self._remove(stale)
+        if nbytes > self.max_bytes:
+            return
+        self._entries[key] = (model, nbytes)
+        self._current_bytes += nbytes
+        self._shrink()
+
+    def _remove(self, key):
+        _, nbytes = self._entries.pop(key)
+        self._current_bytes -= nbytes
+
+    def _shrink(self):
+        while self._entries and self._current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def preload(self, model_paths):
+        """
+        Loads the given model files into the registry ahead of time.
+
+        Parameters:
+        model_paths (list): Paths to the model files. Models neither on disk nor in the bundle are skipped.
+
+        Returns:
+        list: The paths that were loaded or already cached.
+        """
+        loaded = []
+        for model_path in model_paths:
+            if not self.exists(model_path):
+                continue
+            self.get(model_path)
+            loaded.append(model_path)
+        return loaded
+
+    def evict(self, model_path):
+        """
+        Removes every cached version of a model file.
+
+        Parameters:
+        model_path (str): Path to the model file.
+
+        Returns:
+        bool: True if an entry was removed.
+        """
+        paths = {os.path.abspath(model_path), artifact_paths(os.path.abspath(model_path))[0]}
+        with self._lock:
+            keys = [k for k in self._entries if k[0] in paths]
+            for key in keys:
+                self._remove(key)
+            self.evictions += len(keys)
+        return bool(keys)
+
+    def resize(self, max_bytes):
+        """
+        Changes the memory budget, evicting entries if the cache is now too large.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def clear(self):
+        """
+        Empties the registry and resets its counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns the registry counters and current memory usage.
+
+        Returns:
+        dict: hits, misses, evictions, entries, bytes and max_bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Shared by every Streamlit session served from this process
+model_registry = ModelRegistry()
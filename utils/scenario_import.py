@@ -0,0 +1,370 @@
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from utils.all_tariffs import all_tariffs
+from utils.non_tariff_columns import non_tariff_columns
+
+# Columns identifying a row of a scenario file; every other column is an exog path
+SCENARIO_COLUMN = "scenario"
+DATE_COLUMN = "date"
+
+# Rows read and validated at a time
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Partial monthly aggregates kept before they are merged, bounding memory on long files
+_MERGE_EVERY = 16
+
+# Validation problems listed in one error message
+_MAX_REPORTED = 10
+
+# Scenarios read from a file, aggregated to months: exog is (scenario x month x column)
+ScenarioBatch = namedtuple("ScenarioBatch", ["scenarios", "index", "columns", "exog"])
+
+
+def file_format_for(path):
+    """
+    Returns "csv" or "parquet" from a file name (".csv", ".csv.gz", ".parquet", ".pq").
+    """
+    name = path.lower()
+    if name.endswith((".parquet", ".pq")):
+        return "parquet"
+    if name.endswith((".csv", ".csv.gz", ".csv.bz2", ".csv.zip", ".txt")):
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {path}; pass file_format='csv' or 'parquet'.")
+
+
+def read_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS, file_format=None):
+    """
+    Yields a scenario file as DataFrames of at most chunk_rows rows.
+
+    Parquet files are read batch by batch with pyarrow, which is only imported
+    for them.
+
+    Parameters:
+    path (str): CSV or Parquet file.
+    chunk_rows (int): Rows per chunk.
+    file_format (str): "csv" or "parquet"; taken from the file name when omitted.
+    """
+    file_format = file_format or file_format_for(path)
+    if file_format == "csv":
+        with pd.read_csv(path, chunksize=chunk_rows, dtype={SCENARIO_COLUMN: str}) as reader:
+            yield from reader
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet scenarios requires pyarrow (pip install pyarrow).") from None
+        parquet = pq.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unknown scenario file format: {file_format}")
+
+
+def check_header(columns):
+    """
+    Checks the columns of a scenario file.
+
+    The file needs a scenario and a date column and any of the non-tariff
+    columns and start_tariff_* flags. Tariffs left out are treated as never
+    active; the _lag_effect and _future_effect columns are derived, not read.
+
+    Returns:
+    list: The exog columns present, non-tariff columns first, in schema order.
+
+    Raises:
+    ValueError: If an identifying column is missing or a column is not in the schema.
+    """
+    columns = list(columns)
+    missing = [col for col in (SCENARIO_COLUMN, DATE_COLUMN) if col not in columns]
+    known = set(non_tariff_columns) | set(all_tariffs) | {SCENARIO_COLUMN, DATE_COLUMN}
+    unexpected = [col for col in columns if col not in known]
+    duplicated = sorted({col for col in columns if columns.count(col) > 1})
+    if missing or unexpected or duplicated:
+        raise ValueError(
+            f"Scenario file columns do not match the schema "
+            f"(missing: {missing}, unexpected: {unexpected}, duplicated: {duplicated})."
+        )
+    return [col for col in non_tariff_columns + all_tariffs if col in columns]
+
+
+def _describe_rows(rows, first_row):
+    rows = [int(row) + first_row for row in rows[:_MAX_REPORTED]]
+    return ", ".join(map(str, rows))
+
+
+def coerce_chunk(chunk, exog_columns, first_row=1):
+    """
+    Validates one chunk and converts it to typed columns.
+
+    Non-tariff values become float64 (empty cells stay NaN and are skipped by
+    the monthly mean); tariff flags must be 0 or 1 and become int8, with empty
+    cells read as 0.
+
+    Parameters:
+    chunk (pd.DataFrame): Rows as read from the file.
+    exog_columns (list): Exog columns of the file, from check_header.
+    first_row (int): Data row number of the chunk's first row, for error messages.
+
+    Returns:
+    pd.DataFrame: scenario (str), month (months since 1970-01) and the exog columns.
+
+    Raises:
+    ValueError: Naming the column and data rows that cannot be read.
+    """
+    problems = []
+    scenarios = chunk[SCENARIO_COLUMN]
+    bad = np.flatnonzero(scenarios.isna().to_numpy())
+    if len(bad):
+        problems.append(f"{SCENARIO_COLUMN} is empty in rows {_describe_rows(bad, first_row)}")
+    dates = pd.to_datetime(chunk[DATE_COLUMN], errors="coerce", format="mixed")
+    bad = np.flatnonzero(dates.isna().to_numpy())
+    if len(bad):
+        problems.append(f"{DATE_COLUMN} is not a date in rows {_describe_rows(bad, first_row)}")
+
+    data = {
+        SCENARIO_COLUMN: scenarios.astype(str).to_numpy(),
+        "month": dates.to_numpy().astype("datetime64[M]").astype(np.int64),
+    }
+    for column in exog_columns:
+        raw = chunk[column]
+        values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=np.float64)
+        unreadable = np.isnan(values) & raw.notna().to_numpy()
+        if column in all_tariffs:
+            values = np.nan_to_num(values, nan=0.0)
+            unreadable |= (values != 0) & (values != 1)
+            values = values.astype(np.int8)
+        bad = np.flatnonzero(unreadable)
+        if len(bad):
+            expected = "0 or 1" if column in all_tariffs else "a number"
+            problems.append(f"{column} is not {expected} in rows {_describe_rows(bad, first_row)}")
+        data[column] = values
+
+    if problems:
+        raise ValueError("Invalid scenario rows: " + "; ".join(problems) + ".")
+    return pd.DataFrame(data)
+
+
+def _monthly_partial(frame, exog_columns):
+    """
+    Reduces typed rows to per (scenario, month) sums and counts of the non-tariff
+    columns and the largest flag of each tariff.
+    """
+    values = [col for col in exog_columns if col not in all_tariffs]
+    tariffs = [col for col in exog_columns if col in all_tariffs]
+    grouped = frame.groupby([SCENARIO_COLUMN, "month"], sort=False)
+    parts = [grouped[values].sum().add_suffix(":sum"), grouped[values].count().add_suffix(":count")]
+    if tariffs:
+        parts.append(grouped[tariffs].max())
+    return pd.concat(parts, axis=1)
+
+
+def _month(ordinal):
+    return pd.Period(np.datetime64(int(ordinal), "M"), freq="M")
+
+
+def _merge_partials(partials):
+    """
+    Merges partial aggregates whose (scenario, month) groups may span chunks.
+    """
+    combined = pd.concat(partials)
+    if not combined.index.has_duplicates:
+        return combined
+    grouped = combined.groupby(level=[0, 1], sort=False)
+    agg = {col: "max" if col in all_tariffs else "sum" for col in combined.columns}
+    return grouped.agg(agg)
+
+
+def load_scenarios(path, chunk_rows=DEFAULT_CHUNK_ROWS, file_format=None):
+    """
+    Reads a file of exog scenarios chunk by chunk and aggregates it to months.
+
+    The file is in long form: one row per scenario and day (or month), with the
+    scenario label, the date and the exog values. Only one chunk of rows and
+    the monthly aggregates are held in memory. Monthly values follow the
+    pages: non-tariff columns are the mean of their days, and a tariff is
+    active in a month if it is active on any of its days. Monthly files work
+    the same way, with one row per month. The tariffs' lag and future effects
+    are then derived month by month within each scenario.
+
+    Parameters:
+    path (str): CSV or Parquet file.
+    chunk_rows (int): Rows read and validated at a time.
+    file_format (str): "csv" or "parquet"; taken from the file name when omitted.
+
+    Returns:
+    ScenarioBatch: Scenario labels in file order, the monthly PeriodIndex, the
+    model exog columns (tariffs, non-tariff columns, lag and future effects) and
+    a (scenario x month x column) float64 array.
+
+    Raises:
+    ValueError: If the file does not match the schema, has unreadable values, or
+    its scenarios do not all cover the same months with every value present.
+    """
+    exog_columns = None
+    partials = []
+    problems = []
+    first_row = 1
+    for chunk in read_chunks(path, chunk_rows=chunk_rows, file_format=file_format):
+        if exog_columns is None:
+            exog_columns = check_header(chunk.columns)
+        try:
+            frame = coerce_chunk(chunk, exog_columns, first_row=first_row)
+        except ValueError as e:
+            # Keep validating the rest of the file so every bad chunk is reported at once
+            problems.append(str(e))
+        first_row += len(chunk)
+        if problems:
+            continue
+        partials.append(_monthly_partial(frame, exog_columns))
+        if len(partials) >= _MERGE_EVERY:
+            partials = [_merge_partials(partials)]
+    if problems:
+        raise ValueError(" ".join(problems[:_MAX_REPORTED]))
+    if exog_columns is None or not partials:
+        raise ValueError(f"{path} has no scenario rows.")
+    monthly = _merge_partials(partials)
+    labels = monthly.index.get_level_values(0)
+    ordinals = monthly.index.get_level_values(1).to_numpy()
+
+    # Monthly means of the non-tariff columns; a month with no value is an error
+    values = [col for col in exog_columns if col not in all_tariffs]
+    counts = monthly[[f"{col}:count" for col in values]].to_numpy()
+    if (counts == 0).any():
+        rows, cols = np.nonzero(counts == 0)
+        examples = ", ".join(
+            f"{labels[row]} {_month(ordinals[row])} {values[col]}" for row, col in zip(rows[:_MAX_REPORTED], cols)
+        )
+        raise ValueError(f"Scenario months without a value: {examples}.")
+    means = monthly[[f"{col}:sum" for col in values]].to_numpy() / counts
+
+    scenarios = list(pd.unique(labels))
+    month_ordinals, month_pos = np.unique(ordinals, return_inverse=True)
+    months = pd.PeriodIndex([_month(ordinal) for ordinal in month_ordinals], freq="M")
+    scenario_pos = pd.Index(scenarios).get_indexer(labels)
+    covered = np.bincount(scenario_pos, minlength=len(scenarios))
+    if (covered != len(months)).any():
+        short = [str(scenarios[i]) for i in np.flatnonzero(covered != len(months))[:_MAX_REPORTED]]
+        raise ValueError(
+            f"Every scenario must cover the same {len(months)} months ({months[0]} to {months[-1]}); "
+            f"these do not: {', '.join(short)}."
+        )
+
+    flags = np.zeros((len(scenarios), len(months), len(all_tariffs)))
+    for j, tariff in enumerate(all_tariffs):
+        if tariff in monthly.columns:
+            flags[scenario_pos, month_pos, j] = monthly[tariff].to_numpy()
+    lagged = np.zeros_like(flags)
+    lagged[:, 1:] = flags[:, :-1]
+    leading = np.zeros_like(flags)
+    leading[:, :-1] = flags[:, 1:]
+    levels = np.zeros((len(scenarios), len(months), len(values)))
+    levels[scenario_pos, month_pos] = means
+
+    columns = (
+        list(all_tariffs) + values
+        + [f"{tariff}_lag_effect" for tariff in all_tariffs]
+        + [f"{tariff}_future_effect" for tariff in all_tariffs]
+    )
+    exog = np.concatenate([flags, levels, lagged, leading], axis=2)
+    return ScenarioBatch(scenarios, months, columns, exog)
+
+
+def forecast_scenarios(batch, model_type=None, alpha=0.2):
+    """
+    Forecasts every maturity for an imported batch of scenarios.
+
+    Parameters:
+    batch (ScenarioBatch): Scenarios from load_scenarios.
+    model_type (str): Model type suffix; determined from the columns when omitted.
+    alpha (float): Significance level of the prediction intervals.
+
+    Returns:
+    ScenarioForecast: mean, lower and upper arrays shaped (scenario x maturity x month).
+    """
+    from utils.unpickling import YieldForecastCalculator
+
+    return YieldForecastCalculator.forecast_many(
+        batch.exog, exog_columns=batch.columns, model_type=model_type, index=batch.index, alpha=alpha,
+        labels=batch.scenarios,
+    )
+
+
+def synthetic_scenarios(path, n_scenarios=100, months=24, daily=True, start="2026-01-01", seed=0):
+    """
+    Writes random scenarios with every schema column, for trying out an import.
+
+    Parameters:
+    path (str): Output file; ".parquet" or ".pq" writes Parquet, anything else CSV.
+    n_scenarios (int): Number of scenarios.
+    months (int): Months each scenario covers.
+    daily (bool): One row per business day instead of one per month.
+    start: First day of the scenarios.
+    seed (int): Seed for the random generator.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(start) + pd.DateOffset(months=months) - pd.Timedelta(days=1)
+    dates = pd.bdate_range(start, end) if daily else pd.date_range(start, periods=months, freq="MS")
+    frames = []
+    for scenario in range(n_scenarios):
+        frame = pd.DataFrame({SCENARIO_COLUMN: f"s{scenario}", DATE_COLUMN: dates.strftime("%Y-%m-%d")})
+        for column in non_tariff_columns:
+            frame[column] = np.round(rng.normal(size=len(dates)), 6)
+        for column in all_tariffs:
+            frame[column] = (rng.random(len(dates)) < 0.02).astype(np.int8)
+        frames.append(frame)
+    frame = pd.concat(frames, ignore_index=True)
+    if file_format_for(path) == "parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.scenario_import scenarios.csv [--output forecasts.csv] [--check]
+    parser = argparse.ArgumentParser(description="Import exog scenarios from a CSV or Parquet file and forecast them.")
+    parser.add_argument("path", help="Scenario file with scenario, date and exog columns.")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="File format (default: from the file name).")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Rows read at a time.")
+    parser.add_argument("--model-type", help="Model type suffix (default: from the columns).")
+    parser.add_argument("--alpha", type=float, default=0.2, help="Significance level of the intervals.")
+    parser.add_argument("--output", help="Write the forecasts (one row per scenario, maturity and month) here.")
+    parser.add_argument("--check", action="store_true", help="Only validate and aggregate the file.")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="First write N random daily scenarios to path.")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        synthetic_scenarios(args.path, n_scenarios=args.synthetic)
+    began = time.perf_counter()
+    try:
+        batch = load_scenarios(args.path, chunk_rows=args.chunk_rows, file_format=args.format)
+    except ValueError as e:
+        sys.exit(f"{args.path}: {e}")
+    n_scenarios, n_months, n_columns = batch.exog.shape
+    print(
+        f"{args.path}: {n_scenarios} scenarios x {n_months} months ({batch.index[0]} to {batch.index[-1]}), "
+        f"{n_columns} exog columns, read in {time.perf_counter() - began:.2f} s"
+    )
+    if args.check:
+        sys.exit(0)
+
+    began = time.perf_counter()
+    try:
+        forecast = forecast_scenarios(batch, model_type=args.model_type, alpha=args.alpha)
+    except (KeyError, ValueError) as e:
+        sys.exit(f"Cannot forecast {args.path}: {e}")
+    print(f"Forecast {n_scenarios} scenarios x {len(forecast.maturities)} maturities in {time.perf_counter() - began:.2f} s")
+    if args.output:
+        frame = forecast.to_frame()
+        frame["date"] = frame["date"].astype(str)
+        if os.path.splitext(args.output)[1].lower() in (".parquet", ".pq"):
+            frame.to_parquet(args.output, index=False)
+        else:
+            frame.to_csv(args.output, index=False)
+        print(f"Wrote {len(frame)} rows to {args.output}")
@@ -0,0 +1,257 @@
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.historical_store import widen
+
+# Session state key holding each session's SessionData
+SESSION_KEY = "session_data"
+
+
+class SharedBase:
+    def __init__(self, days, columns):
+        """
+        Historical data of one business-day window, shared read-only by every session.
+
+        Columns keep the cache's narrow types (float32 values, int8 flags);
+        SessionData widens them only in the frames it hands out.
+
+        Parameters:
+        days (np.ndarray): Sorted datetime64[D] business days.
+        columns (dict): Column name -> array with one value per day.
+        """
+        self.days = np.array(days, dtype="datetime64[D]")
+        self.days.flags.writeable = False
+        self.columns = {}
+        for name, values in columns.items():
+            values = np.array(values)
+            values.flags.writeable = False
+            self.columns[name] = values
+
+    def nbytes(self):
+        """
+        Returns the size of the shared arrays in bytes.
+        """
+        return self.days.nbytes + sum(values.nbytes for values in self.columns.values())
+
+
+_bases = {}
+_bases_lock = threading.Lock()
+
+
+def get_shared_base(calendar, store=None):
+    """
+    Returns the process-wide base of a business-day window, building it on first use.
+
+    Parameters:
+    calendar (BusinessCalendar): The window's business days.
+    store (HistoricalStore): Historical data joined onto the days, or None for dates only.
+
+    Returns:
+    SharedBase: The shared base. A new one replaces it when the store's cache changes.
+    """
+    window = (calendar.start, calendar.end)
+    version = None if store is None else store.path
+    with _bases_lock:
+        cached = _bases.get(window)
+        if cached is None or cached[0] != version:
+            if store is None:
+                base = SharedBase(calendar.days, {})
+            else:
+                base = SharedBase(calendar.days, calendar.join_columns(store))
+            cached = (version, base)
+            _bases[window] = cached
+        return cached[1]
+
+
+class SessionData:
+    def __init__(self, base, start=None, end=None):
+        """
+        One session's view of the shared base: the selected date range plus a
+        sparse overlay of the session's own edits.
+
+        The base is never copied. The overlay holds only what the pages change:
+        the selected columns, value segments written from user input, tariff
+        flags picked on the calendar and the raw anchor values entered. Frames
+        are materialized on request from the base and the overlay.
+
+        Parameters:
+        base (SharedBase): Shared historical data.
+        start, end: Inclusive bounds of the selected days; defaults to the whole base.
+        """
+        self.base = base
+        self.lo = 0 if start is None else int(np.searchsorted(base.days, np.datetime64(pd.Timestamp(start), "D"), "left"))
+        self.hi = len(base.days) if end is None else int(np.searchsorted(base.days, np.datetime64(pd.Timestamp(end), "D"), "right"))
+        self.hi = max(self.lo, self.hi)
+        self.columns = list(base.columns)
+        self.values = {}
+        self.flags = {}
+        self.anchors = {}
+
+    @property
+    def days(self):
+        """
+        Returns the selected business days as a read-only datetime64[D] view.
+        """
+        return self.base.days[self.lo:self.hi]
+
+    def __len__(self):
+        return self.hi - self.lo
+
+    def _offset(self, start):
+        """
+        Returns the position within the selection of the first day on or after start.
+        """
+        if start is None:
+            return 0
+        return int(np.searchsorted(self.days, np.datetime64(pd.Timestamp(start), "D"), "left"))
+
+    def select_columns(self, columns):
+        """
+        Sets the columns (and their order) that frames include.
+        """
+        self.columns = list(columns)
+
+    def set_values(self, column, values, start=None):
+        """
+        Overwrites a column from start to the end of the selection.
+
+        Parameters:
+        column (str): Column name; it is added to the selected columns if missing.
+        values (array-like): One value per selected day from start on.
+        start: First day written; defaults to the first selected day.
+        """
+        offset = self._offset(start)
+        values = np.array(values, dtype=np.float64)
+        if len(values) != len(self) - offset:
+            raise ValueError(f"Expected {len(self) - offset} values for {column}, got {len(values)}.")
+        self.values[column] = (offset, values)
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def set_anchors(self, variable, anchors):
+        """
+        Records the anchor values (date -> level) a user entered for a variable.
+        """
+        self.anchors[variable] = {pd.Timestamp(day): float(level) for day, level in anchors.items()}
+
+    def flag(self, column, days):
+        """
+        Sets a tariff flag to 1 on the given days.
+
+        Parameters:
+        column (str): Tariff column; it is added to the selected columns if missing.
+        days (iterable): Days to flag; days outside the selection are ignored.
+
+        Returns:
+        list: The days whose flag changed.
+        """
+        if column not in self.columns:
+            self.columns.append(column)
+        current = self.column(column)
+        flagged = self.flags.setdefault(column, set())
+        changed = []
+        for day in days:
+            position = self._offset(day)
+            if position < len(self) and self.days[position] == np.datetime64(pd.Timestamp(day), "D"):
+                if current[position] != 1 and position not in flagged:
+                    flagged.add(position)
+                    changed.append(day)
+        return changed
+
+    def column(self, column):
+        """
+        Returns one column over the selected days, with the overlay applied.
+
+        Untouched base columns are returned as read-only views without copying,
+        in the base's narrow types.
+        """
+        base = self.base.columns.get(column)
+        if base is None:
+            values = np.full(len(self), np.nan) if column not in self.flags else np.zeros(len(self), dtype=np.int8)
+        else:
+            values = base[self.lo:self.hi]
+        if column in self.values:
+            offset, written = self.values[column]
+            values = np.array(values, dtype=np.float64)
+            values[offset:] = written
+        if self.flags.get(column):
+            values = np.array(values)
+            values[sorted(self.flags[column])] = 1
+        return values
+
+    def frame(self, columns=None, date_column="Business Day"):
+        """
+        Materializes the selected days as a DataFrame.
+
+        Parameters:
+        columns (list): Columns to include; defaults to the selected columns.
+        date_column (str): Name of the date column.
+
+        Returns:
+        pd.DataFrame: A new frame the caller may modify, with float64 and int64
+        columns so float64 values can be written into it.
+        """
+        data = {date_column: self.days.astype("datetime64[ns]")}
+        for column in self.columns if columns is None else columns:
+            data[column] = widen(self.column(column))
+        return pd.DataFrame(data)
+
+    def memory_report(self):
+        """
+        Returns the bytes held by this session's overlay and by the shared base.
+
+        Flag and anchor bytes count the containers and the positions, Timestamps
+        and floats they hold.
+        """
+        value_bytes = sum(values.nbytes for _, values in self.values.values())
+        flag_bytes = sum(
+            sys.getsizeof(positions) + sum(sys.getsizeof(position) for position in positions)
+            for positions in self.flags.values()
+        )
+        anchor_bytes = sum(
+            sys.getsizeof(anchors) + sum(sys.getsizeof(day) + sys.getsizeof(level) for day, level in anchors.items())
+            for anchors in self.anchors.values()
+        )
+        base_bytes = self.base.nbytes()
+        # frame() hands out float64/int64 columns, 8 bytes per value
+        selected = self.days.nbytes + len(self) * 8 * len(self.columns)
+        return {
+            "overlay_bytes": value_bytes + flag_bytes + anchor_bytes,
+            "value_bytes": value_bytes,
+            "flag_bytes": flag_bytes,
+            "anchor_bytes": anchor_bytes,
+            "shared_base_bytes": base_bytes,
+            "full_copy_bytes": selected,
+        }
+
+
+def start_session(session, base, start=None, end=None):
+    """
+    Starts a new SessionData in a session store (e.g. st.session_state), dropping previous edits.
+
+    Returns:
+    SessionData: The new session data.
+    """
+    session_data = SessionData(base, start, end)
+    session[SESSION_KEY] = session_data
+    return session_data
+
+
+def get_session_data(session):
+    """
+    Returns the session's SessionData, or None if the Dashboard has not started one.
+    """
+    return session.get(SESSION_KEY)
+
+
+def session_frame(session):
+    """
+    Returns the session's materialized frame, falling back to a legacy "filtered_df", or None.
+    """
+    session_data = get_session_data(session)
+    if session_data is not None:
+        return session_data.frame()
+    return session.get("filtered_df")
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+from utils.batched_forecast import state_space_arrays
+
+DEFAULT_QUANTILES = (0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95)
+
+
+def _psd_sqrt(matrix):
+    """
+    Returns a square root of a positive semi-definite matrix (singular matrices allowed).
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+    return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+
+class StreamingQuantiles:
+    def __init__(self, low, high, bins=2000):
+        """
+        Constant-memory quantile estimator for many draws at each forecast step.
+
+        Draws are counted into fixed-width histogram bins spanning [low, high] per
+        step, plus one underflow and one overflow bin. Quantiles are read off the
+        cumulative counts with linear interpolation inside a bin, so memory is
+        O(steps x bins) however many draws are added.
+
+        Parameters:
+        low (np.ndarray): Lower edge of the histogram for each step.
+        high (np.ndarray): Upper edge of the histogram for each step.
+        bins (int): Number of bins between low and high.
+        """
+        self.low = np.asarray(low, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.bins = bins
+        self.width = np.maximum(self.high - self.low, 1e-12) / bins
+        steps = len(self.low)
+        self.counts = np.zeros((steps, bins + 2), dtype=np.int64)
+        self.minimum = np.full(steps, np.inf)
+        self.maximum = np.full(steps, -np.inf)
+
+    def update(self, step, values):
+        """
+        Adds the draws for one step.
+        """
+        idx = np.floor((values - self.low[step]) / self.width[step]).astype(np.int64) + 1
+        np.clip(idx, 0, self.bins + 1, out=idx)
+        self.counts[step] += np.bincount(idx, minlength=self.bins + 2)
+        self.minimum[step] = min(self.minimum[step], values.min())
+        self.maximum[step] = max(self.maximum[step], values.max())
+
+    def quantile(self, q):
+        """
+        Returns the estimated q-quantile at every step.
+        """
+        cumulative = self.counts.cumsum(axis=1)
+        target = q * cumulative[:, -1]
+        rows = np.arange(len(cumulative))
+        b = np.minimum((cumulative < target[:, None]).sum(axis=1), self.bins + 1)
+        before = np.where(b > 0, cumulative[rows, np.maximum(b - 1, 0)], 0)
+        in_bin = np.maximum(self.counts[rows, b], 1)
+        frac = np.clip((target - before) / in_bin, 0.0, 1.0)
+
+        # Bin b covers [low + (b - 1) * width, low + b * width]; the outer bins
+        # stretch to the smallest and largest draws seen.
+        lo = self.low + (b - 1) * self.width
+        hi = lo + self.width
+        lo = np.where(b == 0, self.minimum, lo)
+        hi = np.where(b == 0, self.low, hi)
+        lo = np.where(b == self.bins + 1, self.high, lo)
+        hi = np.where(b == self.bins + 1, self.maximum, hi)
+        return lo + frac * (hi - lo)
+
+
+class SimulationSummary:
+    def __init__(self, quantiles, tail_probabilities, mean, std, n_paths):
+        """
+        Summary statistics of simulated yield paths.
+
+        Parameters:
+        quantiles (pd.DataFrame): One column per quantile level, one row per forecast period.
+        tail_probabilities (pd.DataFrame): P(yield > threshold), one column per threshold.
+        mean (pd.Series): Mean of the simulated yields per period.
+        std (pd.Series): Standard deviation of the simulated yields per period.
+        n_paths (int): Number of simulated paths.
+        """
+        self.quantiles = quantiles
+        self.tail_probabilities = tail_probabilities
+        self.mean = mean
+        self.std = std
+        self.n_paths = n_paths
+
+
+def simulate_forecast(model, exog, n_paths=10000, quantiles=DEFAULT_QUANTILES, thresholds=None,
+                      chunk_size=5000, bins=2000, seed=None):
+    """
+    Simulates future yield paths from a fitted ARIMAX model and summarises them
+    with streaming estimators.
+
+    Paths are generated chunk_size at a time, with the state and observation
+    innovations of a whole chunk drawn as one array per step. Only histogram
+    counts, exceedance counts and running sums are kept between chunks, so
+    memory does not grow with n_paths.
+
+    Parameters:
+    model: Compact model (utils.model_artifact) or fitted SARIMAX results.
+    exog (pd.DataFrame or array-like): Exogenous values, one row per forecast step.
+    n_paths (int): Number of paths to simulate.
+    quantiles (tuple): Quantile levels for the fan chart.
+    thresholds (list): Yield levels for which to estimate P(yield > level) at each step.
+    chunk_size (int): Paths simulated together.
+    bins (int): Histogram resolution of the quantile estimator.
+    seed (int): Seed for the random generator.
+
+    Returns:
+    SimulationSummary: Quantiles, tail probabilities, mean and standard deviation per step.
+    """
+    arrays = state_space_arrays(model)
+    steps = len(exog)
+    index = exog.index if isinstance(exog, (pd.DataFrame, pd.Series)) else pd.RangeIndex(steps)
+    thresholds = [] if thresholds is None else list(thresholds)
+
+    obs_intercept = np.full(steps, arrays["obs_intercept"][0])
+    if len(arrays["exog_coef"]):
+        obs_intercept = obs_intercept + np.asarray(exog, dtype=float).reshape(steps, -1) @ arrays["exog_coef"]
+
+    design = arrays["design"][0]
+    transition = arrays["transition"]
+    state_intercept = arrays["state_intercept"]
+    selection = arrays["selection"]
+    obs_sd = np.sqrt(arrays["obs_cov"][0, 0])
+    state_noise_sqrt = selection @ _psd_sqrt(arrays["state_cov"])
+    initial_sqrt = _psd_sqrt(arrays["state_cov_final"])
+
+    # Analytic moments place the histogram where the draws will fall
+    state_noise = state_noise_sqrt @ state_noise_sqrt.T
+    state_mean = arrays["state"].copy()
+    state_cov = arrays["state_cov_final"].copy()
+    analytic_mean = np.empty(steps)
+    analytic_sd = np.empty(steps)
+    for t in range(steps):
+        analytic_mean[t] = obs_intercept[t] + design @ state_mean
+        analytic_sd[t] = np.sqrt(max(design @ state_cov @ design + obs_sd ** 2, 0.0))
+        state_mean = state_intercept + transition @ state_mean
+        state_cov = transition @ state_cov @ transition.T + state_noise
+    spread = 8 * np.maximum(analytic_sd, 1e-6)
+    estimator = StreamingQuantiles(analytic_mean - spread, analytic_mean + spread, bins=bins)
+
+    rng = np.random.default_rng(seed)
+    exceed = np.zeros((steps, len(thresholds)), dtype=np.int64)
+    threshold_values = np.asarray(thresholds, dtype=float)
+    total = np.zeros(steps)
+    total_sq = np.zeros(steps)
+
+    done = 0
+    while done < n_paths:
+        size = min(chunk_size, n_paths - done)
+        state = arrays["state"] + rng.standard_normal((size, len(arrays["state"]))) @ initial_sqrt.T
+        for t in range(steps):
+            values = obs_intercept[t] + state @ design
+            if obs_sd > 0:
+                values = values + obs_sd * rng.standard_normal(size)
+            estimator.update(t, values)
+            if thresholds:
+                exceed[t] += (values[:, None] > threshold_values).sum(axis=0)
+            # Sums are taken around the analytic mean to keep the variance numerically stable
+            centred = values - analytic_mean[t]
+            total[t] += centred.sum()
+            total_sq[t] += (centred ** 2).sum()
+            noise = rng.standard_normal((size, state_noise_sqrt.shape[1])) @ state_noise_sqrt.T
+            state = state_intercept + state @ transition.T + noise
+        done += size
+
+    offset = total / n_paths
+    mean = analytic_mean + offset
+    std = np.sqrt(np.maximum(total_sq / n_paths - offset ** 2, 0.0))
+    quantile_frame = pd.DataFrame({q: estimator.quantile(q) for q in quantiles}, index=index)
+    tail_frame = pd.DataFrame(exceed / n_paths, index=index, columns=thresholds)
+    return SimulationSummary(quantile_frame, tail_frame, pd.Series(mean, index=index), pd.Series(std, index=index), n_paths)
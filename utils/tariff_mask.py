@@ -0,0 +1,243 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.all_tariffs import all_tariffs
+
+# HTS chapter of each tariff column, in all_tariffs order; bit i of a day's mask is chapter TARIFF_CHAPTERS[i]
+TARIFF_CHAPTERS = [int(column.rsplit("_", 1)[1]) for column in all_tariffs]
+
+_WORD_BITS = 64
+
+
+def tariff_column(chapter):
+    """
+    Returns the column name of an HTS chapter, e.g. 72 -> "start_tariff_72".
+    """
+    return f"start_tariff_{chapter}"
+
+
+class TariffMask:
+    def __init__(self, bits, index=None, chapters=TARIFF_CHAPTERS):
+        """
+        Active tariff chapters of every day, packed as bits.
+
+        Each row is one day and holds a bit per chapter in little-endian uint64
+        words, so the 22 current chapters take one word (8 bytes) per day instead
+        of 22 int64 columns, and the full 99-chapter HTS range would take two.
+
+        Parameters:
+        bits (np.ndarray): (days x words) uint64 bitset.
+        index (pd.Index): Date of each row; defaults to 0..days-1.
+        chapters (list): HTS chapter of each bit.
+        """
+        self.chapters = list(chapters)
+        self.bits = np.asarray(bits, dtype=np.uint64).reshape(len(bits), self.n_words(len(self.chapters)))
+        self.index = pd.RangeIndex(len(self.bits)) if index is None else pd.Index(index)
+
+    @staticmethod
+    def n_words(n_chapters):
+        """
+        Returns the uint64 words needed per day for a number of chapters.
+        """
+        return max(1, -(-n_chapters // _WORD_BITS))
+
+    @classmethod
+    def from_flags(cls, flags, index=None, chapters=TARIFF_CHAPTERS):
+        """
+        Packs a (days x chapters) array of flags; any value above 0 counts as active.
+        """
+        flags = np.asarray(flags)
+        if flags.dtype != bool:
+            flags = np.nan_to_num(flags.astype(np.float64), nan=0.0) > 0
+        n_words = cls.n_words(len(chapters))
+        packed = np.packbits(flags, axis=1, bitorder="little")
+        padded = np.zeros((len(flags), n_words * 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        return cls(padded.view("<u8"), index=index, chapters=chapters)
+
+    @classmethod
+    def from_frame(cls, df, chapters=TARIFF_CHAPTERS):
+        """
+        Packs the start_tariff_* columns of a frame; chapters without a column are inactive.
+
+        Parameters:
+        df (pd.DataFrame): Frame holding some or all of the tariff columns.
+        chapters (list): Chapters to keep.
+
+        Returns:
+        TariffMask: The packed flags, indexed like df.
+        """
+        flags = np.zeros((len(df), len(chapters)), dtype=bool)
+        for i, chapter in enumerate(chapters):
+            column = tariff_column(chapter)
+            if column in df.columns:
+                flags[:, i] = np.nan_to_num(pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64), nan=0.0) > 0
+        return cls.from_flags(flags, index=df.index, chapters=chapters)
+
+    def __len__(self):
+        return len(self.bits)
+
+    def _with_bits(self, bits, index=None):
+        return TariffMask(bits, index=self.index if index is None else index, chapters=self.chapters)
+
+    def expand(self):
+        """
+        Returns the (days x chapters) boolean flags.
+        """
+        unpacked = np.unpackbits(np.ascontiguousarray(self.bits).view(np.uint8), axis=1, bitorder="little")
+        return unpacked[:, :len(self.chapters)].astype(bool)
+
+    def active(self, chapter):
+        """
+        Returns whether one chapter is active on each day.
+        """
+        i = self.chapters.index(chapter)
+        return (self.bits[:, i // _WORD_BITS] >> np.uint64(i % _WORD_BITS)) & np.uint64(1) == 1
+
+    def any(self):
+        """
+        Returns whether any chapter is active on each day.
+        """
+        return (self.bits != 0).any(axis=1)
+
+    def set(self, positions, chapter, value=True):
+        """
+        Switches one chapter on (or off) at the given row positions, in place.
+        """
+        i = self.chapters.index(chapter)
+        bit = np.uint64(1) << np.uint64(i % _WORD_BITS)
+        word = self.bits[positions, i // _WORD_BITS]
+        self.bits[positions, i // _WORD_BITS] = word | bit if value else word & ~bit
+
+    def take(self, positions):
+        """
+        Returns the rows at the given positions.
+        """
+        return self._with_bits(self.bits[positions], index=self.index[positions])
+
+    def reindex(self, index):
+        """
+        Returns the rows for the given labels; labels the mask has no row for are inactive.
+        """
+        index = pd.Index(index)
+        positions = self.index.get_indexer(index)
+        bits = np.zeros((len(index), self.bits.shape[1]), dtype=np.uint64)
+        found = positions >= 0
+        bits[found] = self.bits[positions[found]]
+        return self._with_bits(bits, index=index)
+
+    def lag(self, periods=1):
+        """
+        Returns each row's flags from periods rows earlier; the first rows are inactive.
+        """
+        shifted = np.zeros_like(self.bits)
+        if periods < len(self.bits):
+            shifted[periods:] = self.bits[:len(self.bits) - periods]
+        return self._with_bits(shifted)
+
+    def lead(self, periods=1):
+        """
+        Returns each row's flags from periods rows later; the last rows are inactive.
+        """
+        shifted = np.zeros_like(self.bits)
+        if periods < len(self.bits):
+            shifted[:len(self.bits) - periods] = self.bits[periods:]
+        return self._with_bits(shifted)
+
+    def monthly_any(self):
+        """
+        Collapses daily rows to months: a chapter is active in a month if it is active on any of its days.
+
+        Requires a date index. Rows are labelled with the month-end date, as
+        a monthly resample labels them; months without rows are left out.
+        """
+        index = pd.DatetimeIndex(self.index)
+        order = np.argsort(index.values, kind="stable")
+        months = index[order].to_period("M")
+        if len(months) == 0:
+            return self._with_bits(self.bits[:0], index=pd.DatetimeIndex([]))
+        starts = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+        bits = np.bitwise_or.reduceat(self.bits[order], starts, axis=0)
+        return self._with_bits(bits, index=months[starts].to_timestamp(how="end").normalize())
+
+    def to_frame(self, dtype=np.int8):
+        """
+        Expands the mask to one start_tariff_* column per chapter.
+        """
+        return pd.DataFrame(
+            self.expand().astype(dtype), index=self.index, columns=[tariff_column(c) for c in self.chapters]
+        )
+
+    def to_model_columns(self, dtype=np.float64):
+        """
+        Expands the mask to the tariff exog the models take: each start_tariff_*
+        column, then its previous-row _lag_effect, then its next-row _future_effect.
+
+        Only call this at the forecast boundary; everything before it can stay packed.
+        """
+        columns = [tariff_column(c) for c in self.chapters]
+        flags = np.hstack([self.expand(), self.lag().expand(), self.lead().expand()]).astype(dtype)
+        names = columns + [f"{c}_lag_effect" for c in columns] + [f"{c}_future_effect" for c in columns]
+        return pd.DataFrame(flags, index=self.index, columns=names)
+
+    def nbytes(self):
+        """
+        Returns the size of the packed flags in bytes.
+        """
+        return self.bits.nbytes
+
+
+def benchmark(years=(2, 10, 30), chapters=(len(TARIFF_CHAPTERS), 99), seed=0):
+    """
+    Compares the packed mask with int64 tariff columns on random daily flags.
+
+    Returns:
+    list: One dict per (years, chapters) with bytes and seconds of both representations.
+    """
+    rng = np.random.default_rng(seed)
+    reports = []
+    for n_years in years:
+        dates = pd.date_range("1990-01-01", periods=int(n_years * 365.25), freq="D")
+        for n_chapters in chapters:
+            chapter_ids = list(range(1, n_chapters + 1)) if n_chapters != len(TARIFF_CHAPTERS) else TARIFF_CHAPTERS
+            flags = (rng.random((len(dates), n_chapters)) < 0.01).astype(np.int64)
+            df = pd.DataFrame(flags, index=dates, columns=[tariff_column(c) for c in chapter_ids])
+
+            start = time.perf_counter()
+            monthly = (df.groupby(df.index.to_period("M")).mean() > 0).astype(int)
+            lagged = monthly.shift(1).fillna(0)
+            future = monthly.shift(-1).fillna(0)
+            frame_seconds = time.perf_counter() - start
+            frame_bytes = int(df.memory_usage(index=False).sum())
+
+            mask = TariffMask.from_frame(df, chapters=chapter_ids)
+            start = time.perf_counter()
+            model_columns = mask.monthly_any().to_model_columns()
+            mask_seconds = time.perf_counter() - start
+
+            expected = pd.concat([monthly, lagged, future], axis=1).to_numpy(dtype=np.float64)
+            assert np.array_equal(model_columns.to_numpy(), expected)
+            reports.append({
+                "years": n_years,
+                "chapters": n_chapters,
+                "frame_bytes": frame_bytes,
+                "mask_bytes": mask.nbytes(),
+                "frame_seconds": frame_seconds,
+                "mask_seconds": mask_seconds,
+            })
+    return reports
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.tariff_mask [years ...]
+    lengths = [float(arg) for arg in sys.argv[1:]] or [2, 10, 30]
+    for report in benchmark(lengths):
+        print(
+            f"{report['years']:>4g} years, {report['chapters']:>2} chapters: "
+            f"int64 columns {report['frame_bytes'] / 1024:.0f} KiB, mask {report['mask_bytes'] / 1024:.0f} KiB "
+            f"({report['frame_bytes'] / report['mask_bytes']:.0f}x); monthly + lag/lead "
+            f"{report['frame_seconds'] * 1e3:.2f} ms with pandas, {report['mask_seconds'] * 1e3:.2f} ms with the mask"
+        )
@@ -1,25 +1,83 @@
-import pickle
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 from utils.all_tariffs import all_tariffs
 from utils.all_maturities import all_maturities 
+from utils.model_registry import model_registry
+from utils.forecasting import ForecastError, cached_forecast, forecast_maturities, prepare_exog
+from utils.forecast_cache import exog_digest
+from utils.batched_forecast import BatchedStateSpace
+from utils.simulation import DEFAULT_QUANTILES, simulate_forecast
+from utils.model_catalog import get_catalog, groups_for_model_type, groups_from_columns, model_path_for, model_type_for
 #from utils.all_models import all_models
 #from utils.non_tariff_columns import non_tariff_columns
 
+# Simulation summaries kept for reruns (each is a few small frames)
+SIMULATION_CACHE_SIZE = 32
+
+_simulations = OrderedDict()
+_simulations_lock = threading.Lock()
+
+# Every tariff exog column the models take: the start flags, then their lag and future effects
+tariff_exog_columns = (
+    list(all_tariffs)
+    + [f"{tariff}_lag_effect" for tariff in all_tariffs]
+    + [f"{tariff}_future_effect" for tariff in all_tariffs]
+)
+
+
+class ScenarioForecast:
+    def __init__(self, mean, lower, upper, scenarios, maturities, index):
+        """
+        Forecasts for a batch of exogenous scenarios.
+
+        Parameters:
+        mean, lower, upper (np.ndarray): Arrays shaped (scenario x maturity x step).
+        scenarios (list): Scenario labels.
+        maturities (list): Maturities in years.
+        index (pd.Index): Forecast periods.
+        """
+        self.mean = mean
+        self.lower = lower
+        self.upper = upper
+        self.scenarios = list(scenarios)
+        self.maturities = list(maturities)
+        self.index = index
+
+    def to_frame(self):
+        """
+        Returns the forecasts as a tidy DataFrame with one row per scenario, maturity and period.
+        """
+        n_scenarios, n_maturities, steps = self.mean.shape
+        return pd.DataFrame({
+            "scenario": np.repeat(self.scenarios, n_maturities * steps),
+            "maturity": np.tile(np.repeat(self.maturities, steps), n_scenarios),
+            "date": np.tile(np.asarray(self.index), n_scenarios * n_maturities),
+            "mean": self.mean.ravel(),
+            "lower": self.lower.ravel(),
+            "upper": self.upper.ravel(),
+        })
+
 
 class YieldForecastCalculator:
-    def __init__(self, future_data):
+    def __init__(self, future_data, executor="thread", max_workers=None):
         """
         Initializes the YieldForecastCalculator with future data and exogenous columns.
 
         Parameters:
         future_data (pd.DataFrame): DataFrame containing the future data with exogenous variables.
+        executor (str): "thread" or "process" to forecast the maturities concurrently, None to run them in turn.
+        max_workers (int): Number of concurrent workers (defaults to one per maturity, capped at the CPU count).
         """
         self.future_data = future_data
         self.exog_columns = [col for col in future_data.columns if col != "date"]
+        self.executor = executor
+        self.max_workers = max_workers
         self.predictions = {}
+        self.errors = {}
         self._validate_inputs()
         self._load_models_and_predict()
 
@@ -29,49 +87,51 @@ class YieldForecastCalculator:
         """
         contains_tariff = any(tariff in self.exog_columns for tariff in all_tariffs)
         if not contains_tariff:
-            # Ensure all tariff columns are present and set to 0 if missing
-            for tariff in all_tariffs:
+            # Ensure all tariff columns (flags, lag and future effects) are present and set to 0 if missing
+            for tariff in tariff_exog_columns:
                 if tariff not in self.future_data.columns:
                     self.future_data[tariff] = 0
-            self.exog_columns.extend(all_tariffs)
+                if tariff not in self.exog_columns:
+                    self.exog_columns.append(tariff)
 
         # Determine model type based on non-tariff columns
-        contains_ffr_cpi = all(non_tariff in self.exog_columns for non_tariff in ["FFR", "Inflation"])
-        contains_vix_cs = all(non_tariff in self.exog_columns for non_tariff in ["VIX", "Consumer Sentiment"])
-        contains_m1 = "M1 Supply" in self.exog_columns
-
-        if contains_ffr_cpi and contains_vix_cs and contains_m1:
-            self.model_type = "tariff_ffr_cpi_vix_cs_m1"
-        elif contains_ffr_cpi and contains_vix_cs:
-            self.model_type = "tariff_ffr_cpi_vix_cs"
-        elif contains_ffr_cpi and contains_m1:
-            self.model_type = "tariff_ffr_cpi_m1"
-        elif contains_vix_cs and contains_m1:
-            self.model_type = "tariff_vix_cs_m1"
-        elif contains_ffr_cpi:
-            self.model_type = "tariff_ffr_cpi"
-        elif contains_vix_cs:
-            self.model_type = "tariff_vix_cs"
-        elif contains_m1:
-            self.model_type = "tariff_m1"
-        else:
-            raise ValueError("The exog_columns must contain valid non-tariff columns for the selected tariff model.")
+        groups = groups_from_columns(self.exog_columns)
+        self.model_type = model_type_for(groups)
+
+        # Resolve the models from the catalog index and check the columns before anything is loaded
+        catalog = get_catalog()
+        self.catalog_entries = catalog.models_for(groups)
+        if not self.catalog_entries:
+            raise ValueError(f"The model catalog has no {self.model_type} models.")
+        self.exog_columns = catalog.validate_models(self.catalog_entries, self.exog_columns)
+
+        available = {entry.maturity for entry in self.catalog_entries}
+        for maturity in all_maturities:
+            if maturity not in available:
+                path = model_path_for(maturity, self.model_type)
+                self.errors[f"{maturity}-year"] = ForecastError(maturity, path, "FileNotFoundError", f"{path} is not in the model catalog.")
 
     def _load_models_and_predict(self):
         """
         Loads the models for each maturity and performs predictions.
+
+        Maturities whose model fails to load or forecast are recorded in self.errors
+        as ForecastError tuples instead of aborting the other maturities.
         """
-        selected_models = [
-            f"arima_model_{maturity}-year_monthly_tariff_{self.model_type}.pkl"
-            for maturity in all_maturities
-        ]
-
-        for maturity, model_path in zip(all_maturities, selected_models):
-            forecast_mean, forecast_lower, forecast_upper = self._predict_single_yield(model_path)
-            self.predictions[f"{maturity}-year"] = {
-                "mean": forecast_mean,
-                "lower": forecast_lower,
-                "upper": forecast_upper,
+        results = forecast_maturities(
+            [(entry.maturity, entry.path) for entry in self.catalog_entries],
+            self.future_data[self.exog_columns],
+            executor=self.executor,
+            max_workers=self.max_workers,
+        )
+        for result in results:
+            if result.error is not None:
+                self.errors[f"{result.maturity}-year"] = result.error
+                continue
+            self.predictions[f"{result.maturity}-year"] = {
+                "mean": result.mean,
+                "lower": result.lower,
+                "upper": result.upper,
             }
 
     def predict_single_yield(self, model_pickle_path):
@@ -84,25 +144,86 @@ class YieldForecastCalculator:
         Returns:
         tuple: The predicted yield mean, lower bound, and upper bound for the confidence interval.
         """
-        with open(model_pickle_path, 'rb') as f:
-            model = pickle.load(f)
+        exog_test = prepare_exog(self.future_data[self.exog_columns])
+        return cached_forecast(model_pickle_path, exog_test, alpha=0.2)
 
-        self.future_data.index = pd.to_datetime(self.future_data.index).to_period("M")
-        exog_test = self.future_data[self.exog_columns]
+    @classmethod
+    def forecast_many(cls, scenarios, exog_columns=None, model_type=None, index=None, alpha=0.2, labels=None):
+        """
+        Forecasts every maturity for a batch of exogenous scenarios in one pass.
 
-        forecast = model.get_forecast(steps=len(self.future_data), exog=exog_test, alpha=0.2)
-        forecast_ci = forecast.conf_int()
+        Models are loaded once and stacked into a BatchedStateSpace. The state
+        recursion, which does not depend on exog, runs once for the whole batch;
+        each scenario only adds its exog @ beta term.
 
-        forecast_lower = pd.Series(forecast_ci.iloc[:, 0].values, index=self.future_data.index)
-        forecast_upper = pd.Series(forecast_ci.iloc[:, 1].values, index=self.future_data.index)
-        forecast_mean = pd.Series(forecast.predicted_mean.values, index=self.future_data.index)
+        Parameters:
+        scenarios (np.ndarray or list): A (scenario x step x exog) array, or a list of
+            DataFrames with the same columns and number of rows.
+        exog_columns (list): Column names for the last array axis (required for arrays).
+        model_type (str): Model type suffix. Determined from the columns when omitted.
+        index (pd.Index): Forecast periods. Taken from the first frame when omitted.
+        alpha (float): Significance level of the prediction intervals.
+        labels (list): Scenario labels. Taken from the frames' names when omitted.
 
-        return forecast_mean, forecast_lower, forecast_upper
+        Returns:
+        ScenarioForecast: mean, lower and upper arrays shaped (scenario x maturity x step).
+        """
+        if isinstance(scenarios, np.ndarray):
+            if exog_columns is None:
+                raise ValueError("exog_columns is required when scenarios is an array.")
+            exog = np.asarray(scenarios, dtype=float)
+            exog_columns = list(exog_columns)
+        else:
+            frames = list(scenarios)
+            if exog_columns is None:
+                exog_columns = [col for col in frames[0].columns if col != "date"]
+            if index is None:
+                index = prepare_exog(frames[0]).index
+            exog = np.stack([frame[exog_columns].to_numpy(dtype=float) for frame in frames])
+            if labels is None:
+                labels = [getattr(frame, "name", None) for frame in frames]
+                if any(label is None for label in labels):
+                    labels = None
+        if exog.ndim != 3 or exog.shape[2] != len(exog_columns):
+            raise ValueError("scenarios must have shape (scenario x step x exog columns).")
+
+        # Tariff-free scenarios run the tariff models with every tariff switched off
+        if not any(tariff in exog_columns for tariff in all_tariffs):
+            added = [tariff for tariff in tariff_exog_columns if tariff not in exog_columns]
+            exog = np.concatenate([exog, np.zeros(exog.shape[:2] + (len(added),))], axis=2)
+            exog_columns = exog_columns + added
+
+        groups = groups_from_columns(exog_columns) if model_type is None else groups_for_model_type(model_type)
+        if groups is None:
+            raise ValueError(f"Unknown model type: {model_type}")
+        model_type = model_type_for(groups)
+        n_scenarios, steps, _ = exog.shape
+        if index is None:
+            index = pd.RangeIndex(steps)
+        if labels is None:
+            labels = list(range(n_scenarios))
+
+        # Check the scenario columns against the catalog before loading any model
+        catalog = get_catalog()
+        entries = [catalog.resolve(groups, maturity) for maturity in all_maturities]
+        model_columns = catalog.validate_models(entries, exog_columns)
+        exog = exog[:, :, [exog_columns.index(name) for name in model_columns]]
+
+        models = [model_registry.get(entry.path) for entry in entries]
+        engine = BatchedStateSpace(models, labels=all_maturities)
+        base = engine.forecast(steps, np.zeros((steps, engine.k_exog)), alpha=alpha)
+
+        # (scenario x step x exog) @ (maturity x exog) -> (scenario x maturity x step)
+        mean = base["mean"][None, :, :] + np.einsum("shk,mk->smh", exog, engine.exog_coef)
+        half_width = (base["upper"] - base["mean"])[None, :, :]
+        return ScenarioForecast(mean, mean - half_width, mean + half_width, labels, all_maturities, index)
 
     def plot_forecasts(self):
         """
         Plots the forecasted yields for all maturities on a single graph.
         """
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(12, 8))
         for maturity, data in self.predictions.items():
             plt.plot(data["mean"].index, data["mean"].values, label=f"{maturity} Mean")
@@ -150,9 +271,6 @@ class YieldForecastCalculator:
         """
         return self.predictions
 
-import pickle
-import pandas as pd
-
 def get_yield_forecast_at_end_date(model_path, future_data, end_date):
     """
     Returns the yield forecast at the specified end date using a pre-trained model.
@@ -168,27 +286,54 @@ def get_yield_forecast_at_end_date(model_path, future_data, end_date):
     # Ensure the end_date is in datetime format
     end_date = pd.to_datetime(end_date)
 
-    # Load the model
-    with open(model_path, 'rb') as f:
-        model = pickle.load(f)
-
-    # Prepare the future data
-    # Ensure the index is a PeriodIndex
-    if not isinstance(future_data.index, pd.PeriodIndex):
-        future_data.index = pd.to_datetime(future_data.index).to_period("M")    exog_columns = [col for col in future_data.columns if col != "date"]
-    exog_test = future_data[exog_columns]
+    # Prepare the future data with a monthly PeriodIndex
+    exog_test = prepare_exog(future_data)
 
-    # Generate the forecast
-    forecast = model.get_forecast(steps=len(future_data), exog=exog_test, alpha=0.2)
-    forecast_ci = forecast.conf_int()
-
-    # Extract the forecasted mean, lower, and upper bounds
-    forecast_mean = pd.Series(forecast.predicted_mean.values, index=future_data.index)
-    forecast_lower = pd.Series(forecast_ci.iloc[:, 0].values, index=future_data.index)
-    forecast_upper = pd.Series(forecast_ci.iloc[:, 1].values, index=future_data.index)
+    # Generate the forecast (reused across reruns and sessions for identical inputs)
+    forecast_mean, forecast_lower, forecast_upper = cached_forecast(model_path, exog_test, alpha=0.2)
 
     # Get the forecast at the specified end date
     if end_date not in forecast_mean.index:
         raise ValueError(f"The specified end date {end_date} is not within the forecast range.")
 
-    return forecast_mean.loc[end_date]
\ No newline at end of file
+    return forecast_mean.loc[end_date]
+
+
+def get_yield_simulation(model_path, future_data, n_paths=10000, quantiles=DEFAULT_QUANTILES, thresholds=None, seed=None):
+    """
+    Simulates future yield paths with a pre-trained model and summarises them for a fan chart.
+
+    With a seed the result is deterministic, so it is cached by model identity,
+    exog content and settings, and a rerun with the same inputs reuses it.
+
+    Parameters:
+    model_path (str): Path to the pickled model file.
+    future_data (pd.DataFrame): DataFrame containing the future data with exogenous variables.
+    n_paths (int): Number of simulated paths.
+    quantiles (tuple): Quantile levels to estimate at each period.
+    thresholds (list): Yield levels for which to estimate P(yield > level) at each period.
+    seed (int): Seed for the random generator.
+
+    Returns:
+    SimulationSummary: Quantiles, tail probabilities, mean and standard deviation per period.
+    """
+    exog_test = prepare_exog(future_data)
+    key = None
+    if seed is not None:
+        key = (
+            model_registry.identity(model_path), exog_digest(exog_test), n_paths, tuple(quantiles),
+            None if thresholds is None else tuple(thresholds), seed,
+        )
+        with _simulations_lock:
+            if key in _simulations:
+                _simulations.move_to_end(key)
+                return _simulations[key]
+
+    model = model_registry.get(model_path)
+    summary = simulate_forecast(model, exog_test, n_paths=n_paths, quantiles=quantiles, thresholds=thresholds, seed=seed)
+    if key is not None:
+        with _simulations_lock:
+            _simulations[key] = summary
+            while len(_simulations) > SIMULATION_CACHE_SIZE:
+                _simulations.popitem(last=False)
+    return summary
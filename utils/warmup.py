@@ -0,0 +1,159 @@
+import importlib
+import os
+import threading
+import time
+
+from utils.model_bundle import MODELS_DIR
+from utils.model_catalog import get_catalog
+from utils.model_registry import model_registry
+
+# Heavy modules imported by the forecasting and plotting paths
+WARMUP_MODULES = [
+    "numpy",
+    "pandas",
+    "scipy.optimize",
+    "scipy.stats",
+    "statsmodels.tsa.statespace.sarimax",
+    # The pages draw on bare Figures; pyplot is left out so it is never set up off the main thread
+    "matplotlib.figure",
+]
+
+_lock = threading.Lock()
+_ready = threading.Event()
+_thread = None
+_state = {"status": "idle", "error": None, "steps": [], "started": None, "finished": None}
+
+
+def _record(step, started, detail=""):
+    _state["steps"].append({"step": step, "seconds": time.perf_counter() - started, "detail": detail})
+
+
+def _failed(e):
+    return f"failed: {type(e).__name__}: {e}"
+
+
+def _load_models(models_dir):
+    """
+    Loads the bundle and every catalog model, recording a model that fails and moving on to the next.
+    """
+    try:
+        bundle = model_registry.bundle()
+    except Exception as e:
+        bundle = None
+        _record("open model bundle", time.perf_counter(), _failed(e))
+    if bundle is not None:
+        for maturity, model_type in bundle.keys():
+            started = time.perf_counter()
+            try:
+                bundle.get(maturity, model_type)
+                _record(f"bundle {maturity}-year {model_type}", started, bundle.path)
+            except Exception as e:
+                _record(f"bundle {maturity}-year {model_type}", started, _failed(e))
+
+    started = time.perf_counter()
+    try:
+        catalog = get_catalog(models_dir)
+    except Exception as e:
+        _record("scan model catalog", started, _failed(e))
+        return
+    _record("scan model catalog", started, f"{len(catalog)} models")
+    for entry in catalog.entries():
+        started = time.perf_counter()
+        try:
+            model_registry.get(entry.path)
+            _record(f"load {os.path.basename(entry.path)}", started)
+        except Exception as e:
+            _record(f"load {os.path.basename(entry.path)}", started, _failed(e))
+    unreadable = [os.path.basename(path) for path in catalog.unreadable]
+    for name in unreadable:
+        _record(f"load {name}", time.perf_counter(), "failed: unreadable pickle")
+    for name in catalog.missing():
+        if name not in unreadable:
+            _record(f"load {name}", time.perf_counter(), "missing")
+
+
+def _run(models_dir):
+    """
+    Imports the heavy modules and loads the model catalog, recording each step.
+
+    Only a failed import fails the warm-up; models that cannot be loaded are
+    recorded as failed steps.
+    """
+    try:
+        try:
+            for module in WARMUP_MODULES:
+                started = time.perf_counter()
+                importlib.import_module(module)
+                _record(f"import {module}", started)
+        except Exception as e:
+            _state["status"] = "failed"
+            _state["error"] = f"{type(e).__name__}: {e}"
+            return
+        _load_models(models_dir)
+        _state["status"] = "ready"
+    finally:
+        _state["finished"] = time.time()
+        _ready.set()
+
+
+def start_warmup(models_dir=MODELS_DIR):
+    """
+    Starts warming up this process in a background thread. Later calls do nothing.
+
+    Parameters:
+    models_dir (str): Directory holding the model catalog.
+
+    Returns:
+    bool: True if this call started the warm-up.
+    """
+    global _thread
+    with _lock:
+        if _thread is not None:
+            return False
+        _state["status"] = "running"
+        _state["started"] = time.time()
+        _thread = threading.Thread(target=_run, args=(models_dir,), name="model-warmup", daemon=True)
+        _thread.start()
+    return True
+
+
+def warmup_status():
+    """
+    Returns "idle", "running", "ready" or "failed".
+    """
+    return _state["status"]
+
+
+def is_ready():
+    """
+    Returns True once the warm-up has finished successfully.
+    """
+    return _state["status"] == "ready"
+
+
+def wait_for_warmup(timeout=None):
+    """
+    Blocks until the warm-up has finished or timeout seconds have passed.
+
+    Returns:
+    bool: True if the warm-up finished (successfully or not).
+    """
+    return _ready.wait(timeout)
+
+
+def warmup_report():
+    """
+    Returns what the warm-up loaded and how long each step took.
+
+    Returns:
+    dict: status, error, total_seconds, a list of {"step", "seconds", "detail"}
+    entries and the model registry counters.
+    """
+    steps = list(_state["steps"])
+    return {
+        "status": _state["status"],
+        "error": _state["error"],
+        "total_seconds": sum(step["seconds"] for step in steps),
+        "steps": steps,
+        "registry": model_registry.stats(),
+    }